@@ -1,7 +1,13 @@
 # habittracker/__init__.py
-from importlib.metadata import PackageNotFoundError, version
 
-try:
-    __version__ = version("habittracker")
-except PackageNotFoundError:
-    __version__ = "0.0.0"
+
+def __getattr__(name):
+    # resolved lazily, importlib.metadata is slow to import
+    if name == "__version__":
+        from importlib.metadata import PackageNotFoundError, version
+
+        try:
+            return version("habittracker")
+        except PackageNotFoundError:
+            return "0.0.0"
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
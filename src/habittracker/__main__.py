@@ -1,5 +1,7 @@
 # habittracker/__main__.py
+import sys
+
 from .main import main
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
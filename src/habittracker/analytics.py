@@ -1,7 +1,12 @@
+import contextlib
+import math
+from datetime import date, datetime, timedelta
+
 from . import habits
 
-SINCE = habits.first_start()
-UNTIL = habits.now()
+# time frame for analytics, all time until set_period is called
+SINCE: datetime = datetime.min
+UNTIL: datetime = datetime.max
 
 
 def set_period(since=None, until=None):
@@ -9,6 +14,81 @@ def set_period(since=None, until=None):
     SINCE = since or habits.first_start()
     UNTIL = until or habits.now()
 
+
+@contextlib.contextmanager
+def time_frame(since=None, until=None):
+    """Use a time frame like set_period, restoring the previous one afterwards"""
+    global SINCE, UNTIL
+    previous = SINCE, UNTIL
+    set_period(since, until)
+    try:
+        yield
+    finally:
+        SINCE, UNTIL = previous
+
+
+def heatmap_start(year: int) -> date:
+    """Return the first day of a year's heatmap, the Monday on or before January 1"""
+    first = date(year, 1, 1)
+    return first - timedelta(days=first.weekday())
+
+
+def heatmap(habit_list: list[habits.Habit], year: int) -> list[int]:
+    """Return how many of the habits were completed on each day of a year's heatmap
+
+    The heatmap is a grid of 7 weekdays by 53 weeks (54 when a leap year starts
+    on a Sunday), read column by column from heatmap_start(year). Each count is
+    cut from the habit's cached day bitmap with a shift and a mask, so the cost
+    does not depend on how long the habit's history is.
+
+    Returns:
+        list[int]: count of each day, days before January 1 and after December 31 included
+    """
+    start = heatmap_start(year)
+    size = (date(year, 12, 31) - start).days // 7 * 7 + 7
+    counts = [0] * size
+    for habit in habit_list:
+        window = _day_window(habit, start, size)
+        if window:
+            bits = f"{window:0{size}b}"[::-1]  # bit i is the i-th day
+            counts = [count + (bit == "1") for count, bit in zip(counts, bits)]
+    return counts
+
+
+def _day_window(habit: habits.Habit, start: date, size: int) -> int:
+    """Return the habit's day bitmap for the days from start on, bit 0 being start"""
+    first, days = habit.completion_days()
+    shift = start.toordinal() - first
+    return (days >> shift if shift >= 0 else days << -shift) & ((1 << size) - 1)
+
+
+def _week_bits(days: int, size: int) -> int:
+    """Return a bitmap with a bit per 7 days of a day bitmap, set when any of them is"""
+    any_day = days
+    for shift in range(1, 7):
+        any_day |= days >> shift  # bit 7k is set when any of the days 7k to 7k + 6 is
+    return int(f"{any_day:0{size}b}"[::-1][::7][::-1] or "0", 2)
+
+
+def strongest_pairs(report: dict, limit: int = 10) -> list[dict]:
+    """Return the most correlated pairs of a GroupAnalytics.co_completion report
+
+    Returns:
+        list[dict]: {"habits": (name, name), "both", "correlation"}, strongest first
+    """
+    pairs = []
+    names = [habit["name"] for habit in report["habits"]]
+    for i, row in enumerate(report["correlation"]):
+        for j in range(i + 1, len(row)):
+            if row[j] is not None:
+                pairs.append((row[j], report["both"][i][j], i, j))
+    pairs.sort(key=lambda pair: (-pair[0], -pair[1]))
+    return [
+        {"habits": (names[i], names[j]), "both": both, "correlation": correlation}
+        for correlation, both, i, j in pairs[:limit]
+    ]
+
+
 class HabitAnalytics:
     def __init__(self, habit: habits.Habit):
         self.habit = habit
@@ -69,6 +149,37 @@ class HabitAnalytics:
         completed = self.completed_periods()
         return completed / total
 
+    def summary(self) -> dict:
+        """Return all of the above in one pass over the periods
+
+        Returns:
+            dict: {"highest_streak", "completed_periods", "total_periods", "completion_rate"}
+        """
+        highest = current = completed_periods = total_periods = 0
+        streak_valid = False
+        for period in sorted(self.habit.periods, key=lambda period: period["start"]):
+            if period["start"] > UNTIL:
+                break
+            completed = self.habit.get_completed(period)
+            if period["end"] >= SINCE:
+                total_periods += 1
+                completed_periods += completed
+            if completed:
+                current += 1
+                if period["end"] > SINCE:
+                    streak_valid = True
+                if streak_valid:
+                    highest = max(highest, current)
+            elif period["end"] <= UNTIL:
+                current = 0
+                streak_valid = False
+        return {
+            "highest_streak": highest,
+            "completed_periods": completed_periods,
+            "total_periods": total_periods,
+            "completion_rate": completed_periods / total_periods if total_periods else 0.0,
+        }
+
 
 class GroupAnalytics:
     def __init__(self, habits: list[habits.Habit]):
@@ -107,3 +218,63 @@ class GroupAnalytics:
             habit_analytics = HabitAnalytics(habit)
             total_rate += habit_analytics.completion_rate()
         return total_rate / len(self.habits)
+
+    def co_completion(self, unit: str = "days") -> dict:
+        """Return how often each pair of habits was completed on the same day or week
+
+        Each habit's completions in the set time frame are cut from its cached
+        day bitmap, a bit per day or per week from Monday, so comparing a pair
+        is one AND and one popcount over the whole time frame. The correlation
+        is the phi coefficient of the two habits' completed slots, None when
+        either habit was completed in every slot or in none.
+
+        Args:
+            unit (str): "days" or "weeks"
+
+        Returns:
+            dict: {"unit", "since", "until", "slots", "habits": [{"uuid", "name",
+                "completed"}], "both": [[int]], "correlation": [[float | None]]},
+                both matrices in the order of the habits
+        """
+        first_days = [habit.start_date.date() for habit in self.habits] + [
+            date.fromordinal(habit.completion_days()[0])
+            for habit in self.habits
+            if habit.completions
+        ]
+        until = min(UNTIL, habits.now()).date()
+        since = max(SINCE.date(), min(first_days, default=until))
+        if unit == "weeks":
+            since -= timedelta(days=since.weekday())  # weeks start on Monday
+        size = max((until - since).days + 1, 0)
+
+        bitmaps = [_day_window(habit, since, size) for habit in self.habits]
+        if unit == "weeks":
+            bitmaps = [_week_bits(days, size) for days in bitmaps]
+            size = math.ceil(size / 7)
+        counts = [bits.bit_count() for bits in bitmaps]
+
+        count = len(self.habits)
+        both = [[0] * count for _ in range(count)]
+        correlation = [[None] * count for _ in range(count)]
+        for i in range(count):
+            for j in range(i, count):
+                both[i][j] = both[j][i] = (bitmaps[i] & bitmaps[j]).bit_count()
+                a, b = counts[i], counts[j]
+                spread = a * (size - a) * b * (size - b)
+                if spread:
+                    correlation[i][j] = correlation[j][i] = (
+                        size * both[i][j] - a * b
+                    ) / math.sqrt(spread)
+
+        return {
+            "unit": unit,
+            "since": since.isoformat(),
+            "until": until.isoformat(),
+            "slots": size,
+            "habits": [
+                {"uuid": habit.uuid, "name": habit.name, "completed": completed}
+                for habit, completed in zip(self.habits, counts)
+            ],
+            "both": both,
+            "correlation": correlation,
+        }
@@ -0,0 +1 @@
+# habittracker/benchmarks/__init__.py
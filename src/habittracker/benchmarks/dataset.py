@@ -0,0 +1,108 @@
+"""Deterministic synthetic datasets for benchmarks
+
+Run with ``python -m habittracker.benchmarks.dataset --db PATH [options]`` to
+write a dataset to a database, e.g. to try the app with
+``habittracker --db PATH``.
+"""
+
+import argparse
+import random
+import uuid
+from datetime import datetime, timedelta
+
+from .. import habits
+
+END = datetime(2025, 1, 1)  # fixed so that datasets do not depend on the day they are made
+
+# periodicity -> relative weight, roughly how often each is used in practice
+PERIODICITIES = {
+    (1, "days"): 8,
+    (2, "days"): 2,
+    (1, "weeks"): 4,
+    (2, "weeks"): 1,
+    (1, "months"): 2,
+    (3, "months"): 1,
+    (1, "years"): 1,
+}
+
+
+def generate(
+    habit_count: int,
+    years: float,
+    density: float = 0.7,
+    seed: int = 0,
+    end: datetime = END,
+) -> dict:
+    """Return a dataset in the db_handler.load_all format
+
+    Args:
+        habit_count (int): number of habits
+        years (float): history length of each habit, ending at ``end``
+        density (float): probability that a period has a completion
+        seed (int): seed of the generator, equal arguments give equal datasets
+        end (datetime): time the last period of every habit extends past
+    """
+    rng = random.Random(seed)
+    periodicities = rng.choices(
+        list(PERIODICITIES), weights=list(PERIODICITIES.values()), k=habit_count
+    )
+    start_date = end - timedelta(days=round(365.25 * years))
+
+    data = {}
+    for i, (amount, unit) in enumerate(periodicities):
+        habit_uuid = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+        habit = habits.Habit(habit_uuid, f"Habit {i}", {"amount": amount, "unit": unit})
+        habit.start_date = start_date
+        habit.periods = []
+        while not habit.periods or habit.periods[-1]["end"] <= end:
+            habit.periods.append(habit._next_period())
+
+        completions = []
+        for period in habit.periods:
+            if period["start"] < end and rng.random() < density:
+                length = (min(period["end"], end) - period["start"]).total_seconds()
+                offset = timedelta(seconds=int(rng.random() * length))
+                completions.append((period["start"] + offset).isoformat())
+
+        data[habit_uuid] = {
+            "habit": {
+                "name": habit.name,
+                "periodicity_amount": amount,
+                "periodicity_unit": unit,
+                "notes": f"Synthetic {amount} {unit} habit",
+                "start_date": start_date.isoformat(),
+            },
+            "periods": [
+                {"start": period["start"].isoformat(), "end": period["end"].isoformat()}
+                for period in habit.periods
+            ],
+            "completions": completions,
+        }
+    return data
+
+
+def write(path: str, data: dict):
+    """Create the database at the given path and save a dataset to it"""
+    from .. import db_handler
+
+    db_handler.set_db_path(path)
+    db_handler.initialize_database()
+    db_handler.save_all(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", required=True, help="database file to write")
+    parser.add_argument("--habits", type=int, default=100, help="number of habits")
+    parser.add_argument("--years", type=float, default=3, help="years of history")
+    parser.add_argument(
+        "--density", type=float, default=0.7, help="share of completed periods"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="generator seed")
+    args = parser.parse_args()
+
+    write(args.db, generate(args.habits, args.years, args.density, args.seed))
+
+
+if __name__ == "__main__":
+    main()
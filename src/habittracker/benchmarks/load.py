@@ -0,0 +1,190 @@
+"""Load test of the local HTTP API (``habittracker serve``)
+
+Run with ``python -m habittracker.benchmarks.load [--url URL] [options] [--json]``.
+Without ``--url``, a server is started in-process on a synthetic dataset.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+
+async def _request(reader, writer, host: str, path: str, etag: str = None):
+    """Send a GET on a kept-alive connection and return the status, ETag and body"""
+    lines = [f"GET {path} HTTP/1.1", f"Host: {host}"]
+    if etag:
+        lines.append(f"If-None-Match: {etag}")
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+    await writer.drain()
+
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+    status_line, *header_lines = head.split("\r\n")
+    headers = {}
+    for line in header_lines:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get("content-length", 0)))
+    return int(status_line.split(" ")[1]), headers.get("etag"), body
+
+
+async def load(
+    host: str,
+    port: int,
+    paths: list[str],
+    requests: int = 1000,
+    concurrency: int = 10,
+    revalidate: bool = True,
+) -> dict:
+    """Send GET requests over concurrent kept-alive connections and return the figures
+
+    Args:
+        host (str): server host
+        port (int): server port
+        paths (list[str]): paths requested in turn
+        requests (int): total number of requests
+        concurrency (int): number of connections sending requests at the same time
+        revalidate (bool): send the last ETag of each path in If-None-Match
+
+    Each path is requested once beforehand, so that building the server's
+    cached responses is reported as warm-up rather than skewing the latencies.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    began = time.perf_counter()
+    try:
+        for path in paths:
+            await _request(reader, writer, host, path)
+    finally:
+        writer.close()
+    warm_up = time.perf_counter() - began
+
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+    remaining = iter(range(requests))
+
+    async def client():
+        reader, writer = await asyncio.open_connection(host, port)
+        etags: dict[str, str] = {}
+        try:
+            for i in remaining:
+                path = paths[i % len(paths)]
+                began = time.perf_counter()
+                status, etag, _ = await _request(
+                    reader, writer, host, path, etags.get(path) if revalidate else None
+                )
+                latencies.append(time.perf_counter() - began)
+                statuses[status] += 1
+                if etag:
+                    etags[path] = etag
+        finally:
+            writer.close()
+
+    began = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - began
+
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "concurrency": concurrency,
+        "paths": paths,
+        "revalidate": revalidate,
+        "warm_up_ms": round(warm_up * 1000, 3),
+        "elapsed_s": round(elapsed, 3),
+        "requests_per_s": round(len(ordered) / elapsed, 1),
+        "p50_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": round(ordered[int(len(ordered) * 0.95)] * 1000, 3),
+        "p99_ms": round(ordered[int(len(ordered) * 0.99)] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+    }
+
+
+async def _load_local(args) -> dict:
+    """Serve a synthetic dataset in-process and load test it"""
+    from .. import habits
+    from ..server import HabitServer
+    from . import dataset
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        dataset.write(
+            os.path.join(temp_dir, "habits.db"), dataset.generate(args.habits, args.years)
+        )
+        habits.load_habits()
+        server = HabitServer(port=0)
+        await server.start()
+        try:
+            return await load(
+                "127.0.0.1",
+                server.port,
+                args.paths,
+                args.requests,
+                args.concurrency,
+                not args.no_revalidate,
+            )
+        finally:
+            await server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="server to test, e.g. http://127.0.0.1:8765")
+    parser.add_argument(
+        "--paths", nargs="+", default=["/habits", "/analytics"], help="paths to request"
+    )
+    parser.add_argument("--requests", type=int, default=2000, help="total requests")
+    parser.add_argument("--concurrency", type=int, default=20, help="connections")
+    parser.add_argument(
+        "--no-revalidate",
+        action="store_true",
+        help="do not send If-None-Match, i.e. always fetch full responses",
+    )
+    parser.add_argument(
+        "--habits", type=int, default=1000, help="habits of the in-process dataset"
+    )
+    parser.add_argument(
+        "--years", type=float, default=3, help="years of the in-process dataset"
+    )
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    if args.url:
+        url = urlsplit(args.url)
+        report = asyncio.run(
+            load(
+                url.hostname,
+                url.port or 80,
+                args.paths,
+                args.requests,
+                args.concurrency,
+                not args.no_revalidate,
+            )
+        )
+    else:
+        report = asyncio.run(_load_local(args))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"warm-up {report['warm_up_ms']:.2f}ms")
+        print(
+            f"{report['requests']} requests over {report['concurrency']} connections"
+            f" in {report['elapsed_s']:.2f}s: {report['requests_per_s']:.0f} req/s"
+        )
+        print(
+            f"latency p50 {report['p50_ms']:.2f}ms, p95 {report['p95_ms']:.2f}ms,"
+            f" p99 {report['p99_ms']:.2f}ms, max {report['max_ms']:.2f}ms"
+        )
+        print(f"statuses {report['statuses']}")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
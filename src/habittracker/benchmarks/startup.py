@@ -0,0 +1,97 @@
+"""Cold-start benchmark based on ``python -X importtime``
+
+Run with ``python -m habittracker.benchmarks.startup [--runs N] [--json]``.
+Exits with status 1 if any scenario exceeds its import-time budget.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+# scenario -> (python arguments, import-time budget in milliseconds)
+SCENARIOS = {
+    "--version": (["-m", "habittracker", "--version"], 120),  # needs importlib.metadata
+    "--help": (["-m", "habittracker", "--help"], 60),
+    "import main": (["-c", "import habittracker.main"], 40),
+    "import core": (["-c", "import habittracker.habits, habittracker.analytics"], 80),
+    "import cli": (["-c", "import habittracker.cli.app"], 400),
+}
+
+
+def parse_importtime(stderr: str) -> tuple[float, list[tuple[str, float]]]:
+    """Return total import time and top-level modules (ms) from ``-X importtime`` output"""
+    total = 0.0
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        if name.startswith("  "):  # nested imports are indented
+            continue
+        cumulative = int(cumulative_us) / 1000
+        total += cumulative
+        modules.append((name.strip(), cumulative))
+    return total, modules
+
+
+def measure(args: list[str]) -> tuple[float, float, list[tuple[str, float]]]:
+    """Run a scenario in a fresh interpreter and return wall time, import time and modules"""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        capture_output=True,
+        text=True,
+    )
+    wall = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"{args} failed:\n{result.stderr}")
+    total, modules = parse_importtime(result.stderr)
+    return wall, total, modules
+
+
+def run(runs: int = 5) -> dict:
+    """Measure every scenario and return the medians and budgets"""
+    report = {}
+    for name, (args, budget) in SCENARIOS.items():
+        samples = [measure(args) for _ in range(runs)]
+        imports = statistics.median(sample[1] for sample in samples)
+        slowest = sorted(samples[-1][2], key=lambda module: module[1], reverse=True)
+        report[name] = {
+            "wall_ms": round(statistics.median(sample[0] for sample in samples), 2),
+            "import_ms": round(imports, 2),
+            "budget_ms": budget,
+            "within_budget": imports <= budget,
+            "slowest_imports": [
+                {"module": module, "ms": round(ms, 2)} for module, ms in slowest[:5]
+            ],
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="runs per scenario")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    report = run(args.runs)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{'scenario':<14}{'wall':>10}{'imports':>10}{'budget':>10}")
+        for name, result in report.items():
+            status = "" if result["within_budget"] else "  OVER BUDGET"
+            print(
+                f"{name:<14}{result['wall_ms']:>8.1f}ms{result['import_ms']:>8.1f}ms"
+                f"{result['budget_ms']:>8}ms{status}"
+            )
+
+    sys.exit(0 if all(result["within_budget"] for result in report.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
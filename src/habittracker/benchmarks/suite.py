@@ -0,0 +1,181 @@
+"""Runtime benchmarks of the core operations on a synthetic dataset
+
+Run with ``python -m habittracker.benchmarks.suite [options] [--json]``.
+With ``--baseline REPORT.json`` (a previous ``--json`` report), exits with
+status 1 if any benchmark got slower than the tolerance allows.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable
+
+from .. import analytics, habits
+from . import dataset
+
+HABIT_METRICS = ["highest_streak", "total_periods", "completed_periods", "completion_rate"]
+GROUP_METRICS = [
+    "highest_streak",
+    "total_periods",
+    "completed_periods",
+    "average_completion_rate",
+]
+
+
+def measure(func: Callable, repeat: int) -> dict:
+    """Call a function repeatedly and return its fastest and median time"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "min_ms": round(min(samples), 3),
+        "median_ms": round(statistics.median(samples), 3),
+    }
+
+
+def run(
+    habit_count: int = 200,
+    years: float = 3,
+    density: float = 0.7,
+    seed: int = 0,
+    repeat: int = 5,
+) -> dict:
+    """Generate a dataset, time every benchmark on it and return the report"""
+    from .. import db_handler
+    from ..cli.analytics_viewer import AnalyticsViewer
+    from ..cli.habit_manager import HabitManager
+    from ..cli.habit_table import HabitTable
+
+    results = {}
+    original = (habits.now, habits.SNAPSHOT, db_handler.DB_PATH, HabitTable._ROWS_PER_PAGE)
+    habits.now = lambda: dataset.END  # the dataset ends at a fixed time
+    HabitTable._ROWS_PER_PAGE = 20
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            data = dataset.generate(habit_count, years, density, seed)
+            dataset.write(os.path.join(temp_dir, "habits.db"), data)
+
+            # storage
+            habits.SNAPSHOT = False
+            results["load_habits"] = measure(habits.load_habits, repeat)
+            results["save_habits"] = measure(habits.save_habits, repeat)
+            habits.SNAPSHOT = True
+            habits.load_habits()  # writes the snapshot
+            results["load_habits (snapshot)"] = measure(habits.load_habits, repeat)
+
+            # habits
+            habit_list = list(habits.HABITS.get_habits().values())
+            results["Habit.get_streak"] = measure(
+                lambda: [habit.get_streak() for habit in habit_list], repeat
+            )
+            results["Habit.get_period"] = measure(
+                lambda: [habit.get_period() for habit in habit_list], repeat
+            )
+
+            # analytics
+            analytics.set_period()
+            for metric in HABIT_METRICS:
+                results[f"HabitAnalytics.{metric}"] = measure(
+                    lambda: [
+                        getattr(analytics.HabitAnalytics(habit), metric)()
+                        for habit in habit_list
+                    ],
+                    repeat,
+                )
+            group = analytics.GroupAnalytics(habit_list)
+            for metric in GROUP_METRICS:
+                results[f"GroupAnalytics.{metric}"] = measure(
+                    getattr(group, metric), repeat
+                )
+
+            # tables, deferred cells are computed inline outside the event loop
+            for table in (HabitManager(), AnalyticsViewer()):
+                table._reload_table()
+                results[f"{type(table).__name__}._render"] = measure(
+                    table._render, repeat
+                )
+    finally:
+        habits.now, habits.SNAPSHOT, db_handler.DB_PATH, HabitTable._ROWS_PER_PAGE = original
+
+    return {
+        "parameters": {
+            "habits": habit_count,
+            "years": years,
+            "density": density,
+            "seed": seed,
+            "repeat": repeat,
+            "periods": sum(len(entry["periods"]) for entry in data.values()),
+            "completions": sum(len(entry["completions"]) for entry in data.values()),
+        },
+        "python": sys.version.split()[0],
+        "results": results,
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> dict[str, float]:
+    """Return the median time ratio to the baseline of each benchmark over the tolerance"""
+    regressions = {}
+    for name, result in report["results"].items():
+        previous = baseline["results"].get(name)
+        if not previous or not previous["median_ms"]:
+            continue
+        ratio = result["median_ms"] / previous["median_ms"]
+        if ratio > tolerance:
+            regressions[name] = round(ratio, 2)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--habits", type=int, default=200, help="number of habits")
+    parser.add_argument("--years", type=float, default=3, help="years of history")
+    parser.add_argument(
+        "--density", type=float, default=0.7, help="share of completed periods"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="dataset seed")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--baseline", help="previous JSON report to compare against")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=1.25,
+        help="slowdown ratio to the baseline that counts as a regression",
+    )
+    args = parser.parse_args()
+
+    report = run(args.habits, args.years, args.density, args.seed, args.repeat)
+
+    regressions = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        report["regressions"] = regressions
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        parameters = report["parameters"]
+        print(
+            f"{parameters['habits']} habits, {parameters['periods']} periods,"
+            f" {parameters['completions']} completions"
+        )
+        print(f"{'benchmark':<40}{'min':>12}{'median':>12}")
+        for name, result in report["results"].items():
+            status = f"  {regressions[name]}x SLOWER" if name in regressions else ""
+            print(
+                f"{name:<40}{result['min_ms']:>10.2f}ms{result['median_ms']:>10.2f}ms"
+                f"{status}"
+            )
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
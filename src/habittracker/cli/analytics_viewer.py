@@ -1,12 +1,12 @@
 from datetime import datetime, time
 
 from prompt_toolkit import HTML
-from prompt_toolkit import print_formatted_text as print
-from prompt_toolkit import prompt
+from prompt_toolkit.formatted_text import merge_formatted_text
 
 from .. import analytics, habits
-from .habit_table import HabitTable
-from .utils import calendar_picker, clear_screen, radio_list
+from .habit_table import HabitTable, periodicity_sort_key
+from .heatmap import heatmap
+from .utils import calendar_picker, message, radio_list, text_input
 
 
 class AnalyticsViewer(HabitTable):
@@ -15,33 +15,48 @@ class AnalyticsViewer(HabitTable):
     def __init__(self):
         super().__init__()
         self._ACTIONS = {
-            "None": self._action_none,
+            "Heatmap": self._action_heatmap,
             "Overall Analytics": self._action_overall_analytics,
+            "Group Heatmap": self._action_group_heatmap,
+            "Correlations": self._action_correlations,
             "Filter Habits": self._action_filter_habits,
             "Back": self._action_quit,
         }
-        self._BUTTONS = ["Overall Analytics", "Filter Habits", "Back"]
-        self._ROW_ACTION = "None"
+        self._BUTTONS = [
+            "Overall Analytics",
+            "Group Heatmap",
+            "Correlations",
+            "Filter Habits",
+            "Back",
+        ]
+        self._ROW_ACTION = "Heatmap"
         self._FILTER = None
+        self._CRITERIA = {}
+        self._group: str | None = None  # group the habits are filtered by
         self._COLUMNS = {
             "Habit": {
                 "width": 20,
                 "value": lambda habit: habit.name,
+                "sort": lambda habit: habit.name.casefold(),
                 "align": "left",
             },
             "Notes": {
                 "width": 40,
                 "value": lambda habit: habit.notes,
+                "sort": lambda habit: habit.notes.casefold(),
                 "align": "left",
             },
             "Periodicity": {
                 "width": 13,
                 "value": lambda habit: f"{habit.periodicity["amount"]} {habit.periodicity["unit"]}",
+                "sort": periodicity_sort_key,
                 "align": "center",
             },
             "Streak": {
                 "width": 8,
                 "value": lambda habit: str(habit.get_streak(analytics.UNTIL)),
+                "sort": lambda habit: habit.get_streak(analytics.UNTIL),
+                "deferred": True,
                 "align": "center",
             },
             "Highest Streak": {
@@ -49,51 +64,110 @@ class AnalyticsViewer(HabitTable):
                 "value": lambda habit: str(
                     analytics.HabitAnalytics(habit).highest_streak()
                 ),
+                "sort": lambda habit: analytics.HabitAnalytics(habit).highest_streak(),
+                "deferred": True,
                 "align": "center",
             },
             "Completion Rate": {
                 "width": 17,
                 "value": lambda habit: f"{analytics.HabitAnalytics(habit).completion_rate() * 100:.2f}%",
+                "sort": lambda habit: analytics.HabitAnalytics(habit).completion_rate(),
+                "deferred": True,
                 "align": "center",
             },
         }
         analytics.set_period()
 
-    def _action_none(self):
-        clear_screen()
+    async def _action_heatmap(self):
+        habit = self._get_selected_habit()
+        if habit is not None:
+            await heatmap([habit], HTML("<b>Completions of {}</b>").format(habit.name))
         return False
 
-    def _action_overall_analytics(self):
-        clear_screen()
-        group_analytics = analytics.GroupAnalytics(list(self.DATA.values()))
-        highest_streak = group_analytics.highest_streak()
-        average_completion_rate = group_analytics.average_completion_rate()
-        print(HTML("<b>Overall Analytics:</b>"))
-        print(HTML(f"  <b>Highest Streak Among All Habits:</b> {highest_streak}"))
-        print(
-            HTML(
-                f"  <b>Average Completion Rate:</b> {average_completion_rate * 100:.2f}%"
+    async def _action_overall_analytics(self):
+        habit_groups = habits.HABITS.groups
+        if self._group is not None and not self._CRITERIA:
+            aggregate = habit_groups.aggregate(self._group)  # kept up to date, not recomputed
+            highest_streak = aggregate["highest_streak"]
+            average_completion_rate = aggregate["average_completion_rate"]
+        else:
+            group_analytics = analytics.GroupAnalytics(list(self.DATA.values()))
+            highest_streak = group_analytics.highest_streak()
+            average_completion_rate = group_analytics.average_completion_rate()
+
+        group_lines = []
+        for name, depth in habit_groups.tree():
+            aggregate = habit_groups.aggregate(name)
+            group_lines.append(
+                HTML("  {}<b>{}</b> ({} habits): highest streak {}, {:.2f}%\n").format(
+                    "  " * depth,
+                    name,
+                    aggregate["habits"],
+                    aggregate["highest_streak"],
+                    aggregate["average_completion_rate"] * 100,
+                )
             )
+        await message(
+            merge_formatted_text(
+                [
+                    HTML(
+                        "<b>Overall Analytics:</b>\n"
+                        f"  <b>Highest Streak Among All Habits:</b> {highest_streak}\n"
+                        f"  <b>Average Completion Rate:</b> {average_completion_rate * 100:.2f}%"
+                    ),
+                    *([HTML("\n\n<b>Groups:</b>\n")] + group_lines if group_lines else []),
+                ]
+            ),
+            footer="Press ENTER to return to the table.",
         )
-        print()
-        input("Press ENTER to return to the table.")
-        clear_screen()
         return False
 
-    def _action_filter_habits(self):
-        clear_screen()
-        print("Filter by:")
-        choice = radio_list(["Periodicity", "Date", "Remove Filters", "Back"])
+    async def _action_group_heatmap(self):
+        habit_list = list(self.DATA.values())
+        await heatmap(
+            habit_list, HTML("<b>Completions of {} habits</b>").format(len(habit_list))
+        )
+        return False
 
-        clear_screen()
+    async def _action_correlations(self):
+        unit = await radio_list(["days", "weeks"], title=HTML("<b>Completed on the same:</b>"))
+        report = analytics.GroupAnalytics(list(self.DATA.values())).co_completion(unit)
+        lines = [
+            HTML("  <b>{}</b> &amp; <b>{}</b>: {} {} together, correlation {:.2f}\n").format(
+                *pair["habits"], pair["both"], unit, pair["correlation"]
+            )
+            for pair in analytics.strongest_pairs(report)
+        ]
+        await message(
+            merge_formatted_text(
+                [
+                    HTML("<b>Habits Completed Together</b> ({} {} from {} to {}):\n").format(
+                        report["slots"], unit, report["since"], report["until"]
+                    ),
+                    *(lines or ["  Not enough completions to compare.\n"]),
+                ]
+            ),
+            footer="Press ENTER to return to the table.",
+        )
+        return False
+
+    async def _action_filter_habits(self):
+        choice = await radio_list(
+            ["Periodicity", "Group", "Date", "Remove Filters", "Back"], title="Filter by:"
+        )
 
         match choice:
             case "Periodicity":
-                print(HTML("<b>Period unit:</b>"))
-                periodicity_unit = radio_list(list(habits.PERIODICITY_UNITS.keys()))
+                periodicity_unit = await radio_list(
+                    list(habits.PERIODICITY_UNITS.keys()),
+                    title=HTML("<b>Period unit:</b>"),
+                )
+                error = ""
                 while True:
-                    count_input = prompt(
-                        HTML("<b>Period count:</b> "), default="1"
+                    count_input = (
+                        await text_input(
+                            HTML("<b>Period count:</b> "), default="1", title=error
+                        )
                     ).strip()
                     if not count_input:
                         periodicity_amount = 1
@@ -101,41 +175,56 @@ class AnalyticsViewer(HabitTable):
                     if count_input.isdigit() and int(count_input) > 0:
                         periodicity_amount = int(count_input)
                         break
-                    print("Please enter a positive integer.")
+                    error = "Please enter a positive integer."
 
-                self._FILTER = lambda habit: habit.periodicity == {
-                    "amount": periodicity_amount,
+                self._CRITERIA = {
                     "unit": periodicity_unit,
+                    "amount": periodicity_amount,
                 }
 
+            case "Group":
+                habit_groups = habits.HABITS.groups
+                tree = habit_groups.tree()
+                if not tree:
+                    await message("No groups yet. Add habits to groups in Manage Habits.")
+                    return False
+                options = ["  " * depth + name for name, depth in tree]
+                choice = await radio_list(options, title=HTML("<b>Group:</b>"))
+                self._group = tree[options.index(choice)][0]
+                members = habit_groups.habit_uuids(self._group)
+                self._FILTER = lambda habit: habit.uuid in members
+
             case "Date":
-                print(HTML("<b>Start date:</b>"))
                 analytics.SINCE = datetime.combine(
-                    calendar_picker(
+                    await calendar_picker(
                         min_date=habits.first_start().date(),
                         max_date=habits.now().date(),
+                        title=HTML("<b>Start date:</b>"),
                     ),
                     time.min,
                 )
-                print("")
-                print(HTML("<b>End date:</b>"))
                 analytics.UNTIL = datetime.combine(
-                    calendar_picker(
+                    await calendar_picker(
                         min_date=habits.first_start().date(),
                         max_date=habits.now().date(),
+                        title=HTML("<b>End date:</b>"),
                     ),
                     time.max,
                 )
+                self._invalidate_sort_keys()
+                self._invalidate_cells()
 
             case "Remove Filters":
                 self._FILTER = None
+                self._group = None
+                self._CRITERIA = {}
                 analytics.SINCE = habits.first_start()
                 analytics.UNTIL = habits.now()
+                self._invalidate_sort_keys()
+                self._invalidate_cells()
 
             case "Back":
                 return False
 
-        clear_screen()
-
-    def _action_quit(self):
+    async def _action_quit(self):
         return True
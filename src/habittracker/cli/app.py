@@ -1,57 +1,65 @@
 from importlib import resources
 
 from prompt_toolkit import HTML
-from prompt_toolkit import print_formatted_text as print
 
 from .. import __version__ as VERSION
 from .analytics_viewer import AnalyticsViewer
+from .due_soon import DueSoonView
 from .habit_manager import HabitManager
-from .utils import clear_screen, radio_list
+from .router import ROUTER
+from .utils import message, radio_list
 
 GITHUB_REPO = "Ali246801232/habittracker-DLBDSOOFPP"
 
 
 class HabitTrackerApp:
     def run(self):
-        clear_screen()
+        ROUTER.run(self.main)
+
+    async def main(self):
+        """Main menu loop, run inside the router's application"""
         choice = ""
         while choice != "Quit":
-            choice = self._display_menu()
-            clear_screen()
+            choice = await self._display_menu()
             match choice:
                 case "Habits":
-                    self._habit_manager()
+                    await self._habit_manager()
+                case "Due Soon":
+                    await self._due_soon()
                 case "Analytics":
-                    self._analytics_viewer()
+                    await self._analytics_viewer()
                 case "Help":
-                    self._help()
-            clear_screen()
+                    await self._help()
 
-    def _display_menu(self):
+    async def _display_menu(self):
         """Display main menu"""
-        options = ["Habits", "Analytics", "Help", "Quit"]
+        options = ["Habits", "Due Soon", "Analytics", "Help", "Quit"]
 
-        print(HTML(f"Welcome to <b>Habit Tracker</b> v{VERSION}!"))
-        print("\nPlease select an option:")
-        choice = radio_list(options)
+        title = HTML(
+            f"Welcome to <b>Habit Tracker</b> v{VERSION}!\n\nPlease select an option:"
+        )
+        choice = await radio_list(options, title=title)
 
         return choice
 
-    def _habit_manager(self):
+    async def _habit_manager(self):
         """Start the habit manager"""
-        HabitManager().run()
+        await HabitManager().run()
+
+    async def _due_soon(self):
+        """Start the due soon view"""
+        await DueSoonView().run()
 
-    def _analytics_viewer(self):
+    async def _analytics_viewer(self):
         """Start the analytics viewer"""
-        AnalyticsViewer().run()
+        await AnalyticsViewer().run()
 
-    def _help(self):
+    async def _help(self):
         """Display help information"""
         try:
             help_path = resources.files("habittracker.data").joinpath("help.txt")
             with open(help_path, "r") as f:
-                print(HTML(f.read()))
+                text = HTML(f.read())
         except FileNotFoundError:
-            print("Help file not found.")
-        input("\nPress ENTER to return to the menu.")
-        clear_screen()
+            text = "Help file not found."
+        await message(text, footer="Press ENTER to return to the menu.")
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+from .. import habits
+from .habit_table import HabitTable, periodicity_sort_key
+
+
+def format_remaining(remaining: timedelta) -> str:
+    """Return a short remaining time, e.g. 2d 3h, 5h 07m or 12m"""
+    minutes = max(int(remaining.total_seconds() // 60), 0)
+    days, minutes = divmod(minutes, 24 * 60)
+    hours, minutes = divmod(minutes, 60)
+    if days:
+        return f"{days}d {hours}h"
+    if hours:
+        return f"{hours}h {minutes:02d}m"
+    return f"{minutes}m"
+
+
+class DueSoonView(HabitTable):
+    """Table of the habits still to complete, the soonest to end first"""
+
+    def __init__(self):
+        super().__init__()
+        self._ACTIONS = {
+            "Mark Complete": self._action_complete,
+            "Back": self._action_quit,
+        }
+        self._ROW_ACTION = "Mark Complete"
+        self._BUTTONS = ["Back"]
+        self._due: dict[str, tuple[datetime, int]] = {}  # uuid -> (period end, streak at stake)
+        self._COLUMNS = {
+            "Habit": {
+                "width": 20,
+                "value": lambda habit: habit.name,
+                "sort": lambda habit: habit.name.casefold(),
+                "align": "left",
+            },
+            "Periodicity": {
+                "width": 13,
+                "value": lambda habit: f"{habit.periodicity["amount"]} {habit.periodicity["unit"]}",
+                "sort": periodicity_sort_key,
+                "align": "center",
+            },
+            "Due In": {
+                "width": 10,
+                "value": lambda habit: format_remaining(self._due[habit.uuid][0] - habits.now()),
+                "sort": lambda habit: self._due[habit.uuid][0],
+                "align": "center",
+            },
+            "Period End": {
+                "width": 18,
+                "value": lambda habit: f"{self._due[habit.uuid][0]:%Y-%m-%d %H:%M}",
+                "sort": lambda habit: self._due[habit.uuid][0],
+                "align": "center",
+            },
+            "Streak at Stake": {
+                "width": 17,
+                "value": lambda habit: str(self._due[habit.uuid][1]),
+                "sort": lambda habit: self._due[habit.uuid][1],
+                "align": "center",
+            },
+        }
+
+    def _load_data(self) -> dict:
+        """Return the incomplete habits from the due index, soonest period end first"""
+        due = habits.HABITS.get_due()
+        self._due = {habit.uuid: (end, streak) for habit, end, streak in due}
+        self._sort_keys = {}  # period ends and streaks change between reloads
+        return {habit.uuid: habit for habit, _, _ in due}
+
+    def _current_order_key(self) -> None:
+        return None  # the due index already gives the order, re-read on every reload
+
+    async def _action_complete(self):
+        habit = self._get_selected_habit()
+        if habit is not None:
+            habit.toggle_completed()
+            habits.save_habits()
+        return False
+
+    async def _action_quit(self):
+        return True
@@ -1,10 +1,18 @@
 from prompt_toolkit import HTML
-from prompt_toolkit import print_formatted_text as print
-from prompt_toolkit import prompt
+from prompt_toolkit.formatted_text import merge_formatted_text
 
 from .. import habits
-from .habit_table import HabitTable
-from .utils import clear_screen, radio_list
+from .habit_table import HabitTable, periodicity_sort_key
+from .utils import message, radio_list, text_input
+
+
+def _completed_mark(habit: habits.Habit) -> str:
+    """Return [X] once complete, the progress towards the target otherwise"""
+    if habit.completed:
+        return "[X]"
+    if habit.target > 1:
+        return f"[{habit.get_count()}/{habit.target}]"
+    return "[ ]"
 
 
 class HabitManager(HabitTable):
@@ -15,51 +23,128 @@ class HabitManager(HabitTable):
         self._ACTIONS = {
             "Edit Habit": self._action_edit_habit,
             "New Habit": self._action_new_habit,
+            "Batch Actions": self._action_batch,
             "Back": self._action_quit,
         }
         self._ROW_ACTION = "Edit Habit"
-        self._BUTTONS = ["New Habit", "Back"]
+        self._BUTTONS = ["New Habit", "Batch Actions", "Back"]
+        self._MULTI_SELECT = True
         self._FILTER = None
         self._COLUMNS = {
             "Habit": {
                 "width": 20,
                 "value": lambda habit: habit.name,
+                "sort": lambda habit: habit.name.casefold(),
                 "align": "left",
             },
             "Notes": {
                 "width": 40,
                 "value": lambda habit: habit.notes,
+                "sort": lambda habit: habit.notes.casefold(),
                 "align": "left",
             },
             "Periodicity": {
                 "width": 13,
                 "value": lambda habit: f"{habit.periodicity["amount"]} {habit.periodicity["unit"]}",
+                "sort": periodicity_sort_key,
                 "align": "center",
             },
             "Completed": {
                 "width": 11,
-                "value": lambda habit: "[X]" if habit.completed else "[ ]",
+                "value": _completed_mark,
+                "sort": lambda habit: (habit.completed, habit.get_count() / habit.target),
                 "align": "center",
             },
             "Streak": {
                 "width": 8,
                 "value": lambda habit: str(habit.streak),
+                "sort": lambda habit: habit.streak,
                 "align": "center",
             },
         }
 
-    def _action_edit_habit(self):
+    async def _action_edit_habit(self):
         habit = self._get_selected_habit()
         editor = HabitEditor(habit)
-        editor.run()
+        await editor.run()
+        if habit is not None:
+            self._refresh_row(habit.uuid)
         return False
 
-    def _action_new_habit(self):
+    async def _action_new_habit(self):
         editor = HabitEditor()
-        editor.run()
+        await editor.run()
         return False
 
-    def _action_quit(self):
+    async def _action_batch(self):
+        if not self.marked:
+            await message("Mark habits with SPACE (or all of them with a) first.")
+            return False
+        selected = [habits.HABITS.get_habit(habit_uuid) for habit_uuid in self.marked]
+        choice = await radio_list(
+            [
+                "Mark complete",
+                "Mark incomplete",
+                "Add to group",
+                "Remove from group",
+                "Delete habits",
+                "Back",
+            ],
+            title=HTML("<b>Apply to {} marked habits:</b>").format(len(selected)),
+        )
+
+        habit_groups = habits.HABITS.groups
+        match choice:
+            case "Mark complete":
+                changed = [habit for habit in selected if not habit.completed]
+                for habit in changed:
+                    habit.complete_period()
+                habits.save_batch(habit.uuid for habit in changed)
+                for habit in changed:
+                    self._refresh_row(habit.uuid)
+
+            case "Mark incomplete":
+                changed = [habit for habit in selected if habit.get_count()]
+                for habit in changed:
+                    habit.clear_period()
+                habits.save_batch(habit.uuid for habit in changed)
+                for habit in changed:
+                    self._refresh_row(habit.uuid)
+
+            case "Add to group":
+                path = (await text_input(HTML("<b>Group:</b> "), title="e.g. Health/Running\n")).strip()
+                if path.strip("/"):
+                    name = habit_groups.ensure_path(path)
+                    for habit in selected:
+                        habit_groups.add_habit(name, habit.uuid)
+                    habits.save_batch((), groups=True)
+
+            case "Remove from group":
+                names = sorted(
+                    {name for habit in selected for name in habit_groups.groups_of(habit.uuid)},
+                    key=str.casefold,
+                )
+                if not names:
+                    await message("The marked habits are in no group.")
+                    return False
+                name = await radio_list(names, title=HTML("<b>Remove from:</b>"))
+                for habit in selected:
+                    habit_groups.remove_habit(name, habit.uuid)
+                habits.save_batch((), groups=True)
+
+            case "Delete habits":
+                confirm = await radio_list(
+                    ["Yes", "No"],
+                    title=HTML("Are you sure you want to delete {} habits?").format(len(selected)),
+                )
+                if confirm == "Yes":
+                    for habit in selected:
+                        habits.HABITS.delete_habit(habit.uuid)
+                    habits.save_batch((), deleted=[habit.uuid for habit in selected])
+                    self.marked = set()
+        return False
+
+    async def _action_quit(self):
         return True
 
 
@@ -69,52 +154,65 @@ class HabitEditor:
     def __init__(self, habit: habits.Habit = None):
         self.habit = habit
 
-    def run(self):
+    async def run(self):
         if self.habit is None:
-            self._create_habit()
+            await self._create_habit()
         else:
-            self._edit_habit()
-        clear_screen()
+            await self._edit_habit()
 
-    def _create_habit(self):
+    async def _create_habit(self):
         """Create a new habit"""
-        attributes = self._input_habit_details()
+        attributes = await self._input_habit_details()
         if attributes is not None:
             habits.HABITS.create_habit(attributes)
         habits.save_habits()
 
-    def _edit_habit(self):
+    async def _edit_habit(self):
         """Edit an existing habit"""
         while True:
             if self.habit is None:
                 return
 
-            options = [
-                ("Mark complete" if not self.habit.completed else "Mark incomplete"),
-                "Edit habit",
-                "Delete habit",
-                "Back",
-            ]
+            if self.habit.target > 1:
+                progress = f"{self.habit.get_count()}/{self.habit.target}"
+                completion_options = [f"Add completion ({progress})", "Remove completion"]
+            else:
+                completion_options = [
+                    "Mark complete" if not self.habit.completed else "Mark incomplete"
+                ]
+            options = [*completion_options, "Edit habit", "Edit groups", "Delete habit", "Back"]
 
-            clear_screen()
-            print("Select an action for the habit:")
-            choice = radio_list(options)
-            clear_screen()
+            choice = await radio_list(options, title="Select an action for the habit:")
 
             match choice:
                 case "Mark complete" | "Mark incomplete":
                     self.habit.toggle_completed()
                     habits.save_habits()
 
+                case str() if choice.startswith("Add completion"):
+                    self.habit.increment()
+                    habits.save_habits()
+
+                case "Remove completion":
+                    self.habit.decrement()
+                    habits.save_habits()
+
                 case "Edit habit":
-                    attributes = self._input_habit_details()
+                    attributes = await self._input_habit_details()
                     if attributes is not None:
                         self.habit.update(attributes)
                     habits.save_habits()
 
+                case "Edit groups":
+                    await self._edit_groups()
+                    habits.save_habits()
+
                 case "Delete habit":
-                    print("Are you sure you want to delete this habit?")
-                    if radio_list(["Yes", "No"]) == "Yes":
+                    confirm = await radio_list(
+                        ["Yes", "No"],
+                        title="Are you sure you want to delete this habit?",
+                    )
+                    if confirm == "Yes":
                         habits.HABITS.delete_habit(self.habit.uuid)
                         habits.save_habits()
                         return
@@ -123,7 +221,29 @@ class HabitEditor:
                     habits.save_habits()
                     return
 
-    def _input_habit_details(self):
+    async def _edit_groups(self):
+        """Input the groups of the habit, creating the new ones"""
+        habit_groups = habits.HABITS.groups
+        current = habit_groups.groups_of(self.habit.uuid)
+        entered = await text_input(
+            HTML("<b>Groups:</b> "),
+            default=", ".join("/".join(habit_groups.path(name)) for name in current),
+            title=HTML(
+                "Separate groups with commas and nest them with /, e.g. Health/Running.\n"
+                "Existing groups keep their place.\n"
+            ),
+        )
+        wanted = {
+            habit_groups.ensure_path(path)
+            for path in entered.split(",")
+            if path.strip(" /")
+        }
+        for name in set(current) - wanted:
+            habit_groups.remove_habit(name, self.habit.uuid)
+        for name in wanted - set(current):
+            habit_groups.add_habit(name, self.habit.uuid)
+
+    async def _input_habit_details(self):
         """Input and return habit details"""
         # Defaults
         if self.habit:
@@ -131,65 +251,58 @@ class HabitEditor:
                 "name": self.habit.name,
                 "periodicity": self.habit.periodicity,
                 "notes": self.habit.notes,
+                "target": self.habit.target,
             }
         else:
             defaults = {
                 "name": "",
                 "periodicity": {"amount": 1, "unit": "days"},
                 "notes": "",
+                "target": 1,
             }
 
         while True:
-            clear_screen()
-
             # Name
             name = (
-                prompt(HTML("<b>Habit Name:</b> "), default=defaults["name"]).strip()
-                or defaults["name"]
-            )
+                await text_input(HTML("<b>Habit Name:</b> "), default=defaults["name"])
+            ).strip() or defaults["name"]
+            entered = [HTML("<b>Habit Name:</b> {}\n").format(name)]
 
             # Period unit
-            print(HTML("<b>Period unit:</b>"))
-            periodicity_unit = radio_list(
+            periodicity_unit = await radio_list(
                 list(habits.PERIODICITY_UNITS.keys()),
                 default=defaults["periodicity"]["unit"],
+                title=merge_formatted_text([*entered, HTML("<b>Period unit:</b>")]),
             )
+            entered.append(HTML("<b>Period unit:</b> {}\n").format(periodicity_unit))
 
             # Period count
-            while True:
-                count_input = prompt(
-                    HTML("<b>Period count:</b> "),
-                    default=str(defaults["periodicity"]["amount"]),
-                ).strip()
-                if not count_input:
-                    periodicity_amount = defaults["periodicity"]["amount"]
-                    break
-                try:
-                    periodicity_amount = int(count_input)
-                    if periodicity_amount > 0:
-                        break
-                    else:
-                        print("Please enter a positive integer.")
-                except ValueError:
-                    print("Please enter a valid integer.")
+            periodicity_amount = await _input_positive_int(
+                "Period count", defaults["periodicity"]["amount"], entered
+            )
+            entered.append(HTML("<b>Period count:</b> {}\n").format(periodicity_amount))
+
+            # Target
+            target = await _input_positive_int(
+                "Completions per period", defaults["target"], entered
+            )
 
             # Notes
             notes = (
-                prompt(HTML("<b>Notes:</b> "), default=defaults["notes"]).strip()
-                or defaults["notes"]
-            )
+                await text_input(
+                    HTML("<b>Notes:</b> "),
+                    default=defaults["notes"],
+                    title=merge_formatted_text(entered),
+                )
+            ).strip() or defaults["notes"]
 
             # Confirm details and return
-            clear_screen()
-            print(HTML(f"<b>Habit</b>: {name}"))
-            print(HTML(f"<b>Notes</b>: {notes}"))
-            print(
-                HTML(
-                    f"<b>Periodicity</b>: Every {periodicity_amount} {periodicity_unit}"
-                )
-            )
-            print("\nAre these details correct?")
-            confirm = radio_list(["Yes", "No", "Cancel"])
+            details = HTML(
+                "<b>Habit</b>: {}\n<b>Notes</b>: {}\n<b>Periodicity</b>: Every {} {}\n"
+                "<b>Completions per period</b>: {}\n"
+                "\nAre these details correct?"
+            ).format(name, notes, periodicity_amount, periodicity_unit, target)
+            confirm = await radio_list(["Yes", "No", "Cancel"], title=details)
             if confirm == "Yes":
                 return {
                     "name": name,
@@ -198,9 +311,31 @@ class HabitEditor:
                         "unit": periodicity_unit,
                     },
                     "notes": notes,
+                    "target": target,
                 }
             elif confirm == "No":
                 if self.habit:
                     return defaults
             elif confirm == "Cancel":
-                return None
\ No newline at end of file
+                return None
+
+
+async def _input_positive_int(label: str, default: int, entered: list) -> int:
+    """Input a positive integer, the default when left empty"""
+    error = ""
+    while True:
+        value = (
+            await text_input(
+                HTML("<b>{}:</b> ").format(label),
+                default=str(default),
+                title=merge_formatted_text([*entered, error]),
+            )
+        ).strip()
+        if not value:
+            return default
+        try:
+            if int(value) > 0:
+                return int(value)
+            error = "Please enter a positive integer.\n"
+        except ValueError:
+            error = "Please enter a valid integer.\n"
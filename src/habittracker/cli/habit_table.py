@@ -1,14 +1,47 @@
+import asyncio
+import bisect
+import functools
 import math
+import shutil
 import textwrap
-from typing import Callable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable
 
-from prompt_toolkit.application import Application
+from prompt_toolkit.filters import Condition
 from prompt_toolkit.key_binding import KeyBindings
-from prompt_toolkit.layout import Layout
 from prompt_toolkit.layout.containers import Window
 from prompt_toolkit.layout.controls import FormattedTextControl
 
 from .. import habits
+from .router import ROUTER
+
+
+@functools.total_ordering
+class _Descending:
+    """Sort key wrapper that inverts the ordering of the wrapped key"""
+
+    __slots__ = ("key",)
+
+    def __init__(self, key):
+        self.key = key
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+    def __lt__(self, other):
+        return other.key < self.key
+
+
+def _compute_sort_keys(key: Callable, snapshots: dict[str, habits.Habit]) -> dict[str, Any]:
+    """Return the sort key of every habit snapshot, run in the deferred cell worker"""
+    return {habit_uuid: key(habit) for habit_uuid, habit in snapshots.items()}
+
+
+def periodicity_sort_key(habit: habits.Habit) -> tuple[int, int]:
+    """Return a sort key ordering periodicities by unit, then amount"""
+    units = list(habits.PERIODICITY_UNITS.keys())
+    return (units.index(habit.periodicity["unit"]), habit.periodicity["amount"])
 
 
 class HabitTable:
@@ -16,55 +49,115 @@ class HabitTable:
 
     DATA: dict = {}
     _FILTER: Callable | None = None
+    _CRITERIA: dict = {}  # indexed HabitStorage.get_habits criteria, e.g. unit and amount
     _COLUMNS: dict[str, dict] = {}
     _PADDING: int = 1
-    _ROWS_PER_PAGE: int = 4
+    _ROWS_PER_PAGE: int | None = None  # None sizes pages to the terminal height
+    _CHROME_LINES: int = 6  # header, bottom border, footer and cursor line
+    _PAGE_JUMP: int = 10
+    _PLACEHOLDER: str = "…"  # shown while a deferred cell is being computed
+    _ERROR: str = "!"  # shown when computing a deferred cell failed
+    _EXECUTOR: ThreadPoolExecutor | None = None  # shared worker for deferred cells
     _BUTTONS: list[tuple] = []
     _ACTIONS: dict[str, Callable] = {}
     _ROW_ACTION: str = ""
+    _MULTI_SELECT: bool = False  # SPACE marks rows for batch actions, a marks all of them
     _action: str = ""
 
     def __init__(self):
-        # App setup
-        self.page = 0
+        # View setup
+        self.cursor = 0
+        self.habit_ids: list[str] = []
+        self.goto_input: str | None = None
+        self.search_query: str = ""
+        self.searching: bool = False
+        self.sort_column: str | None = None
+        self.sort_reverse: bool = False
+        self._order_key = None
+        self._ordered_ids: list[str] = []
+        self._positions: dict[str, int] = {}
+        self._sort_keys: dict[str, Any] = {}
+        self._sort_pending: asyncio.Future | None = None  # sort keys of a deferred column
+        # storage version and first period end the sort keys were computed at, they may depend on the time
+        self._sort_keys_version: int | None = None
+        self._sort_keys_expire: datetime = datetime.max
+        self._row_keys: list[tuple] = []
+        self._cells: dict[tuple[str, str], str] = {}  # (column, uuid) -> deferred cell text
+        self._pending: dict[tuple[str, str], asyncio.Future] = {}
+        self.marked: set[str] = set()  # UUIDs of the habits marked for a batch action
         self.kb = KeyBindings()
         self._setup_keybindings()
-        self.control = FormattedTextControl(self._render, show_cursor=False)
+        self.control = FormattedTextControl(
+            self._render, focusable=True, show_cursor=False
+        )
         self.window = Window(content=self.control)
-        self.app = Application(layout=Layout(self.window), key_bindings=self.kb)
 
-    def run(self):
+    @property
+    def container(self) -> Window:
+        return self.window
+
+    @property
+    def key_bindings(self) -> KeyBindings:
+        return self.kb
+
+    async def run(self):
         with_action = True
         quit = False
         while with_action and not quit:
             self._reload_table()
-            with_action = self.app.run()
+            with_action = await ROUTER.show(self)
             if with_action:
-                quit = self._ACTIONS[self._action]()
+                quit = await self._ACTIONS[self._action]()
 
     def exit(self, with_action=False):
-        habits.save_habits()
-        self.app.exit(result=with_action)
+        if not with_action:  # actions save their own changes
+            habits.save_habits()
+        ROUTER.finish(with_action)
+
+    @property
+    def page(self) -> int:
+        return self.cursor // self._rows_per_page()
+
+    @property
+    def selected_row(self) -> int:
+        return self.cursor % self._rows_per_page()
+
+    def _rows_per_page(self) -> int:
+        """Return the number of habit rows that fit on one page"""
+        if self._ROWS_PER_PAGE:
+            return self._ROWS_PER_PAGE
+        height = shutil.get_terminal_size().lines
+        # each row takes a line plus a separator, except the last one
+        return max((height - self._CHROME_LINES + 1) // 2, 1)
+
+    def _page_count(self) -> int:
+        return max(math.ceil(len(self.habit_ids) / self._rows_per_page()), 1)
 
     def _reload_table(self):
         """Reset table"""
-        
-        # Reload data
-        self.DATA = (
-            habits.HABITS.get_habits(self._FILTER)
-            if self._FILTER
-            else habits.HABITS.get_habits()
-        )
-        self.habit_ids = list(self.DATA.keys())
+
+        # Reload data, reusing the row order while the habits are unchanged
+        self.DATA = self._load_data()
+        if self._sort_keys and (
+            habits.HABITS.version != self._sort_keys_version or habits.now() >= self._sort_keys_expire
+        ):
+            self._invalidate_sort_keys()
+        order_key = self._current_order_key()
+        if order_key is None or order_key != self._order_key:
+            self._sort_rows()
+
         # Navigate to page before data
-        max_page = max(math.ceil(len(self.habit_ids) / self._ROWS_PER_PAGE) - 1, 0)
-        self.page = min(self.page, max_page)
+        max_page = self._page_count() - 1
+        rows = self._rows_per_page()
+        self.cursor = min(self.page, max_page) * rows
 
-        # Reset selection
-        self.selected_row = 0
+        # Reset selection, keeping the marks of the habits still shown
+        self.marked &= self.DATA.keys()
         self.selected_button = 0
+        self.goto_input = None
+        self.searching = False
         self._action = None
-        self.on_buttons = not (bool(self.DATA))
+        self.on_buttons = not (bool(self.habit_ids))
 
         # Set action depending on button/row
         if self.on_buttons and self._BUTTONS:
@@ -72,80 +165,407 @@ class HabitTable:
         elif self._ROW_ACTION:
             self._action = self._ROW_ACTION
 
+    def _load_data(self) -> dict:
+        """Return the habits to show, in table order"""
+        if self._FILTER or self._CRITERIA:
+            return habits.HABITS.get_habits(self._FILTER, **self._CRITERIA)
+        return habits.HABITS.habits
+
+    def _current_order_key(self) -> tuple | None:
+        """Return a key identifying the current row order, or None if it must be rebuilt"""
+        if self._FILTER or self._CRITERIA:
+            return None
+        return (
+            id(self.DATA),
+            habits.HABITS.version,
+            len(self.DATA),
+            self.sort_column,
+            self.sort_reverse,
+        )
+
+    def _sort_entry(self, habit_uuid: str) -> tuple:
+        """Return the sort entry of a habit, computing its sort key only once"""
+        if habit_uuid not in self._sort_keys:
+            spec = self._COLUMNS[self.sort_column]
+            key = spec.get("sort", spec["value"])
+            self._sort_keys[habit_uuid] = key(self.DATA[habit_uuid])
+        key = self._sort_keys[habit_uuid]
+        # ties keep table order in both directions
+        return (
+            _Descending(key) if self.sort_reverse else key,
+            self._positions[habit_uuid],
+        )
+
+    def _sort_rows(self):
+        """Order the rows by the sort column using the precomputed sort keys"""
+        self._ordered_ids = list(self.DATA.keys())
+        self._positions = {uuid: i for i, uuid in enumerate(self._ordered_ids)}
+        self._row_keys = []
+        self._cancel_sort_keys()
+        if self.sort_column is not None and not self._sort_keys:
+            now = habits.now()
+            self._sort_keys_version = habits.HABITS.version
+            self._sort_keys_expire = min(
+                (habit.get_period(now)["end"] for habit in self.DATA.values()), default=datetime.max
+            )
+        if self.sort_column is not None and not self._defer_sort_keys():
+
+            self._ordered_ids.sort(key=self._sort_entry)
+            self._row_keys = [self._sort_entry(uuid) for uuid in self._ordered_ids]
+        self._order_key = self._current_order_key()
+        self._apply_search()
+
+    def _defer_sort_keys(self) -> bool:
+        """Compute missing sort keys of a deferred column off the UI thread
+
+        The rows keep table order until the keys arrive and they are sorted.
+
+        Returns:
+            bool: whether the keys are being computed in the background
+        """
+        spec = self._COLUMNS[self.sort_column]
+        missing = [uuid for uuid in self._ordered_ids if uuid not in self._sort_keys]
+        if not spec.get("deferred") or not missing:
+            return False
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:  # not running in the router, compute inline
+            return False
+        if HabitTable._EXECUTOR is None:
+            HabitTable._EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="habittable")
+        snapshots = {uuid: self.DATA[uuid].snapshot() for uuid in missing}
+        future = loop.run_in_executor(
+            HabitTable._EXECUTOR, _compute_sort_keys, spec.get("sort", spec["value"]), snapshots
+        )
+        future.add_done_callback(functools.partial(self._sort_keys_done, self.sort_column))
+        self._sort_pending = future
+        return True
+
+    def _sort_keys_done(self, column: str, future: asyncio.Future):
+        """Sort the rows once the keys of a deferred column arrived, ignoring stale results"""
+        if self._sort_pending is not future:
+            return
+        self._sort_pending = None
+        if future.cancelled():
+            return
+        try:
+            self._sort_keys.update(future.result())
+        except Exception:
+            column = None  # keep table order
+        self.sort_column = column
+        self._sort_rows()
+        if ROUTER.app is not None:
+            ROUTER.app.invalidate()
+
+    def _cancel_sort_keys(self):
+        """Forget sort keys still being computed"""
+        if self._sort_pending is not None:
+            self._sort_pending.cancel()
+            self._sort_pending = None
+
+    def _apply_search(self, narrow: bool = False):
+        """Show only the rows matching the search query
+
+        Args:
+            narrow (bool): search within the current rows, e.g. after a character was typed
+        """
+        if not self.search_query:
+            self.habit_ids = self._ordered_ids
+            return
+        source = self.habit_ids if narrow else self._ordered_ids
+        matches = habits.HABITS.search(
+            self.search_query, within=source if narrow else None
+        )
+        self.habit_ids = [uuid for uuid in source if uuid in matches]
+
+    def _set_search(self, query: str):
+        """Search rows by name and notes, narrowing the rows when the query grows"""
+        narrow = bool(self.search_query) and query.startswith(self.search_query)
+        self.search_query = query
+        self._apply_search(narrow)
+        self.cursor = 0
+        self.on_buttons = not self.habit_ids
+        if self.on_buttons and self._BUTTONS:
+            self._action = self._BUTTONS[self.selected_button]
+        else:
+            self._action = self._ROW_ACTION
+
+    def _set_sort(self, column: str | None, reverse: bool = False):
+        """Sort the table by a column, or restore table order if None"""
+        if column != self.sort_column:
+            self._sort_keys = {}
+        self.sort_column = column
+        self.sort_reverse = reverse
+        self._sort_rows()
+        self._move_to(0)
+
+    def _invalidate_sort_keys(self):
+        """Drop all cached sort keys, e.g. after the analytics time frame changes"""
+        self._cancel_sort_keys()
+        self._sort_keys = {}
+        self._order_key = None
+
+    def _cell_value(self, column: str, habit: habits.Habit) -> str:
+        """Return a cell's text, computing deferred columns off the UI thread
+
+        Columns marked ``"deferred"`` show a placeholder until their value has
+        been computed in the background, unless no event loop is running.
+        """
+        spec = self._COLUMNS[column]
+        if not spec.get("deferred"):
+            return spec["value"](habit)
+        key = (column, habit.uuid)
+        if key in self._cells:
+            return self._cells[key]
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:  # not running in the router, compute inline
+            return spec["value"](habit)
+        if key not in self._pending:
+            if HabitTable._EXECUTOR is None:
+                HabitTable._EXECUTOR = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="habittable"
+                )
+            # the worker reads a copy, the habit itself is only touched on the UI thread
+            future = loop.run_in_executor(HabitTable._EXECUTOR, spec["value"], habit.snapshot())
+            future.add_done_callback(functools.partial(self._cell_done, key))
+            self._pending[key] = future
+        return self._PLACEHOLDER
+
+    def _cell_done(self, key: tuple[str, str], future: asyncio.Future):
+        """Store a finished deferred cell and redraw, ignoring stale results"""
+        if self._pending.get(key) is not future:
+            return
+        del self._pending[key]
+        if future.cancelled():
+            return
+        try:
+            self._cells[key] = future.result()
+        except Exception:
+            self._cells[key] = self._ERROR
+        if ROUTER.app is not None:
+            ROUTER.app.invalidate()
+
+    def _cancel_pending(self, keep: set[str] = frozenset()):
+        """Cancel deferred cell computations for habits that are no longer needed"""
+        for key, future in list(self._pending.items()):
+            if key[1] not in keep:
+                future.cancel()
+                del self._pending[key]
+
+    def _invalidate_cells(self):
+        """Drop all deferred cell values, e.g. after the analytics time frame changes"""
+        self._cancel_pending()
+        self._cells = {}
+
+    def _refresh_row(self, habit_uuid: str):
+        """Re-insert a single changed or deleted habit without re-sorting every row"""
+        if habit_uuid not in self._positions:
+            return
+        for column in self._COLUMNS:
+            self._cells.pop((column, habit_uuid), None)
+        deleted = habits.HABITS.get_habit(habit_uuid) is None
+        if self._sort_pending is not None:  # not sorted yet, sort again with its new key
+            self._sort_keys.pop(habit_uuid, None)
+            if deleted:
+                self.DATA.pop(habit_uuid, None)
+            self._sort_rows()
+            return
+
+        if self.sort_column is None:
+
+            if deleted:
+                self._ordered_ids.remove(habit_uuid)
+        else:
+            index = bisect.bisect_left(self._row_keys, self._sort_entry(habit_uuid))
+            del self._row_keys[index]
+            del self._ordered_ids[index]
+            self._sort_keys.pop(habit_uuid, None)
+            if not deleted:
+                entry = self._sort_entry(habit_uuid)
+                index = bisect.bisect_left(self._row_keys, entry)
+                self._row_keys.insert(index, entry)
+                self._ordered_ids.insert(index, habit_uuid)
+        if deleted:
+            del self._positions[habit_uuid]
+        if self._sort_keys:  # the other keys are still valid for the storage after this change
+            self._sort_keys_version = habits.HABITS.version
+        if self._order_key is not None:
+
+            self._order_key = self._current_order_key()
+        self._apply_search()
+
+    def _move_to(self, index: int):
+        """Select the row at the given index, clamped to the table"""
+        if not self.habit_ids:
+            return
+        self.cursor = min(max(index, 0), len(self.habit_ids) - 1)
+        self.on_buttons = False
+        self._action = self._ROW_ACTION
+
+    def _move_to_page(self, page: int):
+        """Select the first row of the given page, clamped to the table"""
+        self._move_to(min(max(page, 0), self._page_count() - 1) * self._rows_per_page())
+
     def _setup_keybindings(self):
         """Setup key bindings for navigation and _ACTIONS"""
+        going_to = Condition(lambda: self.goto_input is not None)
+        searching = Condition(lambda: self.searching)
+        entering_text = going_to | searching
 
-        @self.kb.add("up")
+        @self.kb.add("up", filter=~entering_text)
         def _up(event):
             if not self.habit_ids and not self._BUTTONS:
                 return
+            page_start = self.page * self._rows_per_page()
             max_row = (
-                min(
-                    self._ROWS_PER_PAGE,
-                    len(self.habit_ids) - self.page * self._ROWS_PER_PAGE,
-                )
-                - 1
+                min(self._rows_per_page(), len(self.habit_ids) - page_start) - 1
             )
-            if self.on_buttons and self.DATA:
+            if self.on_buttons and self.habit_ids:
                 self.on_buttons = False
-                self.selected_row = max_row
+                self.cursor = page_start + max_row
                 self._action = self._ROW_ACTION
             elif self.selected_row == 0:
                 if self._BUTTONS:
                     self.on_buttons = True
                     self._action = self._BUTTONS[self.selected_button]
             else:
-                self.selected_row -= 1
+                self.cursor -= 1
 
-        @self.kb.add("down")
+        @self.kb.add("down", filter=~entering_text)
         def _down(event):
             if not self.habit_ids and not self._BUTTONS:
                 return
+            page_start = self.page * self._rows_per_page()
             max_row = (
-                min(
-                    self._ROWS_PER_PAGE,
-                    len(self.habit_ids) - self.page * self._ROWS_PER_PAGE,
-                )
-                - 1
+                min(self._rows_per_page(), len(self.habit_ids) - page_start) - 1
             )
-            if self.on_buttons and self.DATA:
+            if self.on_buttons and self.habit_ids:
                 self.on_buttons = False
-                self.selected_row = 0
+                self.cursor = page_start
                 self._action = self._ROW_ACTION
             elif self.selected_row == max_row:
                 if self._BUTTONS:
                     self.on_buttons = True
                     self._action = self._BUTTONS[self.selected_button]
             else:
-                self.selected_row += 1
+                self.cursor += 1
 
-        @self.kb.add("left")
+        @self.kb.add("left", filter=~entering_text)
         def _left(event):
             if not self.habit_ids and not self._BUTTONS:
                 return
-            max_page = max(math.ceil(len(self.habit_ids) / self._ROWS_PER_PAGE) - 1, 0)
+            max_page = self._page_count() - 1
             max_button = len(self._BUTTONS) - 1
             if self.on_buttons and self._BUTTONS:
                 self.selected_button = (self.selected_button - 1) % (max_button + 1)
                 self._action = self._BUTTONS[self.selected_button]
             else:
-                self.page = self.page - 1 if self.page > 0 else max_page
-                self.selected_row = 0
+                page = self.page - 1 if self.page > 0 else max_page
+                self.cursor = page * self._rows_per_page()
 
-        @self.kb.add("right")
+        @self.kb.add("right", filter=~entering_text)
         def _right(event):
             if not self.habit_ids and not self._BUTTONS:
                 return
-            max_page = max(math.ceil(len(self.habit_ids) / self._ROWS_PER_PAGE) - 1, 0)
+            max_page = self._page_count() - 1
             max_button = len(self._BUTTONS) - 1
             if self.on_buttons and self._BUTTONS:
                 self.selected_button = (self.selected_button + 1) % (max_button + 1)
                 self._action = self._BUTTONS[self.selected_button]
             else:
-                self.page = self.page + 1 if self.page < max_page else 0
-                self.selected_row = 0
+                page = self.page + 1 if self.page < max_page else 0
+                self.cursor = page * self._rows_per_page()
+
+        @self.kb.add("pageup", filter=~entering_text)
+        def _page_up(event):
+            self._move_to_page(self.page - self._PAGE_JUMP)
+
+        @self.kb.add("pagedown", filter=~entering_text)
+        def _page_down(event):
+            self._move_to_page(self.page + self._PAGE_JUMP)
+
+        @self.kb.add("home", filter=~entering_text)
+        def _home(event):
+            self._move_to(0)
+
+        @self.kb.add("end", filter=~entering_text)
+        def _end(event):
+            self._move_to(len(self.habit_ids) - 1)
+
+        @self.kb.add("g", filter=~entering_text)
+        def _goto(event):
+            if self.habit_ids:
+                self.goto_input = ""
+
+        @self.kb.add("s", filter=~entering_text)
+        def _sort(event):
+            columns = [None, *self._COLUMNS.keys()]
+            column = columns[(columns.index(self.sort_column) + 1) % len(columns)]
+            self._set_sort(column)
+
+        @self.kb.add("r", filter=~entering_text)
+        def _reverse(event):
+            if self.sort_column is not None:
+                self._set_sort(self.sort_column, not self.sort_reverse)
+
+        @self.kb.add("/", filter=~entering_text)
+        def _search(event):
+            self.searching = True
+
+        @self.kb.add("<any>", filter=searching)
+        def _search_type(event):
+            if len(event.data) == 1 and event.data.isprintable():
+                self._set_search(self.search_query + event.data)
+
+        @self.kb.add("backspace", filter=searching)
+        def _search_backspace(event):
+            self._set_search(self.search_query[:-1])
+
+        @self.kb.add("escape", filter=searching)
+        def _search_cancel(event):
+            self.searching = False
+            self._set_search("")
+
+        @self.kb.add("enter", filter=searching)
+        def _search_confirm(event):
+            self.searching = False
+
+        @self.kb.add("<any>", filter=going_to)
+        def _goto_digit(event):
+            if event.data.isdigit():
+                self.goto_input += event.data
+
+        @self.kb.add("backspace", filter=going_to)
+        def _goto_backspace(event):
+            self.goto_input = self.goto_input[:-1]
+
+        @self.kb.add("escape", filter=going_to)
+        def _goto_cancel(event):
+            self.goto_input = None
+
+        @self.kb.add("enter", filter=going_to)
+        def _goto_confirm(event):
+            if self.goto_input:
+                self._move_to(int(self.goto_input) - 1)
+            self.goto_input = None
+
+        multi_select = Condition(lambda: self._MULTI_SELECT)
+
+        @self.kb.add("space", filter=~entering_text & multi_select)
+        def _mark(event):
+            habit = self._get_selected_habit()
+            if habit is not None:
+                self.marked ^= {habit.uuid}
+
+        @self.kb.add("a", filter=~entering_text & multi_select)
+        def _mark_all(event):
+            if self.marked >= set(self.habit_ids):
+                self.marked = set()
+            else:
+                self.marked = set(self.habit_ids)  # the searched rows only
 
-        @self.kb.add("enter")
+        @self.kb.add("enter", filter=~entering_text)
         def _enter(event):
             self.exit(with_action=True)
 
@@ -179,10 +599,12 @@ class HabitTable:
 
         fragments = []
 
-        # Pagination
-        start = self.page * self._ROWS_PER_PAGE
-        end = start + self._ROWS_PER_PAGE
+        # Pagination: only the visible slice is rendered
+        rows_per_page = self._rows_per_page()
+        start = self.page * rows_per_page
+        end = start + rows_per_page
         visible = self.habit_ids[start:end]
+        self._cancel_pending(keep=set(visible))
 
         # Header row
         fragments.append(("", "   " + hline("┏", "┯", "┓", "━") + "\n"))
@@ -208,7 +630,8 @@ class HabitTable:
                         )
                     )
                     for line in (
-                        textwrap.wrap(spec["value"](habit), spec["width"] - 2) or [""]
+                        textwrap.wrap(self._cell_value(name, habit), spec["width"] - 2)
+                        or [""]
                     )
                 ]
                 for name, spec in self._COLUMNS.items()
@@ -227,6 +650,8 @@ class HabitTable:
                 else:
                     prefix = "   "
                     suffix = ""
+                if i == 0 and uuid in self.marked:
+                    prefix = prefix[:2] + "*"
                 fragments.append(("", prefix + row(cells) + suffix + "\n"))
 
             if idx < len(visible) - 1:
@@ -256,7 +681,6 @@ class HabitTable:
         buttons = "".join(pieces)
 
         # Footer
-        total_pages = max(math.ceil(len(self.habit_ids) / self._ROWS_PER_PAGE), 1)
         total_width = (
             sum(spec["width"] for spec in self._COLUMNS.values())
             + len(self._COLUMNS.keys())
@@ -264,7 +688,18 @@ class HabitTable:
             + 3
             + 3
         )
-        page_count = f"   ← Page {self.page + 1}/{total_pages} → "
+        if self.goto_input is not None:
+            page_count = f"   Go to row: {self.goto_input}_ "
+        elif self.searching:
+            page_count = f"   Search: {self.search_query}_ "
+        else:
+            page_count = f"   ← Page {self.page + 1}/{self._page_count()} → "
+            if self.sort_column is not None:
+                page_count += f" Sort: {self.sort_column} {'▼' if self.sort_reverse else '▲'} "
+            if self.search_query:
+                page_count += f" Search: {self.search_query} "
+            if self.marked:
+                page_count += f" Marked: {len(self.marked)} "
         padding = total_width - len(page_count) - len(buttons)
         if padding >= 0:
             footer = page_count + (" " * padding) + buttons
@@ -279,8 +714,6 @@ class HabitTable:
         """Return the selected habit"""
         if self.on_buttons:
             return None
-        start = self.page * self._ROWS_PER_PAGE
-        end = min(start + self._ROWS_PER_PAGE, len(self.habit_ids))
-        if 0 <= self.selected_row < (end - start):
-            return self.DATA.get(self.habit_ids[start + self.selected_row])
+        if 0 <= self.cursor < len(self.habit_ids):
+            return self.DATA.get(self.habit_ids[self.cursor])
         return None
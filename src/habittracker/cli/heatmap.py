@@ -0,0 +1,95 @@
+import math
+from datetime import date, timedelta
+
+from prompt_toolkit.formatted_text import AnyFormattedText, StyleAndTextTuples
+from prompt_toolkit.key_binding import KeyBindings
+from prompt_toolkit.layout.containers import Window
+from prompt_toolkit.layout.controls import FormattedTextControl
+
+from .. import analytics, habits
+from .router import ROUTER, View
+
+CELL = "■ "
+SHADES = ["fg:#3a3a3a", "fg:#0e4429", "fg:#006d32", "fg:#26a641", "fg:#39d353"]  # none to all
+WEEKDAYS = ["Mon", "", "Wed", "", "Fri", "", "Sun"]
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def render_heatmap(
+    counts: list[int], year: int, habit_count: int, today: date = None
+) -> StyleAndTextTuples:
+    """Return a year's heatmap as formatted text, a column per week and a row per weekday
+
+    Args:
+        counts (list[int]): completed habits per day, as returned by analytics.heatmap
+        year (int): year of the heatmap
+        habit_count (int): number of habits counted, for the shade of each day
+        today (date): days after it are left blank
+    """
+    start = analytics.heatmap_start(year)
+    weeks = len(counts) // 7
+    today = today or habits.now().date()
+
+    months = [" "] * (weeks * len(CELL))
+    for month in range(12):
+        column = (date(year, month + 1, 1) - start).days // 7 * len(CELL)
+        months[column : column + 3] = MONTHS[month]
+    result: StyleAndTextTuples = [("", f"{year}\n    {''.join(months).rstrip()}\n")]
+
+    for weekday in range(7):
+        result.append(("", f"{WEEKDAYS[weekday]:<4}"))
+        for week in range(weeks):
+            i = week * 7 + weekday
+            day = start + timedelta(days=i)
+            if day.year != year or day > today:
+                result.append(("", " " * len(CELL)))
+                continue
+            shade = math.ceil(counts[i] * (len(SHADES) - 1) / max(habit_count, 1))
+            result.append((SHADES[shade], CELL))
+        result.append(("", "\n"))
+
+    result.append(("", "\n    Less "))
+    result.extend((shade, CELL) for shade in SHADES)
+    days = sum(1 for i, count in enumerate(counts) if count and (start + timedelta(days=i)).year == year)
+    result.append(("", f"More    {days} days with completions\n"))
+    return result
+
+
+async def heatmap(habit_list: list[habits.Habit], title: AnyFormattedText = ""):
+    """Display the completion heatmap of one or more habits, a year at a time
+
+    LEFT and RIGHT change the year, ENTER returns. Each year is computed once
+    while the view is open.
+    """
+    this_year = habits.now().year
+    first_days = [habit.start_date.date() for habit in habit_list] + [
+        date.fromordinal(habit.completion_days()[0]) for habit in habit_list if habit.completions
+    ]  # completions may predate the start, e.g. when imported
+    first_year = min(first_days).year if first_days else this_year
+    year = this_year
+    rendered: dict[int, StyleAndTextTuples] = {}
+
+    def get_text():
+        if year not in rendered:
+            counts = analytics.heatmap(habit_list, year)
+            rendered[year] = render_heatmap(counts, year, len(habit_list))
+        return [*rendered[year], ("", "\nLEFT/RIGHT to change the year, ENTER to return.")]
+
+    kb = KeyBindings()
+
+    @kb.add("left")
+    def _(event):
+        nonlocal year
+        year = max(year - 1, first_year)
+
+    @kb.add("right")
+    def _(event):
+        nonlocal year
+        year = min(year + 1, this_year)
+
+    @kb.add("enter")
+    def _(event):
+        ROUTER.finish()
+
+    control = FormattedTextControl(get_text, focusable=True, show_cursor=False)
+    await ROUTER.show(View(Window(content=control), kb, "heatmap"), title)
@@ -0,0 +1,117 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, NamedTuple
+
+from prompt_toolkit.application import Application
+from prompt_toolkit.filters import Condition
+from prompt_toolkit.formatted_text import AnyFormattedText, to_formatted_text
+from prompt_toolkit.key_binding import DynamicKeyBindings, KeyBindingsBase
+from prompt_toolkit.layout import ConditionalContainer, DynamicContainer, HSplit, Layout
+from prompt_toolkit.layout.containers import AnyContainer, Window
+from prompt_toolkit.layout.controls import FormattedTextControl
+
+
+class View(NamedTuple):
+    """A screen that can be swapped into the router"""
+
+    container: AnyContainer
+    key_bindings: KeyBindingsBase
+    name: str = "View"
+
+
+class ViewRouter:
+    """
+    Single long-lived application whose views are swapped in place
+
+    A view is any object with ``container`` and ``key_bindings`` attributes,
+    and its container must contain a focusable window. Flows ``await show(view)``,
+    which returns the result the view passes to ``finish``.
+
+    Attrs:
+        app (Application): the application, created when the router runs
+        view: view currently on screen
+        title (AnyFormattedText): text shown above the view
+        timings (list[tuple[str, float]]): seconds from leaving a view to the next view's first render
+    """
+
+    def __init__(self):
+        self.app: Application | None = None
+        self.view = None
+        self.title: AnyFormattedText = ""
+        self.timings: list[tuple[str, float]] = []
+        self._container = None
+        self._future: asyncio.Future | None = None
+        self._switched: tuple[str, float] | None = None
+        self._finished_at: float | None = None
+        self._title_window = ConditionalContainer(
+            Window(
+                FormattedTextControl(lambda: to_formatted_text(self.title)),
+                dont_extend_height=True,
+            ),
+            filter=Condition(lambda: bool(self.title)),
+        )
+
+    def run(self, flow: Callable[[], Awaitable]):
+        """Run the application until the given coroutine function returns"""
+        error = None
+
+        async def main():
+            nonlocal error
+            try:
+                await flow()
+            except Exception as e:  # re-raised once the terminal is restored
+                error = e
+            finally:
+                if not self.app.is_done:
+                    self.app.exit()
+
+        self._container = HSplit([self._title_window])
+        self.app = Application(
+            layout=Layout(DynamicContainer(lambda: self._container)),
+            key_bindings=DynamicKeyBindings(self._get_key_bindings),
+            full_screen=True,
+            after_render=self._after_render,
+        )
+        self.app.run(pre_run=lambda: self.app.create_background_task(main()))
+        self.app = None
+        if error is not None:
+            raise error
+
+    async def show(self, view, title: AnyFormattedText = "") -> Any:
+        """Swap the given view in and return the result it finishes with"""
+        self.view = view
+        self.title = title
+        self._container = HSplit([self._title_window, view.container])
+        self._future = asyncio.get_running_loop().create_future()
+        name = getattr(view, "name", type(view).__name__)
+        self._switched = (name, self._finished_at or time.perf_counter())
+        self.app.layout.focus(view.container)
+        self.app.invalidate()
+        return await self._future
+
+    def finish(self, result: Any = None):
+        """Return a result from the current view to the flow awaiting it"""
+        if self._future is not None and not self._future.done():
+            self._finished_at = time.perf_counter()
+            self._future.set_result(result)
+
+    def report_timings(self) -> str:
+        """Return a summary of the time-to-interactive of each view switch"""
+        lines = ["Time to interactive per screen transition:"]
+        for name, seconds in self.timings:
+            lines.append(f"  {name:<16} {seconds * 1000:8.2f} ms")
+        return "\n".join(lines)
+
+    def _get_key_bindings(self) -> KeyBindingsBase | None:
+        return self.view.key_bindings if self.view is not None else None
+
+    def _after_render(self, app: Application):
+        """Record how long the last view switch took to reach the screen"""
+        if self._switched is not None:
+            name, switched_at = self._switched
+            self.timings.append((name, time.perf_counter() - switched_at))
+            self._switched = None
+            self._finished_at = None
+
+
+ROUTER: ViewRouter = ViewRouter()
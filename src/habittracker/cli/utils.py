@@ -1,20 +1,18 @@
 import calendar
-import os
 from datetime import date, timedelta
 
-from prompt_toolkit.application import Application
+from prompt_toolkit.buffer import Buffer
+from prompt_toolkit.document import Document
+from prompt_toolkit.formatted_text import AnyFormattedText, to_formatted_text
 from prompt_toolkit.key_binding import KeyBindings
-from prompt_toolkit.layout import HSplit, Layout
+from prompt_toolkit.layout import HSplit, VSplit
 from prompt_toolkit.layout.containers import Window
-from prompt_toolkit.layout.controls import FormattedTextControl
+from prompt_toolkit.layout.controls import BufferControl, FormattedTextControl
 
+from .router import ROUTER, View
 
-def clear_screen():
-    """Clear the terminal screen."""
-    os.system("cls" if os.name == "nt" else "clear")
 
-
-def radio_list(options: list, default=None):
+async def radio_list(options: list, default=None, title: AnyFormattedText = ""):
     """Display an inline radio list with the given options and return the selected option"""
     if default is not None and default in options:
         selected_index = options.index(default)
@@ -34,28 +32,27 @@ def radio_list(options: list, default=None):
     def move_up(event):
         nonlocal selected_index
         selected_index = (selected_index - 1) % len(options)
-        window.content.text = get_menu_text()
 
     @kb.add("down")
     def move_down(event):
         nonlocal selected_index
         selected_index = (selected_index + 1) % len(options)
-        window.content.text = get_menu_text()
 
     @kb.add("enter")
     def select_option(event):
-        event.app.exit(result=options[selected_index])
+        ROUTER.finish(options[selected_index])
 
-    control = FormattedTextControl(get_menu_text(), show_cursor=False)
+    control = FormattedTextControl(get_menu_text, focusable=True, show_cursor=False)
     window = Window(content=control)
-    layout = Layout(window)
-    app = Application(layout=layout, key_bindings=kb)
 
-    return app.run()
+    return await ROUTER.show(View(window, kb, "radio_list"), title)
 
 
-def calendar_picker(
-    default: date = None, min_date: date = None, max_date: date = None
+async def calendar_picker(
+    default: date = None,
+    min_date: date = None,
+    max_date: date = None,
+    title: AnyFormattedText = "",
 ) -> date:
     """Displays a interactive calender and returns the selected date"""
     today = date.today()
@@ -64,7 +61,6 @@ def calendar_picker(
     year, month, selected_day = current.year, current.month, current.day
 
     kb = KeyBindings()
-    result = None
 
     def _clamp(y, m, d):
         nonlocal year, month, selected_day
@@ -131,14 +127,48 @@ def calendar_picker(
 
     @kb.add("enter")
     def _(event):
-        nonlocal result
-        result = date(year, month, selected_day)
-        event.app.exit()
+        ROUTER.finish(date(year, month, selected_day))
 
-    control = FormattedTextControl(get_text, show_cursor=False)
+    control = FormattedTextControl(get_text, focusable=True, show_cursor=False)
     window = Window(content=control, always_hide_cursor=True)
-    layout = Layout(HSplit([window]))
-    app = Application(layout=layout, key_bindings=kb)
 
-    app.run()
-    return result
+    return await ROUTER.show(View(HSplit([window]), kb, "calendar_picker"), title)
+
+
+async def text_input(
+    label: AnyFormattedText, default: str = "", title: AnyFormattedText = ""
+) -> str:
+    """Display a single-line text field and return the entered text"""
+    buffer = Buffer(document=Document(default, len(default)), multiline=False)
+
+    kb = KeyBindings()
+
+    @kb.add("enter")
+    def _(event):
+        ROUTER.finish(buffer.text)
+
+    field = VSplit(
+        [
+            Window(FormattedTextControl(label), dont_extend_width=True),
+            Window(BufferControl(buffer), height=1),
+        ]
+    )
+
+    return await ROUTER.show(View(field, kb, "text_input"), title)
+
+
+async def message(text: AnyFormattedText, footer: str = "Press ENTER to return."):
+    """Display a block of text until ENTER is pressed"""
+    kb = KeyBindings()
+
+    @kb.add("enter")
+    def _(event):
+        ROUTER.finish()
+
+    control = FormattedTextControl(
+        lambda: [*to_formatted_text(text), ("", f"\n\n{footer}")],
+        focusable=True,
+        show_cursor=False,
+    )
+
+    await ROUTER.show(View(Window(content=control), kb, "message"))
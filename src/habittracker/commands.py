@@ -0,0 +1,400 @@
+import sys
+from datetime import date, datetime, time
+
+from . import db_handler, habits
+
+
+def _resolve(key: str) -> str | None:
+    """Return the UUID of the single habit matching a name or UUID"""
+    matches = db_handler.find_habits(key)
+    if not matches:
+        print(f"No habit named '{key}'.", file=sys.stderr)
+        return None
+    if len(matches) > 1:
+        print(
+            f"Several habits are named '{key}', use one of their UUIDs instead:",
+            *matches,
+            sep="\n  ",
+            file=sys.stderr,
+        )
+        return None
+    return matches[0]
+
+
+def habit_summary(habit: habits.Habit) -> dict:
+    """Return a habit's details and its progress in the current period"""
+    period = habit.get_period()
+    return {
+        "uuid": habit.uuid,
+        "name": habit.name,
+        "periodicity": habit.periodicity,
+        "notes": habit.notes,
+        "start_date": habit.start_date.isoformat(),
+        "target": habit.target,
+        "count": habit.get_count(period),
+        "completed": habit.get_completed(period),
+        "period_end": period["end"].isoformat(),
+    }
+
+
+def analytics_report(
+    habit_list: list[habits.Habit], since: datetime = None, until: datetime = None
+) -> dict:
+    """Return the analytics of each habit and of the group in a time frame
+
+    Args:
+        habit_list (list[Habit]): habits to analyse
+        since (datetime): start of the time frame, defaults to the earliest habit start
+        until (datetime): end of the time frame, defaults to now
+    """
+    from . import analytics
+
+    with analytics.time_frame(since, until):
+        rows = []
+        for habit in habit_list:
+            habit.get_period()  # bring the periods up to date
+            habit_analytics = analytics.HabitAnalytics(habit)
+            rows.append(
+                {
+                    "uuid": habit.uuid,
+                    "name": habit.name,
+                    "streak": habit.get_streak(min(analytics.UNTIL, habits.now())),
+                    "highest_streak": habit_analytics.highest_streak(),
+                    "completed_periods": habit_analytics.completed_periods(),
+                    "total_periods": habit_analytics.total_periods(),
+                    "completion_rate": habit_analytics.completion_rate(),
+                }
+            )
+
+        group_analytics = analytics.GroupAnalytics(habit_list)
+        overall = {
+            "since": analytics.SINCE.isoformat(),
+            "until": analytics.UNTIL.isoformat(),
+            "highest_streak": group_analytics.highest_streak(),
+            "completed_periods": group_analytics.completed_periods(),
+            "total_periods": group_analytics.total_periods(),
+            "average_completion_rate": group_analytics.average_completion_rate(),
+        }
+    return {"overall": overall, "habits": rows}
+
+
+def complete(key: str, undo: bool = False) -> int:
+    """Add a completion to a habit's current period, or remove one
+
+    Only the habit's latest period and its completions are read, and only
+    new rows are written, so the cost does not grow with the habit's history.
+    Completions are added until the habit's target is reached.
+
+    Args:
+        key (str): name or UUID of the habit
+        undo (bool): remove the current period's completion instead, only
+            the latest one for habits with a target above 1
+    """
+    habit_uuid = _resolve(key)
+    if habit_uuid is None:
+        return 1
+
+    habits.load_habits([habit_uuid], recent=True)
+    habit = habits.HABITS.get_habit(habit_uuid)
+
+    loaded = len(habit.periods)
+    period = habit.get_period()  # generates the periods missed since the last run
+    new_periods = [
+        {"start": p["start"].isoformat(), "end": p["end"].isoformat()}
+        for p in habit.periods[loaded:]
+    ]
+    count = habit.get_count(period)
+
+    completions = []
+    if undo and count:
+        db_handler.delete_completions(
+            habit_uuid,
+            period["start"].isoformat(),
+            period["end"].isoformat(),
+            latest=habit.target > 1,
+        )
+        if habit.target > 1:
+            print(f"'{habit.name}' at {count - 1}/{habit.target} for the current period.")
+        else:
+            print(f"'{habit.name}' marked incomplete for the current period.")
+    elif undo:
+        print(f"'{habit.name}' is not complete for the current period.")
+    elif count >= habit.target:
+        print(f"'{habit.name}' is already complete for the current period.")
+    else:
+        completions.append(habits.now().isoformat())
+        if count + 1 < habit.target:
+            print(f"'{habit.name}' at {count + 1}/{habit.target} for the current period.")
+        else:
+            print(f"'{habit.name}' marked complete until {period['end']:%Y-%m-%d %H:%M}.")
+
+    if new_periods or completions:
+        db_handler.append_history(habit_uuid, new_periods, completions)
+    return 0
+
+
+def list_habits(as_json: bool = False) -> int:
+    """Print every habit with whether it is complete for the current period
+
+    Args:
+        as_json (bool): print a JSON array instead of a plain text listing
+    """
+    habits.load_habits(recent=True)
+
+    rows = [habit_summary(habit) for habit in habits.HABITS.get_habits().values()]
+
+    if as_json:
+        import json
+
+        print(json.dumps(rows, indent=2))
+    else:
+        for row in rows:
+            mark = "x" if row["completed"] else " "
+            periodicity = f"{row['periodicity']['amount']} {row['periodicity']['unit']}"
+            if row["target"] > 1:
+                periodicity += f" {row['count']}/{row['target']}"
+            print(f"[{mark}] {row['name']:<20} {periodicity:<12} {row['uuid']}")
+    return 0
+
+
+def stats(since: date = None, until: date = None, as_json: bool = False) -> int:
+    """Print streaks and completion rates of every habit in a time frame
+
+    Args:
+        since (date): first day of the time frame, defaults to the earliest habit start
+        until (date): last day of the time frame, defaults to today
+        as_json (bool): print a JSON object instead of a plain text table
+    """
+    habits.load_habits()
+    report = analytics_report(
+        list(habits.HABITS.get_habits().values()),
+        since and datetime.combine(since, time.min),
+        until and datetime.combine(until, time.max),
+    )
+    overall, rows = report["overall"], report["habits"]
+
+    if as_json:
+        import json
+
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{'Habit':<20} {'Streak':>8} {'Highest':>8} {'Completed':>12} {'Rate':>8}")
+        for row in rows:
+            completed = f"{row['completed_periods']}/{row['total_periods']}"
+            print(
+                f"{row['name']:<20} {row['streak']:>8} {row['highest_streak']:>8}"
+                f" {completed:>12} {row['completion_rate'] * 100:>7.2f}%"
+            )
+        print(
+            f"\nHighest streak: {overall['highest_streak']}, average completion rate:"
+            f" {overall['average_completion_rate'] * 100:.2f}%"
+        )
+    return 0
+
+
+def groups(since: date = None, until: date = None, as_json: bool = False) -> int:
+    """Print the analytics of every habit group, nested groups included in their parents
+
+    Args:
+        since (date): first day of the time frame, defaults to the earliest habit start
+        until (date): last day of the time frame, defaults to today
+        as_json (bool): print a JSON array instead of a plain text tree
+    """
+    from . import analytics
+
+    habits.load_habits()
+    analytics.set_period(
+        since and datetime.combine(since, time.min),
+        until and datetime.combine(until, time.max),
+    )
+    habit_groups = habits.HABITS.groups
+    rows = [
+        {
+            "name": name,
+            "parent": habit_groups.parents[name],
+            "depth": depth,
+            **habit_groups.aggregate(name),
+        }
+        for name, depth in habit_groups.tree()
+    ]
+
+    if as_json:
+        import json
+
+        print(json.dumps(rows, indent=2))
+    else:
+        print(f"{'Group':<24} {'Habits':>7} {'Highest':>8} {'Completed':>12} {'Rate':>8}")
+        for row in rows:
+            name = "  " * row["depth"] + row["name"]
+            completed = f"{row['completed_periods']}/{row['total_periods']}"
+            print(
+                f"{name:<24} {row['habits']:>7} {row['highest_streak']:>8}"
+                f" {completed:>12} {row['average_completion_rate'] * 100:>7.2f}%"
+            )
+    return 0
+
+
+def correlations(
+    since: date = None,
+    until: date = None,
+    unit: str = "days",
+    limit: int = 10,
+    as_json: bool = False,
+) -> int:
+    """Print how often pairs of habits are completed on the same day or week
+
+    Args:
+        since (date): first day of the time frame, defaults to the earliest habit start
+        until (date): last day of the time frame, defaults to today
+        unit (str): compare completions per "days" or "weeks"
+        limit (int): number of pairs in the plain text listing
+        as_json (bool): print the full co-completion and correlation matrices as JSON
+    """
+    from . import analytics
+
+    habits.load_habits()
+    analytics.set_period(
+        since and datetime.combine(since, time.min),
+        until and datetime.combine(until, time.max),
+    )
+    report = analytics.GroupAnalytics(list(habits.HABITS.get_habits().values())).co_completion(unit)
+
+    if as_json:
+        import json
+
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{'Habits':<41} {'Together':>9} {'Correlation':>12}")
+        for pair in analytics.strongest_pairs(report, limit):
+            names = " & ".join(pair["habits"])
+            print(f"{names:<41} {pair['both']:>9} {pair['correlation']:>12.2f}")
+        print(f"\n{report['slots']} {report['unit']} from {report['since']} to {report['until']}")
+    return 0
+
+
+def import_completions(
+    path: str, fmt: str = None, create: str = None, dry_run: bool = False
+) -> int:
+    """Import completions from a CSV or JSONL file, see importer.import_file
+
+    Args:
+        path (str): file to import
+        fmt (str): "csv" or "jsonl", guessed from the extension by default
+        create (str): periodicity unit of the habits to create for unknown
+            names, every 1 unit; rows of unknown habits are skipped by default
+        dry_run (bool): only validate and count, without changing anything
+    """
+    from . import importer
+
+    habits.load_habits()
+    periodicity = {"amount": 1, "unit": create} if create else None
+    try:
+        report = importer.import_file(path, fmt, periodicity, dry_run)
+    except (OSError, ValueError, UnicodeDecodeError) as e:
+        print(f"Import failed: {e}", file=sys.stderr)
+        return 1
+
+    for error in report["errors"]:
+        print(error, file=sys.stderr)
+    if report["invalid"] > len(report["errors"]):
+        print(f"... and {report['invalid'] - len(report['errors'])} more", file=sys.stderr)
+    verb = "Would import" if dry_run else "Imported"
+    print(
+        f"{verb} {report['imported']} of {report['rows']} completions"
+        f" ({report['duplicates']} duplicates, {report['invalid']} invalid)."
+    )
+    if report["created"]:
+        print(f"{'Would create' if dry_run else 'Created'}: {', '.join(report['created'])}")
+    return 0
+
+
+def export(
+    output: str = None,
+    fmt: str = None,
+    table: str = "completions",
+    keys: list[str] = None,
+    since: date = None,
+    until: date = None,
+) -> int:
+    """Export habits, periods or completions, see exporter.export
+
+    Args:
+        output (str): file to write, stdout by default
+        fmt (str): "csv", "jsonl" or "json", guessed from the output's extension by default
+        table (str): "completions", "periods" or "habits", for CSV and JSONL
+        keys (list[str]): names or UUIDs of the habits to export, all by default
+        since (date): first day of the periods and completions to export
+        until (date): last day of the periods and completions to export
+    """
+    from . import exporter
+
+    habit_uuids = None
+    if keys:
+        habit_uuids = [_resolve(key) for key in keys]
+        if None in habit_uuids:
+            return 1
+
+    fmt = fmt or exporter.detect_format(output)
+    try:
+        count = exporter.export(output, fmt, table, habit_uuids, since, until)
+    except OSError as e:
+        print(f"Export failed: {e}", file=sys.stderr)
+        return 1
+    if output not in (None, "-"):  # stdout only gets the data
+        print(f"Exported {count} {'habits' if fmt == 'json' else table} to {output}.")
+    return 0
+
+
+def sync(url: str) -> int:
+    """Exchange the changes since the last sync with a sync server
+
+    Args:
+        url (str): base URL of the sync server
+    """
+    import requests
+
+    from . import sync as sync_module
+
+    try:
+        result = sync_module.sync(url)
+    except requests.RequestException as e:
+        print(f"Sync failed: {e}", file=sys.stderr)
+        return 1
+    print(
+        f"Pulled {result['pulled']} changes ({result['applied']} applied),"
+        f" pushed {result['pushed']}."
+    )
+    return 0
+
+
+def remind(before: int = 60, refresh: float = 300, as_json: bool = False) -> int:
+    """Print a line for each habit still incomplete shortly before its period ends
+
+    Runs until interrupted, sleeping until the next reminder is due.
+
+    Args:
+        before (int): minutes before the end of a period to remind
+        refresh (float): longest sleep in seconds before looking for changes
+            made elsewhere, e.g. completions
+        as_json (bool): print each reminder as a JSON object on its own line
+    """
+    from datetime import timedelta
+
+    from .reminders import Reminders, format_reminder
+
+    if as_json:
+        import json
+
+        def emit(reminder):
+            print(json.dumps(reminder), flush=True)
+
+    else:
+
+        def emit(reminder):
+            print(format_reminder(reminder), flush=True)
+
+    try:
+        Reminders(timedelta(minutes=before), emit).run(refresh)
+    except KeyboardInterrupt:
+        pass
+    return 0
@@ -1,15 +1,19 @@
+import os
 import sqlite3
-from pathlib import Path
-
-from platformdirs import user_data_dir
+from collections import Counter
 
 DB_PATH = None
+SEARCH_INDEX = False  # search habits through the persisted FTS5 index
+SCHEMA_VERSION = 1  # stored in PRAGMA user_version, see _migrate
+FETCH_SIZE = 10_000  # rows fetched at a time when streaming, see iter_history
 
 
 def default_db_path() -> str:
-    data_dir = Path(user_data_dir("HabitTracker"))
-    data_dir.mkdir(parents=True, exist_ok=True)
-    return str(data_dir / "habits.db")
+    from platformdirs import user_data_dir
+
+    data_dir = user_data_dir("HabitTracker")
+    os.makedirs(data_dir, exist_ok=True)
+    return os.path.join(data_dir, "habits.db")
 
 
 def set_db_path(path=None):
@@ -25,8 +29,12 @@ def _get_conn():
     return conn
 
 
-def initialize_database():
-    """Initialize database with habits, completions, and periods table"""
+def initialize_database(search_index: bool = False):
+    """Initialize database with habits, completions, and periods table
+
+    Args:
+        search_index (bool): also create and use the FTS5 habit search index
+    """
     try:
         with _get_conn() as conn:
             conn.executescript(
@@ -37,7 +45,8 @@ def initialize_database():
                     periodicity_amount INTEGER NOT NULL,
                     periodicity_unit TEXT NOT NULL,
                     notes TEXT,
-                    start_date TEXT NOT NULL
+                    start_date TEXT NOT NULL,
+                    target INTEGER NOT NULL DEFAULT 1
                 );
 
                 CREATE TABLE IF NOT EXISTS periods (
@@ -54,52 +63,701 @@ def initialize_database():
                     completed_at TEXT NOT NULL,
                     FOREIGN KEY (habit_uuid) REFERENCES habits(uuid) ON DELETE CASCADE
                 );
+
+                CREATE TABLE IF NOT EXISTS habit_group_tree (
+                    name TEXT PRIMARY KEY,
+                    parent TEXT REFERENCES habit_group_tree(name)
+                        ON DELETE SET NULL ON UPDATE CASCADE DEFERRABLE INITIALLY DEFERRED
+                );
+
+                CREATE TABLE IF NOT EXISTS habit_group_members (
+                    group_name TEXT NOT NULL,
+                    habit_uuid TEXT NOT NULL,
+                    PRIMARY KEY (group_name, habit_uuid),
+                    FOREIGN KEY (group_name) REFERENCES habit_group_tree(name)
+                        ON DELETE CASCADE ON UPDATE CASCADE,
+                    FOREIGN KEY (habit_uuid) REFERENCES habits(uuid) ON DELETE CASCADE
+                );
+
+                CREATE INDEX IF NOT EXISTS idx_habits_name ON habits(name COLLATE NOCASE);
+                CREATE INDEX IF NOT EXISTS idx_periods_habit ON periods(habit_uuid, start);
+                CREATE INDEX IF NOT EXISTS idx_completions_habit ON completions(habit_uuid, completed_at);
                 """
             )
+            _migrate(conn)
     except sqlite3.Error as e:
         print(f"Database initialization failed: {e}")
         raise
 
+    if search_index:
+        initialize_search_index()
+
+
+def _migrate(conn: sqlite3.Connection):
+    """Bring a database created by an older version up to SCHEMA_VERSION"""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return
+    columns = {row["name"] for row in conn.execute("PRAGMA table_info(habits)")}
+    if "target" not in columns:  # version 1: completions needed per period
+        conn.execute("ALTER TABLE habits ADD COLUMN target INTEGER NOT NULL DEFAULT 1")
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
+def initialize_search_index():
+    """Create an FTS5 trigram index over habit names and notes, kept in sync by triggers"""
+    global SEARCH_INDEX
+    try:
+        with _get_conn() as conn:
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'habits_fts'"
+            ).fetchone()
+            conn.executescript(
+                """
+                CREATE VIRTUAL TABLE IF NOT EXISTS habits_fts USING fts5(
+                    name, notes, content='habits', tokenize='trigram'
+                );
+
+                CREATE TRIGGER IF NOT EXISTS habits_fts_insert AFTER INSERT ON habits BEGIN
+                    INSERT INTO habits_fts (rowid, name, notes)
+                    VALUES (new.rowid, new.name, new.notes);
+                END;
+
+                CREATE TRIGGER IF NOT EXISTS habits_fts_delete AFTER DELETE ON habits BEGIN
+                    INSERT INTO habits_fts (habits_fts, rowid, name, notes)
+                    VALUES ('delete', old.rowid, old.name, old.notes);
+                END;
+
+                CREATE TRIGGER IF NOT EXISTS habits_fts_update AFTER UPDATE ON habits BEGIN
+                    INSERT INTO habits_fts (habits_fts, rowid, name, notes)
+                    VALUES ('delete', old.rowid, old.name, old.notes);
+                    INSERT INTO habits_fts (rowid, name, notes)
+                    VALUES (new.rowid, new.name, new.notes);
+                END;
+                """
+            )
+            if not exists:  # index habits saved before the index existed
+                conn.execute("INSERT INTO habits_fts (habits_fts) VALUES ('rebuild')")
+    except sqlite3.Error as e:
+        print(f"Search index initialization failed: {e}")
+        raise
+    SEARCH_INDEX = True
+
+
+def search_habits(query: str) -> list[str]:
+    """Return the UUIDs of saved habits whose name or notes contain the query"""
+    try:
+        with _get_conn() as conn:
+            if len(query) >= 3:  # trigrams can answer the query
+                rows = conn.execute(
+                    """
+                    SELECT habits.uuid FROM habits_fts
+                    JOIN habits ON habits.rowid = habits_fts.rowid
+                    WHERE habits_fts MATCH ?
+                    """,
+                    ('"' + query.replace('"', '""') + '"',),
+                ).fetchall()
+            else:
+                escaped = query.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+                rows = conn.execute(
+                    """
+                    SELECT uuid FROM habits
+                    WHERE name LIKE ? ESCAPE '!' OR notes LIKE ? ESCAPE '!'
+                    """,
+                    (f"%{escaped}%", f"%{escaped}%"),
+                ).fetchall()
+    except sqlite3.Error as e:
+        print(f"Failed to search habits in database: {e}")
+        raise
+    return [row["uuid"] for row in rows]
+
+
+# habit details as logged for sync, from the row named by the format argument
+_HABIT_JSON = """json_object(
+    'name', {0}.name,
+    'periodicity_amount', {0}.periodicity_amount,
+    'periodicity_unit', {0}.periodicity_unit,
+    'notes', {0}.notes,
+    'start_date', {0}.start_date,
+    'target', {0}.target
+)"""
+_NOT_APPLYING = "(SELECT value FROM sync_state WHERE key = 'applying') IS NULL"
+_LOG = """INSERT INTO sync_log (kind, habit_uuid, item, value, stamp, device)
+    VALUES ('{kind}', {row}.{uuid_column}, {item}, {value},
+        strftime('%Y-%m-%dT%H:%M:%fZ', 'now'),
+        (SELECT value FROM sync_state WHERE key = 'device'))"""
+
 
-def load_all():
-    """Load all habits from database
+def initialize_sync() -> str:
+    """Start logging changes for sync, kept by triggers, and return this device's ID
+
+    Habit upserts and deletions and completion events are logged, unless they
+    are applied from another device. Existing habits and completions are
+    logged once, when the log is created.
+    """
+    try:
+        with _get_conn() as conn:
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'sync_log'"
+            ).fetchone()
+            log_habit = _LOG.format(
+                kind="habit", row="new", uuid_column="uuid", item="''", value=_HABIT_JSON.format("new")
+            )
+            log_completion = _LOG.format(
+                kind="complete", row="new", uuid_column="habit_uuid", item="new.completed_at", value="NULL"
+            )
+            log_uncompletion = _LOG.format(
+                kind="uncomplete", row="old", uuid_column="habit_uuid", item="old.completed_at", value="NULL"
+            )
+            conn.executescript(
+                f"""
+                CREATE TABLE IF NOT EXISTS sync_state (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                );
+
+                CREATE TABLE IF NOT EXISTS sync_log (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    kind TEXT NOT NULL,  -- habit, delete, complete or uncomplete
+                    habit_uuid TEXT NOT NULL,
+                    item TEXT NOT NULL,  -- '' for the habit, the timestamp for completions
+                    value TEXT,  -- habit details as JSON
+                    stamp TEXT NOT NULL,
+                    device TEXT NOT NULL
+                );
+
+                CREATE INDEX IF NOT EXISTS idx_sync_log_item
+                    ON sync_log(habit_uuid, item, stamp, device);
+
+                DROP TRIGGER IF EXISTS sync_habit_insert;
+                CREATE TRIGGER sync_habit_insert AFTER INSERT ON habits
+                WHEN {_NOT_APPLYING} BEGIN
+                    {log_habit};
+                END;
+
+                DROP TRIGGER IF EXISTS sync_habit_update;  -- its columns changed with the schema
+                CREATE TRIGGER sync_habit_update AFTER UPDATE ON habits
+                WHEN {_NOT_APPLYING} AND (
+                    old.name IS NOT new.name
+                    OR old.periodicity_amount IS NOT new.periodicity_amount
+                    OR old.periodicity_unit IS NOT new.periodicity_unit
+                    OR old.notes IS NOT new.notes
+                    OR old.start_date IS NOT new.start_date
+                    OR old.target IS NOT new.target
+                ) BEGIN
+                    {log_habit};
+                END;
+
+                CREATE TRIGGER IF NOT EXISTS sync_habit_delete AFTER DELETE ON habits
+                WHEN {_NOT_APPLYING} BEGIN
+                    {_LOG.format(kind="delete", row="old", uuid_column="uuid", item="''", value="NULL")};
+                END;
+
+                CREATE TRIGGER IF NOT EXISTS sync_completion_insert AFTER INSERT ON completions
+                WHEN {_NOT_APPLYING} BEGIN
+                    {log_completion};
+                END;
+
+                -- completions deleted along with their habit are covered by its deletion
+                CREATE TRIGGER IF NOT EXISTS sync_completion_delete AFTER DELETE ON completions
+                WHEN {_NOT_APPLYING}
+                    AND EXISTS (SELECT 1 FROM habits WHERE uuid = old.habit_uuid)
+                BEGIN
+                    {log_uncompletion};
+                END;
+                """
+            )
+            if not exists:
+                import uuid
+
+                conn.execute(
+                    "INSERT INTO sync_state (key, value) VALUES ('device', ?)",
+                    (uuid.uuid4().hex,),
+                )
+                # log the habits and completions saved before the log existed
+                conn.execute(
+                    f"""
+                    INSERT INTO sync_log (kind, habit_uuid, item, value, stamp, device)
+                    SELECT 'habit', uuid, '', {_HABIT_JSON.format("habits")},
+                        strftime('%Y-%m-%dT%H:%M:%fZ', 'now'),
+                        (SELECT value FROM sync_state WHERE key = 'device')
+                    FROM habits
+                    """
+                )
+                conn.execute(
+                    """
+                    INSERT INTO sync_log (kind, habit_uuid, item, value, stamp, device)
+                    SELECT 'complete', habit_uuid, completed_at, NULL,
+                        strftime('%Y-%m-%dT%H:%M:%fZ', 'now'),
+                        (SELECT value FROM sync_state WHERE key = 'device')
+                    FROM completions ORDER BY id
+                    """
+                )
+            device = conn.execute(
+                "SELECT value FROM sync_state WHERE key = 'device'"
+            ).fetchone()["value"]
+    except sqlite3.Error as e:
+        print(f"Sync initialization failed: {e}")
+        raise
+    return device
+
+
+def get_sync_state(key: str, default: str = None) -> str | None:
+    """Return a sync setting, e.g. the device ID or a cursor"""
+    try:
+        with _get_conn() as conn:
+            row = conn.execute(
+                "SELECT value FROM sync_state WHERE key = ?", (key,)
+            ).fetchone()
+    except sqlite3.Error as e:
+        print(f"Failed to load sync state: {e}")
+        raise
+    return default if row is None else row["value"]
+
+
+def set_sync_state(key: str, value: str):
+    """Store a sync setting"""
+    try:
+        with _get_conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)",
+                (key, value),
+            )
+    except sqlite3.Error as e:
+        print(f"Failed to save sync state: {e}")
+        raise
+
+
+def local_changes(after: int, limit: int) -> list[dict]:
+    """Return up to limit changes made on this device after a log sequence number
 
     Returns:
-        dict: {"uuid": "habits", "periods", "completions"}
+        list[dict]: {"seq", "kind", "habit", "item", "value", "stamp", "device"}, oldest first
     """
-    data = {}
     try:
         with _get_conn() as conn:
-            habits = conn.execute("SELECT * FROM habits").fetchall()
+            rows = conn.execute(
+                """
+                SELECT seq, kind, habit_uuid AS habit, item, value, stamp, device
+                FROM sync_log
+                WHERE seq > ? AND device = (SELECT value FROM sync_state WHERE key = 'device')
+                ORDER BY seq LIMIT ?
+                """,
+                (after, limit),
+            ).fetchall()
+    except sqlite3.Error as e:
+        print(f"Failed to load sync changes: {e}")
+        raise
+    return [dict(row) for row in rows]
 
-            for habit in habits:
-                # Habit details
-                uuid = habit["uuid"]
 
-                # Habit periods
-                periods = conn.execute(
-                    "SELECT start, end FROM periods WHERE habit_uuid = ?", (uuid,)
-                ).fetchall()
+def apply_changes(changes: list[dict], state: dict = None) -> int:
+    """Apply changes made on other devices in one transaction, and return how many won
+
+    Each habit's details and each completion keep the change with the latest
+    (stamp, device), so every device ends up with the same result whatever
+    order it receives the changes in. Deletions always win: a deleted habit
+    ignores any later change.
+
+    Args:
+        changes (list[dict]): {"kind", "habit", "item", "value", "stamp", "device"},
+            plus the "period" {"start", "end"} to start new habits with
+        state (dict): sync settings to store along with the changes, e.g. the cursor
+    """
+    import json
+
+    applied = 0
+    try:
+        with _get_conn() as conn:
+            conn.execute("INSERT INTO sync_state (key, value) VALUES ('applying', '1')")
+            for change in changes:
+                habit_uuid, item = change["habit"], change["item"]
+                latest = conn.execute(
+                    """
+                    SELECT kind, stamp, device FROM sync_log
+                    WHERE habit_uuid = ? AND item = ?
+                    ORDER BY stamp DESC, device DESC LIMIT 1
+                    """,
+                    (habit_uuid, item),
+                ).fetchone()
+                if change["kind"] != "delete" and latest is not None and (
+                    latest["kind"] == "delete"
+                    or (change["stamp"], change["device"]) < (latest["stamp"], latest["device"])
+                ):
+                    continue
+
+                match change["kind"]:
+                    case "habit":
+                        habit = json.loads(change["value"])
+                        new = conn.execute(
+                            """
+                            INSERT INTO habits
+                                (uuid, name, periodicity_amount, periodicity_unit, notes, start_date, target)
+                            VALUES (?, ?, ?, ?, ?, ?, ?)
+                            ON CONFLICT(uuid) DO UPDATE SET
+                                name=excluded.name,
+                                periodicity_amount=excluded.periodicity_amount,
+                                periodicity_unit=excluded.periodicity_unit,
+                                notes=excluded.notes,
+                                start_date=excluded.start_date,
+                                target=excluded.target
+                            RETURNING NOT EXISTS (SELECT 1 FROM periods WHERE habit_uuid = ?)
+                            """,
+                            (
+                                habit_uuid,
+                                habit["name"],
+                                habit["periodicity_amount"],
+                                habit["periodicity_unit"],
+                                habit["notes"],
+                                habit["start_date"],
+                                habit.get("target", 1),  # logged by older versions without it
+                                habit_uuid,
+                            ),
+                        ).fetchone()[0]
+                        if new and change.get("period"):
+                            conn.execute(
+                                "INSERT INTO periods (habit_uuid, start, end) VALUES (?, ?, ?)",
+                                (habit_uuid, change["period"]["start"], change["period"]["end"]),
+                            )
+                    case "delete":
+                        conn.execute("DELETE FROM habits WHERE uuid = ?", (habit_uuid,))
+                    case "complete" | "uncomplete":
+                        if not conn.execute(
+                            "SELECT 1 FROM habits WHERE uuid = ?", (habit_uuid,)
+                        ).fetchone():
+                            continue  # deleted, or created by changes not received yet
+                        conn.execute(
+                            "DELETE FROM completions WHERE habit_uuid = ? AND completed_at = ?",
+                            (habit_uuid, item),
+                        )
+                        if change["kind"] == "complete":
+                            conn.execute(
+                                "INSERT INTO completions (habit_uuid, completed_at) VALUES (?, ?)",
+                                (habit_uuid, item),
+                            )
+                    case kind:
+                        raise ValueError(f"Unknown change kind '{kind}'")
+
+                conn.execute(
+                    """
+                    INSERT INTO sync_log (kind, habit_uuid, item, value, stamp, device)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        change["kind"],
+                        habit_uuid,
+                        item,
+                        change["value"],
+                        change["stamp"],
+                        change["device"],
+                    ),
+                )
+                applied += 1
+            conn.executemany(
+                "INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)",
+                (state or {}).items(),
+            )
+            conn.execute("DELETE FROM sync_state WHERE key = 'applying'")
+    except sqlite3.Error as e:
+        print(f"Failed to apply sync changes: {e}")
+        raise
+    return applied
 
-                # Habit completions
-                completions = conn.execute(
-                    "SELECT completed_at FROM completions WHERE habit_uuid = ?", (uuid,)
-                ).fetchall()
 
-                # Format as dictionary
-                data[uuid] = {
+def load_all(habit_uuids: list[str] = None, recent: bool = False):
+    """Load habits from database
+
+    Args:
+        habit_uuids (list[str]): only load these habits instead of all of them
+        recent (bool): only load each habit's latest period and the completions since its start
+
+    Returns:
+        dict: {"uuid": "habits", "periods", "completions"}
+    """
+    where, params = "", ()
+    if habit_uuids is not None:
+        where = f"WHERE h.uuid IN ({', '.join('?' * len(habit_uuids))})"
+        params = tuple(habit_uuids)
+
+    if recent:
+        latest = "(SELECT id FROM periods WHERE habit_uuid = h.uuid ORDER BY start DESC LIMIT 1)"
+        periods_query = f"""
+            SELECT p.habit_uuid, p.start, p.end FROM habits h
+            JOIN periods p ON p.id = {latest} {where}
+        """
+        completions_query = f"""
+            SELECT c.habit_uuid, c.completed_at FROM habits h
+            JOIN completions c ON c.habit_uuid = h.uuid
+                AND c.completed_at >= (SELECT start FROM periods WHERE id = {latest})
+            {where} ORDER BY c.id
+        """
+    else:
+        periods_query = f"""
+            SELECT p.habit_uuid, p.start, p.end FROM habits h
+            JOIN periods p ON p.habit_uuid = h.uuid {where} ORDER BY p.habit_uuid, p.start
+        """
+        completions_query = f"""
+            SELECT c.habit_uuid, c.completed_at FROM habits h
+            JOIN completions c ON c.habit_uuid = h.uuid {where} ORDER BY c.id
+        """
+
+    data = {}
+    try:
+        with _get_conn() as conn:
+            # one query per table instead of two per habit
+            for habit in conn.execute(f"SELECT * FROM habits h {where}", params):
+                data[habit["uuid"]] = {
                     "habit": dict(habit),
-                    "periods": [dict(period) for period in periods],
-                    "completions": [
-                        completion["completed_at"] for completion in completions
-                    ],
+                    "periods": [],
+                    "completions": [],
                 }
+
+            for uuid, start, end in conn.execute(periods_query, params):
+                data[uuid]["periods"].append({"start": start, "end": end})
+
+            for uuid, completed_at in conn.execute(completions_query, params):
+                data[uuid]["completions"].append(completed_at)
     except sqlite3.Error as e:
         print(f"Failed to load data from database: {e}")
         raise
     return data
 
 
+def iter_history(habit_uuids: list[str] = None, since: str = None, until: str = None):
+    """Stream habits with their periods and completions, without loading them all
+
+    Rows are fetched FETCH_SIZE at a time within one read transaction, so
+    memory use does not grow with the database. Each habit's rows are read
+    through its (habit_uuid, ...) indexes, date range included.
+
+    Args:
+        habit_uuids (list[str]): only these habits instead of all of them
+        since (str): only periods ending and completions made at or after it
+        until (str): only periods starting and completions made before it
+
+    Yields:
+        tuple: the habit's row, then iterators over its (start, end) period
+            rows and its (completed_at,) completion rows, oldest first. Habits
+            are ordered by name.
+    """
+    where, params = "", ()
+    if habit_uuids is not None:
+        where = f"WHERE uuid IN ({', '.join('?' * len(habit_uuids))})"
+        params = tuple(habit_uuids)
+    since, until = since or "", until or "9999"  # ISO timestamps compare as text
+
+    conn = _get_conn()
+    try:
+        conn.execute("BEGIN")  # one consistent snapshot across the queries
+        habits = conn.execute(
+            f"SELECT * FROM habits {where} ORDER BY name COLLATE NOCASE, uuid", params
+        )
+        for habit in _fetch(habits):
+            periods = conn.execute(
+                """
+                SELECT start, end FROM periods
+                WHERE habit_uuid = ? AND start < ? AND end > ? ORDER BY start
+                """,
+                (habit["uuid"], until, since),
+            )
+            completions = conn.execute(
+                """
+                SELECT completed_at FROM completions
+                WHERE habit_uuid = ? AND completed_at >= ? AND completed_at < ?
+                ORDER BY completed_at
+                """,
+                (habit["uuid"], since, until),
+            )
+            yield habit, _fetch(periods), _fetch(completions)
+    except sqlite3.Error as e:
+        print(f"Failed to read data from database: {e}")
+        raise
+    finally:
+        conn.close()
+
+
+def _fetch(cursor: sqlite3.Cursor):
+    """Yield a cursor's rows, fetched FETCH_SIZE at a time"""
+    while rows := cursor.fetchmany(FETCH_SIZE):
+        yield from rows
+
+
+def find_habits(key: str) -> list[str]:
+    """Return the UUIDs of habits whose UUID or (case-insensitive) name is the key"""
+    try:
+        with _get_conn() as conn:
+            rows = conn.execute("SELECT uuid FROM habits WHERE uuid = ?", (key,))
+            uuids = [row["uuid"] for row in rows]
+            if not uuids:
+                rows = conn.execute(
+                    "SELECT uuid FROM habits WHERE name = ? COLLATE NOCASE", (key,)
+                )
+                uuids = [row["uuid"] for row in rows]
+    except sqlite3.Error as e:
+        print(f"Failed to find habit: {e}")
+        raise
+    return uuids
+
+
+def append_history(habit_uuid: str, periods: list[dict], completions: list[str]):
+    """Add new periods and completions of a habit without rewriting the old ones
+
+    Args:
+        habit_uuid (str): habit the rows belong to
+        periods (list[dict]): {"start", "end"} of periods to add
+        completions (list[str]): completion timestamps to add
+    """
+    try:
+        with _get_conn() as conn:
+            conn.executemany(
+                "INSERT INTO periods (habit_uuid, start, end) VALUES (?, ?, ?)",
+                [(habit_uuid, period["start"], period["end"]) for period in periods],
+            )
+            conn.executemany(
+                "INSERT INTO completions (habit_uuid, completed_at) VALUES (?, ?)",
+                [(habit_uuid, completion) for completion in completions],
+            )
+    except sqlite3.Error as e:
+        print(f"Failed to save data to database: {e}")
+        raise
+
+
+def import_history(batches):
+    """Write imported habits, completions and periods in a single transaction
+
+    The batches are consumed as they are produced, so the rows of a large
+    import are never all in memory at once. Nothing is written if one fails.
+
+    Args:
+        batches (Iterable[dict]): each with any of
+            "habits": {"uuid": "habits", "periods", "completions"} of new habits, written first,
+            "completions": (habit_uuid, completed_at) rows to add,
+            "periods": (habit_uuid, start, end) rows to add,
+            "start_dates": (start_date, habit_uuid) of habits whose start moved
+    """
+    try:
+        with _get_conn() as conn:
+            for batch in batches:
+                for uuid, habit_data in batch.get("habits", {}).items():
+                    _save_habit(conn, uuid, habit_data)
+                conn.executemany(
+                    "INSERT INTO completions (habit_uuid, completed_at) VALUES (?, ?)",
+                    batch.get("completions", ()),
+                )
+                conn.executemany(
+                    "INSERT INTO periods (habit_uuid, start, end) VALUES (?, ?, ?)",
+                    batch.get("periods", ()),
+                )
+                conn.executemany(
+                    "UPDATE habits SET start_date = ? WHERE uuid = ?",
+                    batch.get("start_dates", ()),
+                )
+    except sqlite3.Error as e:
+        print(f"Failed to import data to database: {e}")
+        raise
+
+
+def delete_completions(habit_uuid: str, start: str, end: str, latest: bool = False):
+    """Delete the completions of a habit in the interval [start, end)
+
+    Args:
+        latest (bool): only delete the latest completion in the interval
+    """
+    try:
+        with _get_conn() as conn:
+            conn.execute(
+                f"""
+                DELETE FROM completions WHERE id IN (
+                    SELECT id FROM completions
+                    WHERE habit_uuid = ? AND completed_at >= ? AND completed_at < ?
+                    {"ORDER BY completed_at DESC LIMIT 1" if latest else ""}
+                )
+                """,
+                (habit_uuid, start, end),
+            )
+    except sqlite3.Error as e:
+        print(f"Failed to save data to database: {e}")
+        raise
+
+
+def load_groups() -> tuple[dict[str, str | None], dict[str, list[str]]]:
+    """Load habit groups
+
+    Returns:
+        tuple[dict, dict]: parent of each group, and the member habit UUIDs of each group
+    """
+    try:
+        with _get_conn() as conn:
+            parents = {
+                row["name"]: row["parent"]
+                for row in conn.execute("SELECT name, parent FROM habit_group_tree")
+            }
+            members = {}
+            for row in conn.execute("SELECT group_name, habit_uuid FROM habit_group_members"):
+                members.setdefault(row["group_name"], []).append(row["habit_uuid"])
+    except sqlite3.Error as e:
+        print(f"Failed to load groups from database: {e}")
+        raise
+    return parents, members
+
+
+def save_groups(parents: dict[str, str | None], members: dict[str, set[str]]):
+    """Save habit groups, only writing the groups and memberships that changed
+
+    Args:
+        parents (dict): parent of each group, None for top-level groups
+        members (dict): member habit UUIDs of each group, all saved habits
+    """
+    try:
+        with _get_conn() as conn:
+            _save_groups(conn, parents, members)
+    except sqlite3.Error as e:
+        print(f"Failed to save groups to database: {e}")
+        raise
+
+
+def _save_groups(
+    conn: sqlite3.Connection, parents: dict[str, str | None], members: dict[str, set[str]]
+):
+    saved = {
+        row["name"]: row["parent"]
+        for row in conn.execute("SELECT name, parent FROM habit_group_tree")
+    }
+    conn.executemany(
+        "DELETE FROM habit_group_tree WHERE name = ?",
+        [(name,) for name in saved.keys() - parents.keys()],
+    )
+    conn.executemany(
+        """
+        INSERT INTO habit_group_tree (name, parent) VALUES (?, ?)
+        ON CONFLICT(name) DO UPDATE SET parent=excluded.parent
+        """,
+        [
+            (name, parent)
+            for name, parent in parents.items()
+            if name not in saved or saved[name] != parent
+        ],
+    )
+
+    saved_members = {
+        tuple(row)
+        for row in conn.execute("SELECT group_name, habit_uuid FROM habit_group_members")
+    }
+    wanted = {
+        (name, habit_uuid)
+        for name, habit_uuids in members.items()
+        for habit_uuid in habit_uuids
+    }
+    conn.executemany(
+        "DELETE FROM habit_group_members WHERE group_name = ? AND habit_uuid = ?",
+        saved_members - wanted,
+    )
+    conn.executemany(
+        "INSERT INTO habit_group_members (group_name, habit_uuid) VALUES (?, ?)",
+        wanted - saved_members,
+    )
+
+
 def save_all(data: dict):
     """Save all habits to database
 
@@ -119,51 +777,90 @@ def save_all(data: dict):
                 )
 
             # Upsert remaining habits
-            for uuid, data in data.items():
-                habit = data["habit"]
+            for uuid, habit_data in data.items():
+                _save_habit(conn, uuid, habit_data)
+    except sqlite3.Error as e:
+        print(f"Failed to save data to database: {e}")
+        raise
 
-                # Habit details
-                conn.execute(
-                    """
-                    INSERT INTO habits (uuid, name, periodicity_amount, periodicity_unit, notes, start_date)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                    ON CONFLICT(uuid) DO UPDATE SET
-                        name=excluded.name,
-                        periodicity_amount=excluded.periodicity_amount,
-                        periodicity_unit=excluded.periodicity_unit,
-                        notes=excluded.notes
-                    """,
-                    (
-                        uuid,
-                        habit["name"],
-                        habit["periodicity_amount"],
-                        habit["periodicity_unit"],
-                        habit["notes"],
-                        habit["start_date"],
-                    ),
-                )
 
-                # Habit periods
-                conn.execute("DELETE FROM periods WHERE habit_uuid = ?", (uuid,))
-                conn.executemany(
-                    "INSERT INTO periods (habit_uuid, start, end) VALUES (?, ?, ?)",
-                    [
-                        (uuid, period["start"], period["end"])
-                        for period in data["periods"]
-                    ],
-                )
+def save_batch(data: dict, deleted: list[str] = (), groups: tuple = None):
+    """Save some habits, delete others and save the groups in a single transaction
 
-                # Habit completions
-                conn.execute("DELETE FROM completions WHERE habit_uuid = ?", (uuid,))
-                conn.executemany(
-                    "INSERT INTO completions (habit_uuid, completed_at) VALUES (?, ?)",
-                    [(uuid, completion) for completion in data["completions"]],
-                )
+    Habits that are not given are left untouched, so the cost depends on the
+    habits in the batch, not on the size of the database.
+
+    Args:
+        data (dict): {"uuid": "habits", "periods", "completions"} of the changed habits
+        deleted (list[str]): UUIDs of the habits to delete
+        groups (tuple): (parents, members) as taken by save_groups, if they changed
+    """
+    try:
+        with _get_conn() as conn:
+            conn.executemany(
+                "DELETE FROM habits WHERE uuid = ?", [(uuid,) for uuid in deleted]
+            )
+            for uuid, habit_data in data.items():
+                _save_habit(conn, uuid, habit_data)
+            if groups is not None:
+                _save_groups(conn, *groups)
     except sqlite3.Error as e:
         print(f"Failed to save data to database: {e}")
         raise
 
 
+def _save_habit(conn: sqlite3.Connection, uuid: str, data: dict):
+    """Upsert a habit with its periods and completions"""
+    habit = data["habit"]
+
+    # Habit details
+    conn.execute(
+        """
+        INSERT INTO habits (uuid, name, periodicity_amount, periodicity_unit, notes, start_date, target)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(uuid) DO UPDATE SET
+            name=excluded.name,
+            periodicity_amount=excluded.periodicity_amount,
+            periodicity_unit=excluded.periodicity_unit,
+            notes=excluded.notes,
+            start_date=excluded.start_date,
+            target=excluded.target
+        """,
+        (
+            uuid,
+            habit["name"],
+            habit["periodicity_amount"],
+            habit["periodicity_unit"],
+            habit["notes"],
+            habit["start_date"],
+            habit.get("target", 1),
+        ),
+    )
+
+    # Habit periods
+    conn.execute("DELETE FROM periods WHERE habit_uuid = ?", (uuid,))
+    conn.executemany(
+        "INSERT INTO periods (habit_uuid, start, end) VALUES (?, ?, ?)",
+        [(uuid, period["start"], period["end"]) for period in data["periods"]],
+    )
+
+    # Habit completions, only removing and adding the ones that changed
+    wanted = Counter(data["completions"])
+    stale = []
+    for row_id, completed_at in conn.execute(
+        "SELECT id, completed_at FROM completions WHERE habit_uuid = ?", (uuid,)
+    ):
+        if wanted[completed_at]:
+            wanted[completed_at] -= 1
+        else:
+            stale.append((row_id,))
+    conn.executemany("DELETE FROM completions WHERE id = ?", stale)
+    conn.executemany(
+        "INSERT INTO completions (habit_uuid, completed_at) VALUES (?, ?)",
+        [(uuid, completion) for completion, count in wanted.items() for _ in range(count)],
+    )
+
+
 def is_first_run() -> bool:
     """Return True if the database file does not yet exist"""
-    return DB_PATH and not Path(DB_PATH).exists()
+    return DB_PATH and not os.path.exists(DB_PATH)
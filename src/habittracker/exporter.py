@@ -0,0 +1,135 @@
+import contextlib
+import csv
+import gzip
+import json
+import sys
+import typing
+from datetime import date, datetime, time, timedelta
+
+from . import db_handler
+
+FORMATS = ("csv", "jsonl", "json")
+TABLES = ("completions", "periods", "habits")
+BUFFER_SIZE = 1 << 16  # bytes buffered before each write to the output file
+
+HABIT_COLUMNS = (
+    "uuid",
+    "name",
+    "periodicity_amount",
+    "periodicity_unit",
+    "notes",
+    "start_date",
+    "target",
+)
+COLUMNS = {
+    "completions": ("habit", "habit_uuid", "completed_at"),
+    "periods": ("habit", "habit_uuid", "start", "end"),
+    "habits": HABIT_COLUMNS,
+}
+
+
+def detect_format(path: str | None) -> str:
+    """Return the format of an output file from its extension, CSV by default"""
+    name = (path or "").lower().removesuffix(".gz")
+    for fmt in FORMATS:
+        if name.endswith(f".{fmt}"):
+            return fmt
+    return "csv"
+
+
+def export(
+    output: str = None,
+    fmt: str = None,
+    table: str = "completions",
+    habit_uuids: list[str] = None,
+    since: date = None,
+    until: date = None,
+) -> int:
+    """Write habits, periods or completions to a file straight from the database
+
+    Rows are streamed from db_handler.iter_history, never as Habit objects,
+    so memory use does not grow with the database.
+
+    Args:
+        output (str): file to write, gzipped if it ends with .gz, stdout by default
+        fmt (str): "csv", "jsonl" or "json", guessed from the output's extension by default
+        table (str): "completions", "periods" or "habits" to write one row per
+            item in CSV and JSONL. JSON always nests each habit's periods and
+            completions in it. Completions exported as CSV or JSONL can be
+            imported again, see importer.
+        habit_uuids (list[str]): only export these habits
+        since (date): first day of the periods and completions to export
+        until (date): last day of the periods and completions to export
+
+    Returns:
+        int: number of rows (habits for JSON) written
+    """
+    fmt = fmt or detect_format(output)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}', use one of: {', '.join(FORMATS)}")
+    if table not in TABLES:
+        raise ValueError(f"Unknown table '{table}', use one of: {', '.join(TABLES)}")
+    history = db_handler.iter_history(
+        habit_uuids,
+        since and datetime.combine(since, time.min).isoformat(),
+        until and datetime.combine(until + timedelta(days=1), time.min).isoformat(),
+    )
+    with _open(output) as file, contextlib.closing(history):
+        match fmt:
+            case "json":
+                return _write_json(file, history)
+            case "jsonl":
+
+                def write(row):
+                    file.write(json.dumps(dict(zip(COLUMNS[table], row))) + "\n")
+
+            case "csv":
+                writer = csv.writer(file)
+                writer.writerow(COLUMNS[table])
+                write = writer.writerow
+        count = 0
+        for row in _rows(history, table):
+            write(row)
+            count += 1
+        return count
+
+
+def _open(output: str | None) -> typing.ContextManager[typing.TextIO]:
+    if output is None or output == "-":
+        return contextlib.nullcontext(sys.stdout)
+    if output.lower().endswith(".gz"):
+        # level 6 like zlib, gzip's default of 9 is much slower for a few % smaller files
+        return gzip.open(output, "wt", compresslevel=6, encoding="utf-8", newline="")
+    return open(output, "w", encoding="utf-8", newline="", buffering=BUFFER_SIZE)
+
+
+def _rows(history: typing.Iterator[tuple], table: str) -> typing.Iterator[tuple]:
+    """Return the rows of a table in the COLUMNS order"""
+    for habit, periods, completions in history:
+        match table:
+            case "habits":
+                yield tuple(habit[column] for column in HABIT_COLUMNS)
+            case "periods":
+                for start, end in periods:
+                    yield habit["name"], habit["uuid"], start, end
+            case "completions":
+                for (completed_at,) in completions:
+                    yield habit["name"], habit["uuid"], completed_at
+
+
+def _write_json(file: typing.TextIO, history: typing.Iterator[tuple]) -> int:
+    """Write a JSON array of habits with their periods and completions, a row at a time"""
+    count = 0
+    file.write("[")
+    for habit, periods, completions in history:
+        details = json.dumps({column: habit[column] for column in HABIT_COLUMNS})
+        file.write(f"{',' if count else ''}\n  {details[:-1]}, \"periods\": [")
+        for i, (start, end) in enumerate(periods):
+            file.write(f'{", " if i else ""}{{"start": {json.dumps(start)}, "end": {json.dumps(end)}}}')
+        file.write('], "completions": [')
+        for i, (completed_at,) in enumerate(completions):
+            file.write(f'{", " if i else ""}{json.dumps(completed_at)}')
+        file.write("]}")
+        count += 1
+    file.write("\n]\n" if count else "]\n")
+    return count
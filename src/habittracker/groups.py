@@ -0,0 +1,222 @@
+import typing
+from collections import Counter
+
+if typing.TYPE_CHECKING:
+    from .habits import Habit, HabitStorage
+
+
+class HabitGroups:
+    """
+    Named groups (or tags) of habits, optionally nested in each other
+
+    A group contains its own member habits and those of every group nested in
+    it. Analytics of each group are kept as running totals of its habits'
+    metrics: when a habit changes, only its own metrics are computed again and
+    the difference is applied to the groups containing it. The totals are
+    rebuilt when groups or memberships change, or the analytics time frame does.
+
+    Attrs:
+        parents (dict[str, str | None]): parent of each group, None at the top level
+        members (dict[str, set[str]]): UUIDs of each group's own member habits
+    """
+
+    def __init__(self, storage: "HabitStorage"):
+        self.storage = storage
+        self.parents: dict[str, str | None] = {}
+        self.members: dict[str, set[str]] = {}
+
+        # aggregates, built on first use
+        self._containing: dict[str, set[str]] | None = None  # habit UUID -> groups containing it
+        self._metrics: dict[str, dict] = {}  # habit UUID -> its metrics in the time frame
+        self._totals: dict[str, dict] = {}  # group -> sums of its habits' metrics
+        self._frame: tuple | None = None  # analytics time frame of the metrics
+        self._aggregated_habits: dict | None = None
+
+    def load(self, parents: dict[str, str | None], members: dict[str, list[str]]):
+        """Replace the groups, e.g. with the saved ones"""
+        self.parents = dict(parents)
+        self.members = {name: set(members.get(name, ())) for name in parents}
+        self._structure_changed()
+
+    def create_group(self, name: str, parent: str = None):
+        """Create an empty group, nested in another one if a parent is given"""
+        if name in self.parents:
+            raise ValueError(f"Group '{name}' already exists")
+        if parent is not None and parent not in self.parents:
+            raise ValueError(f"No group named '{parent}'")
+        self.parents[name] = parent
+        self.members[name] = set()
+        self._structure_changed()
+
+    def ensure_path(self, path: str) -> str:
+        """Create the groups of a path like "Health/Running" as needed and return the last one"""
+        parent = None
+        for name in (part.strip() for part in path.split("/")):
+            if not name:
+                continue
+            if name not in self.parents:
+                self.create_group(name, parent)
+            parent = name
+        if parent is None:
+            raise ValueError("Group names cannot be empty")
+        return parent
+
+    def delete_group(self, name: str):
+        """Delete a group, moving the groups nested in it to its parent"""
+        parent = self.parents.pop(name)
+        del self.members[name]
+        for child, child_parent in self.parents.items():
+            if child_parent == name:
+                self.parents[child] = parent
+        self._structure_changed()
+
+    def move_group(self, name: str, parent: str | None):
+        """Nest a group in another one, or move it to the top level"""
+        if parent is not None and name in self.path(parent):
+            raise ValueError(f"Group '{name}' cannot be nested in itself")
+        self.parents[name] = parent
+        self._structure_changed()
+
+    def add_habit(self, name: str, habit_uuid: str):
+        self.members[name].add(habit_uuid)
+        self._structure_changed()
+
+    def remove_habit(self, name: str, habit_uuid: str):
+        self.members[name].discard(habit_uuid)
+        self._structure_changed()
+
+    def habit_removed(self, habit_uuid: str):
+        """Drop a deleted habit from its groups"""
+        for members in self.members.values():
+            members.discard(habit_uuid)
+        if self._containing is not None and habit_uuid in self._containing:
+            self._apply(habit_uuid, self._metrics.pop(habit_uuid), None)
+            del self._containing[habit_uuid]
+
+    def path(self, name: str) -> list[str]:
+        """Return a group and the groups it is nested in, outermost first"""
+        path = [name]
+        while (parent := self.parents[path[-1]]) is not None:
+            path.append(parent)
+        return path[::-1]
+
+    def children(self, name: str | None) -> list[str]:
+        """Return the groups directly nested in a group, or the top-level ones for None"""
+        return sorted(
+            (child for child, parent in self.parents.items() if parent == name),
+            key=str.casefold,
+        )
+
+    def tree(self, name: str = None, depth: int = 0) -> list[tuple[str, int]]:
+        """Return the groups nested in a group (all groups for None) depth first, with their depth"""
+        result = []
+        for child in self.children(name):
+            result.append((child, depth))
+            result.extend(self.tree(child, depth + 1))
+        return result
+
+    def groups_of(self, habit_uuid: str) -> list[str]:
+        """Return the groups a habit is a direct member of"""
+        return sorted(
+            (name for name, members in self.members.items() if habit_uuid in members),
+            key=str.casefold,
+        )
+
+    def habit_uuids(self, name: str) -> set[str]:
+        """Return the UUIDs of the habits in a group, nested groups included"""
+        uuids = set(self.members[name])
+        for child in self.children(name):
+            uuids |= self.habit_uuids(child)
+        return uuids & self.storage.habits.keys()
+
+    def aggregate(self, name: str) -> dict:
+        """Return a group's analytics in the analytics time frame, like GroupAnalytics
+
+        Returns:
+            dict: {"habits", "highest_streak", "completed_periods", "total_periods",
+                "average_completion_rate"}
+        """
+        self._ensure_totals()
+        totals = self._totals[name]
+        return {
+            "habits": totals["habits"],
+            "highest_streak": max(totals["streaks"], default=0),
+            "completed_periods": totals["completed_periods"],
+            "total_periods": totals["total_periods"],
+            "average_completion_rate": (
+                totals["rate_sum"] / totals["habits"] if totals["habits"] else 0.0
+            ),
+        }
+
+    def habit_changed(self, habit: "Habit"):
+        """Update the totals of the groups containing a habit after it changed"""
+        if self._containing is None or habit.uuid not in self._containing:
+            return
+        if self._frame != self._current_frame():
+            self._containing = None  # rebuilt for the new time frame when next needed
+            return
+        metrics = self._habit_metrics(habit)
+        self._apply(habit.uuid, self._metrics[habit.uuid], metrics)
+        self._metrics[habit.uuid] = metrics
+
+    def _structure_changed(self):
+        self._containing = None
+
+    def _current_frame(self) -> tuple:
+        from . import analytics
+
+        return (analytics.SINCE, analytics.UNTIL)
+
+    def _ensure_totals(self):
+        """Rebuild the totals if groups, memberships, habits or the time frame changed"""
+        if (
+            self._containing is not None
+            and self._frame == self._current_frame()
+            and self._aggregated_habits is self.storage.habits
+        ):
+            return
+        self._frame = self._current_frame()
+        self._aggregated_habits = self.storage.habits
+        self._containing = {}
+        for name, members in self.members.items():
+            path = self.path(name)
+            for habit_uuid in members & self.storage.habits.keys():
+                self._containing.setdefault(habit_uuid, set()).update(path)
+
+        self._totals = {name: self._empty_totals() for name in self.parents}
+        self._metrics = {}
+        for habit_uuid in self._containing:
+            metrics = self._habit_metrics(self.storage.habits[habit_uuid])
+            self._metrics[habit_uuid] = metrics
+            self._apply(habit_uuid, None, metrics)
+
+    def _apply(self, habit_uuid: str, old: dict | None, new: dict | None):
+        """Replace a habit's old metrics by its new ones in the totals of its groups"""
+        for name in self._containing[habit_uuid]:
+            totals = self._totals[name]
+            for metrics, sign in ((old, -1), (new, 1)):
+                if metrics is None:
+                    continue
+                totals["habits"] += sign
+                totals["completed_periods"] += sign * metrics["completed_periods"]
+                totals["total_periods"] += sign * metrics["total_periods"]
+                totals["rate_sum"] += sign * metrics["completion_rate"]
+                totals["streaks"][metrics["highest_streak"]] += sign
+                if not totals["streaks"][metrics["highest_streak"]]:
+                    del totals["streaks"][metrics["highest_streak"]]
+
+    @staticmethod
+    def _empty_totals() -> dict:
+        return {
+            "habits": 0,
+            "completed_periods": 0,
+            "total_periods": 0,
+            "rate_sum": 0.0,
+            "streaks": Counter(),  # habits per highest streak, for the maximum after changes
+        }
+
+    @staticmethod
+    def _habit_metrics(habit: "Habit") -> dict:
+        from . import analytics
+
+        return analytics.HabitAnalytics(habit).summary()
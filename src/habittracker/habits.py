@@ -1,12 +1,11 @@
-import json
+import bisect
+import math
 import typing
-import uuid
 from datetime import datetime, time, timedelta
-from importlib import resources
 
-from dateutil.relativedelta import relativedelta
-
-from . import db_handler
+from . import db_handler, periods_calendar, snapshot
+from .groups import HabitGroups
+from .search import HabitSearchIndex
 
 
 class Period(typing.TypedDict):
@@ -19,11 +18,18 @@ class Periodicity(typing.TypedDict):
     unit: typing.Literal["days", "weeks", "months", "years"]
 
 
+def _relativedelta(**kwargs):
+    """Return a relativedelta, importing dateutil only once months or years are used"""
+    from dateutil.relativedelta import relativedelta
+
+    return relativedelta(**kwargs)
+
+
 PERIODICITY_UNITS = {
     "days": lambda amount=1: timedelta(days=amount),
     "weeks": lambda amount=1: timedelta(weeks=amount),
-    "months": lambda amount=1: relativedelta(months=amount),
-    "years": lambda amount=1: relativedelta(years=amount),
+    "months": lambda amount=1: _relativedelta(months=amount),
+    "years": lambda amount=1: _relativedelta(years=amount),
 }
 
 
@@ -36,13 +42,16 @@ class Habit:
         name (str): name of the habit
         periodicity (Periodicity): length of a period for the habit
         notes (str): optional notes for the habit
+        target (int): number of completions that complete a period
         start_date (datetime): date the habit was started; start of the first period
 
-        completed (bool): whether the habit was completed in this period
+        completed (bool): whether the habit reached its target in this period
         streak (int): number of consecutive periods the habit was completed up to now
 
         periods (list[Period]): historical periods based on periodicity (persisted)
         completions (list[datetime]): completion timestamps (persisted)
+
+        version (int): number of changes to the details or completions, for cache validation
     """
 
     def __init__(
@@ -51,12 +60,14 @@ class Habit:
         name: str = "",
         periodicity: Periodicity = {"amount": 1, "unit": "days"},
         notes: str = "",
+        target: int = 1,
     ):
 
         self.uuid: str = habit_uuid
         self.name: str = name
         self.periodicity: Periodicity = periodicity
         self.notes: str = notes
+        self.target: int = target
 
         self.start_date: datetime = datetime.combine(
             now().date(), time.min
@@ -67,32 +78,82 @@ class Habit:
 
         self.completions: list[datetime] = []
 
+        self.storage: HabitStorage | None = None  # set when added to a storage
+        self.version: int = 0  # bumped whenever details or completions change
+        self._completions_sorted: list[datetime] = []
+        self._completions_key: tuple | None = None  # completions the sorted copy was made of
+        self._days: tuple[int, int] = (0, 0)
+        self._days_key: tuple | None = None  # completions the day bitmap was made of
+
     def update(self, attributes: dict):
         """Update the habit's details"""
+        previous = {
+            "name": self.name,
+            "periodicity": self.periodicity,
+            "notes": self.notes,
+        }
         self.name = attributes.get("name") or self.name
         self.periodicity = attributes.get("periodicity") or self.periodicity
         self.notes = attributes.get("notes") or self.notes
+        self.target = attributes.get("target") or self.target
+        self._changed()
+        if self.storage is not None:
+            self.storage.habit_updated(self, previous)
 
     def toggle_completed(self):
-        """Mark the habit complete/incomplete for the current period"""
+        """Add a completion in the current period, or remove them all once complete"""
         if not self.completed:
-            self.completions.append(now())  # add completion
+            self.increment()
         else:
-            period = self.get_period()
-            self.completions = [
-                completion
-                for completion in self.completions
-                if not (period["start"] <= completion < period["end"])
-            ]  # remove completions in current period
+            self.clear_period()
+
+    def clear_period(self):
+        """Remove every completion of the current period"""
+        start, end = self._period_slice()
+        completions = self._sorted_completions()
+        del completions[start:end]
+        self.completions = list(completions)
+        self._changed(keep_sorted=True)
+
+    def complete_period(self):
+        """Add the completions still missing to reach the target in the current period
+
+        They are added at once, a microsecond apart so that each one stays distinct.
+        """
+        missing = self.target - self.get_count()
+        if missing <= 0:
+            return
+        moment = now()
+        completions = self._sorted_completions()
+        for i in range(missing):
+            completion = moment + timedelta(microseconds=i)
+            self.completions.append(completion)
+            bisect.insort(completions, completion)
+        self._changed(keep_sorted=True)
+
+    def increment(self):
+        """Add a completion now"""
+        completion = now()
+        completions = self._sorted_completions()
+        self.completions.append(completion)
+        bisect.insort(completions, completion)
+        self._changed(keep_sorted=True)
+
+    def decrement(self):
+        """Remove the latest completion of the current period, if any"""
+        start, end = self._period_slice()
+        if end > start:
+            self.completions.remove(self._sorted_completions().pop(end - 1))
+            self._changed(keep_sorted=True)
+
+    def get_count(self, period: Period = None) -> int:
+        """Return the number of completions in the given period"""
+        start, end = self._period_slice(period)
+        return end - start
 
     def get_completed(self, period: Period = None) -> bool:
-        """Return whether the habit was completed in the given period"""
-        if period is None:
-            period = self.get_period()
-        return any(
-            period["start"] <= completion < period["end"]
-            for completion in self.completions
-        )  # any completion in this period
+        """Return whether the habit reached its target in the given period"""
+        return self.get_count(period) >= self.target
 
     def get_streak(self, until: datetime = None) -> int:
         """Return the streak up to a given datetime"""
@@ -120,18 +181,83 @@ class Habit:
         """Return the period that contains the given datetime"""
         if at is None:
             at = now()
-        while self.periods and self.periods[-1]["end"] <= at:
+        if not self.periods:  # none stored yet, seeded like a new habit's
             self.periods.append(self._next_period())
+        if self.periods[-1]["end"] <= at:
+            self._extend_periods(at)
         for period in self.periods:
             if period["start"] <= at < period["end"]:
                 return period
         raise RuntimeError("No period covers the given datetime")
 
-    def _periodicity_delta(self) -> timedelta | relativedelta:
-        """Return a timedelta or relativedelta of the habit's periodicity"""
-        amount = self.periodicity["amount"]
-        unit = self.periodicity["unit"]
-        return PERIODICITY_UNITS[unit](amount)
+    def _period_slice(self, period: Period = None) -> tuple[int, int]:
+        """Return the slice of the sorted completions that falls in a period, the current one by default"""
+        if period is None:
+            period = self.get_period()
+        completions = self._sorted_completions()
+        return bisect.bisect_left(completions, period["start"]), bisect.bisect_left(
+            completions, period["end"]
+        )
+
+    def _sorted_completions(self) -> list[datetime]:
+        """Return the completions in order, only sorting them again after they changed"""
+        key = (id(self.completions), len(self.completions), self.version)
+        if key != self._completions_key:
+            self._completions_sorted = sorted(self.completions)
+            self._completions_key = key
+        return self._completions_sorted
+
+    def completion_days(self) -> tuple[int, int]:
+        """Return the days with at least one completion as a bitmap
+
+        Built in one pass over the sorted completions, and cached until they change.
+
+        Returns:
+            tuple[int, int]: ordinal of the first completion's day, and a bitmap
+                whose bit i is set when the habit was completed i days after it
+        """
+        key = (id(self.completions), len(self.completions), self.version)
+        if key != self._days_key:
+            completions = self._sorted_completions()
+            first = completions[0].toordinal() if completions else 0
+            days = bytearray((completions[-1].toordinal() - first) // 8 + 1 if completions else 0)
+            for completion in completions:
+                i = completion.toordinal() - first
+                days[i >> 3] |= 1 << (i & 7)
+            self._days = (first, int.from_bytes(days, "little"))
+            self._days_key = key
+        return self._days
+
+    def snapshot(self) -> "Habit":
+        """Return a detached copy of the habit to compute on from another thread
+
+        The periods are brought up to date and the completions sorted first, on
+        the calling thread, and the copy shares no mutable state with the habit,
+        so reading it cannot race with changes made to the habit meanwhile.
+        """
+        self.get_period()
+        self._sorted_completions()
+        copy = object.__new__(Habit)
+        copy.__dict__.update(self.__dict__)
+        copy.storage = None
+        copy.periods = list(self.periods)
+        copy.completions = list(self.completions)
+        copy._completions_sorted = list(self._completions_sorted)
+        copy._completions_key = (id(copy.completions), len(copy.completions), copy.version)
+        copy._days_key = None
+        return copy
+
+    def _changed(self, keep_sorted: bool = False):
+        """Record that the habit's details or completions changed
+
+        Args:
+            keep_sorted (bool): the change was applied to the sorted completions too
+        """
+        self.version += 1
+        if keep_sorted:
+            self._completions_key = (id(self.completions), len(self.completions), self.version)
+        if self.storage is not None:
+            self.storage.habit_changed(self)
 
     def _next_period(self) -> Period:
         """Return the next period based on the last period and periodicity"""
@@ -139,9 +265,50 @@ class Habit:
             start = self.periods[-1]["end"]
         else:
             start = self.start_date
-        end = start + self._periodicity_delta()
+        end = periods_calendar.boundaries_until(
+            start, self.periodicity["amount"], self.periodicity["unit"], start, self.start_date
+        )[0]
         return {"start": start, "end": end}
 
+    def _extend_periods(self, at: datetime):
+        """Append the periods up to the one containing the given datetime at once"""
+        start = self.periods[-1]["end"]
+        for end in periods_calendar.boundaries_until(
+            start, self.periodicity["amount"], self.periodicity["unit"], at, self.start_date
+        ):
+            self.periods.append({"start": start, "end": end})
+            start = end
+
+    def extend_periods_back(self, at: datetime) -> int:
+        """Prepend the periods back to the one containing the given datetime
+
+        The start date moves back to the start of the new first period, e.g.
+        when older history is imported.
+
+        Returns:
+            int: number of periods prepended
+        """
+        if at >= self.start_date:
+            return 0
+        amount, unit = self.periodicity["amount"], self.periodicity["unit"]
+
+        # smallest k whose boundary k periods before the start is at or before the datetime
+        low, high = 0, 1
+        while periods_calendar.boundary(self.start_date, amount, unit, -high) > at:
+            low, high = high, high * 2
+        while high - low > 1:
+            middle = (low + high) // 2
+            if periods_calendar.boundary(self.start_date, amount, unit, -middle) > at:
+                low = middle
+            else:
+                high = middle
+
+        starts = periods_calendar.boundaries(self.start_date, amount, unit, high, first=-high)
+        ends = starts[1:] + [self.start_date]
+        self.periods[:0] = [{"start": start, "end": end} for start, end in zip(starts, ends)]
+        self.start_date = starts[0]
+        return high
+
     @property
     def completed(self) -> bool:
         return self.get_completed()
@@ -154,41 +321,250 @@ class Habit:
 class HabitStorage:
     def __init__(self):
         self.habits: dict[str, Habit] = {}
+        self.version: int = 0  # bumped whenever habits are added or removed
+        self.revision: int = 0  # bumped whenever anything about any habit changes
+        self._search_index: HabitSearchIndex | None = None  # built on first search
+        self._indexed_habits: dict[str, Habit] | None = None
+        self._search_saved: bool = True  # names and notes match the database's FTS index
+
+        # secondary indexes, built on first structured query
+        self._positions: dict[str, int] | None = None  # insertion order of each habit
+        self._next_position: int = 0
+        self._by_periodicity: dict[str, dict[int, set[str]]] = {}  # unit -> amount -> uuids
+        self._positioned_habits: dict[str, Habit] | None = None
+
+        # current period end of every habit, built on first get_due
+        self._due: list[tuple[datetime, int, str]] | None = None  # sorted (end, -streak, uuid)
+        self._due_entries: dict[str, tuple[tuple, bool]] = {}  # uuid -> (entry, completed)
+        self._due_habits: dict[str, Habit] | None = None
+
+        self.groups: HabitGroups = HabitGroups(self)
 
     def get_habit(self, habit_uuid: str) -> Habit | None:
         """Get a habit by UUID"""
         return self.habits.get(habit_uuid)
 
-    def get_habits(self, filter: typing.Callable = None) -> dict[str, Habit]:
-        """Get all habits that match a given filter"""
-        if filter is None:
-            return dict(self.habits)
-        return {uuid: habit for uuid, habit in self.habits.items() if filter(habit)}
+    def get_habits(
+        self, filter: typing.Callable = None, unit: str = None, amount: int = None
+    ) -> dict[str, Habit]:
+        """Get all habits that match a given periodicity and filter
+
+        Args:
+            filter (Callable): predicate, only run on habits matching the periodicity
+            unit (str): periodicity unit to match, looked up in an index
+            amount (int): periodicity amount to match, looked up in an index
+        """
+        if unit is None and amount is None:
+            if filter is None:
+                return dict(self.habits)
+            return {uuid: habit for uuid, habit in self.habits.items() if filter(habit)}
+
+        positions = self._get_positions()
+        matches = sorted(self._periodicity_matches(unit, amount), key=positions.get)
+        return {
+            habit_uuid: self.habits[habit_uuid]
+            for habit_uuid in matches
+            if filter is None or filter(self.habits[habit_uuid])
+        }
+
+    def search(self, query: str, within=None) -> set[str]:
+        """Return the UUIDs of habits whose name or notes contain the query
+
+        Args:
+            query (str): case-insensitive substring to search for
+            within (Iterable[str]): optional UUIDs of a previous search to narrow down
+        """
+        if db_handler.SEARCH_INDEX and within is None and self._search_saved:
+            return set(db_handler.search_habits(query)) & self.habits.keys()
+        return self._get_search_index().search(query, within)
 
     def create_habit(self, attributes: dict):
         """Create a new habit with a new UUID"""
-        habit_uuid = attributes.get("uuid") or str(uuid.uuid4())
-        self.habits[habit_uuid] = Habit(
+        habit_uuid = attributes.get("uuid")
+        if not habit_uuid:
+            import uuid
+
+            habit_uuid = str(uuid.uuid4())
+        habit = Habit(
             habit_uuid,
             attributes.get("name"),
             attributes.get("periodicity"),
             attributes.get("notes"),
+            attributes.get("target") or 1,
         )
+        habit.storage = self
+        self.habits[habit_uuid] = habit
+        self.version += 1
+        self.revision += 1
+        self._search_saved = False
+        if self._search_index is not None:
+            self._search_index.add(habit_uuid, habit.name, habit.notes)
+        if self._positions is not None:
+            self._add_position(habit_uuid, habit.periodicity)
+        if self._due is not None:
+            self._index_due(habit)
 
     def delete_habit(self, habit_uuid: str):
         """Delete a habit by UUID"""
-        self.habits.pop(habit_uuid, None)
+        habit = self.habits.pop(habit_uuid, None)
+        if habit is None:
+            return
+        habit.storage = None
+        self.version += 1
+        self.revision += 1
+        if self._search_index is not None:
+            self._search_index.remove(habit_uuid)
+        if self._positions is not None:
+            self._positions.pop(habit_uuid, None)
+            self._unindex_periodicity(habit_uuid, habit.periodicity)
+        if habit_uuid in self._due_entries:
+            self._unindex_due(habit_uuid)
+        self.groups.habit_removed(habit_uuid)
+
+    def get_due(self, at: datetime = None) -> list[tuple[Habit, datetime, int]]:
+        """Return the habits not completed in their current period, the soonest to end first
+
+        Each habit's current period end, completion and streak are kept in a
+        sorted index. A habit is only looked at again when it changes or when
+        its period ends, not every time this is called.
+
+        Returns:
+            list[tuple[Habit, datetime, int]]: each habit, the end of its current
+                period and the streak lost if it is not completed by then
+        """
+        if at is None:
+            at = now()
+        if (
+            self._due is None
+            or self._due_habits is not self.habits
+            or len(self._due_entries) != len(self.habits)
+        ):
+            self._due = []
+            self._due_entries = {}
+            self._due_habits = self.habits
+            for habit in self.habits.values():
+                self._index_due(habit, at)
+        else:
+            ended = bisect.bisect_left(self._due, (at, math.inf))  # periods ending by now
+            rolled = self._due[:ended]
+            del self._due[:ended]
+            for _, _, habit_uuid in rolled:
+                del self._due_entries[habit_uuid]
+                self._index_due(self.habits[habit_uuid], at)
+        return [
+            (self.habits[habit_uuid], end, -negative_streak)
+            for end, negative_streak, habit_uuid in self._due
+            if not self._due_entries[habit_uuid][1]
+        ]
+
+    def habit_changed(self, habit: Habit):
+        """Record that a habit's details or completions changed"""
+        self.revision += 1
+        if habit.uuid in self._due_entries:
+            self._unindex_due(habit.uuid)
+            self._index_due(habit)
+        self.groups.habit_changed(habit)
+
+    def habit_updated(self, habit: Habit, previous: dict):
+        """Keep indexes in sync after a habit's details changed"""
+        if habit.name != previous["name"] or habit.notes != previous["notes"]:
+            self._search_saved = False
+            if self._search_index is not None:
+                self._search_index.add(habit.uuid, habit.name, habit.notes)
+        if self._positions is not None and habit.periodicity != previous["periodicity"]:
+            self._unindex_periodicity(habit.uuid, previous["periodicity"])
+            self._index_periodicity(habit.uuid, habit.periodicity)
+
+    def _get_search_index(self) -> HabitSearchIndex:
+        """Return the search index, rebuilding it if the habits were changed directly"""
+        if (
+            self._search_index is None
+            or self._indexed_habits is not self.habits
+            or len(self._search_index.texts) != len(self.habits)
+        ):
+            self._search_index = HabitSearchIndex()
+            self._indexed_habits = self.habits
+            for habit_uuid, habit in self.habits.items():
+                self._search_index.add(habit_uuid, habit.name, habit.notes)
+        return self._search_index
+
+    def _get_positions(self) -> dict[str, int]:
+        """Return habit positions, rebuilding secondary indexes if the habits were changed directly"""
+        if (
+            self._positions is None
+            or self._positioned_habits is not self.habits
+            or len(self._positions) != len(self.habits)
+        ):
+            self._positions = {}
+            self._next_position = 0
+            self._by_periodicity = {}
+            self._positioned_habits = self.habits
+            for habit_uuid, habit in self.habits.items():
+                self._add_position(habit_uuid, habit.periodicity)
+        return self._positions
+
+    def _add_position(self, habit_uuid: str, periodicity: Periodicity):
+        """Append a habit to the secondary indexes"""
+        self._positions[habit_uuid] = self._next_position
+        self._next_position += 1
+        self._index_periodicity(habit_uuid, periodicity)
+
+    def _index_due(self, habit: Habit, at: datetime = None):
+        """Insert a habit's current period end into the due index"""
+        period = habit.get_period(at)
+        entry = (period["end"], -habit.get_streak(at), habit.uuid)  # longer streaks first
+        bisect.insort(self._due, entry)
+        self._due_entries[habit.uuid] = (entry, habit.get_completed(period))
+
+    def _unindex_due(self, habit_uuid: str):
+        entry, _ = self._due_entries.pop(habit_uuid)
+        del self._due[bisect.bisect_left(self._due, entry)]
+
+    def _index_periodicity(self, habit_uuid: str, periodicity: Periodicity):
+        amounts = self._by_periodicity.setdefault(periodicity["unit"], {})
+        amounts.setdefault(periodicity["amount"], set()).add(habit_uuid)
+
+    def _unindex_periodicity(self, habit_uuid: str, periodicity: Periodicity):
+        amounts = self._by_periodicity.get(periodicity["unit"], {})
+        amounts.get(periodicity["amount"], set()).discard(habit_uuid)
+
+    def _periodicity_matches(self, unit: str = None, amount: int = None) -> set[str]:
+        """Return the UUIDs of habits with the given periodicity unit and/or amount"""
+        units = [unit] if unit is not None else list(self._by_periodicity.keys())
+        matches = set()
+        for unit in units:
+            amounts = self._by_periodicity.get(unit, {})
+            if amount is not None:
+                matches |= amounts.get(amount, set())
+            else:
+                for uuids in amounts.values():
+                    matches |= uuids
+        return matches
 
 
 HABITS: HabitStorage = HabitStorage()
+SNAPSHOT: bool = True  # cache full loads in a snapshot next to the database
 
 
-def load_habits():
-    """Load all habits from database"""
+def load_habits(habit_uuids: list[str] = None, recent: bool = False):
+    """Load habits from database
+
+    Args:
+        habit_uuids (list[str]): only load these habits instead of all of them
+        recent (bool): only load the latest period and its completions, enough for the current state
+    """
     global HABITS
     HABITS = HabitStorage()
 
-    raw = db_handler.load_all()
+    # full loads are served from the snapshot while the database is unchanged
+    key = None
+    if SNAPSHOT and habit_uuids is None and not recent:
+        key = snapshot.database_key()
+    raw = snapshot.read(key) if key is not None else None
+    if raw is None:
+        raw = db_handler.load_all(habit_uuids, recent)
+        if key is not None:
+            snapshot.write(key, raw)
 
     for habit_uuid, data in raw.items():
         habit = data["habit"]
@@ -201,49 +577,101 @@ def load_habits():
                 "unit": habit["periodicity_unit"],
             },
             "notes": habit["notes"],
+            "target": habit.get("target", 1),
         }
         HABITS.create_habit(attributes)
 
         habit_obj = HABITS.get_habit(habit_uuid)
         habit_obj.start_date = datetime.fromisoformat(habit["start_date"])
-        habit_obj.periods = [
-            {
-                "start": datetime.fromisoformat(period["start"]),
-                "end": datetime.fromisoformat(period["end"]),
-            }
-            for period in data["periods"]
-        ]
+        habit_obj.periods = _parse_periods(data["periods"])
         habit_obj.completions = [
             datetime.fromisoformat(completion) for completion in data["completions"]
         ]
 
+    HABITS.groups.load(*db_handler.load_groups())
+    HABITS._search_saved = True
+
+
+def _parse_periods(periods: list[dict]) -> list[Period]:
+    """Parse stored periods, sharing the boundary of contiguous periods"""
+    parsed = []
+    end_text = end = None
+    for period in periods:
+        if period["start"] == end_text:  # starts where the previous period ended
+            start = end
+        else:
+            start = datetime.fromisoformat(period["start"])
+        end_text = period["end"]
+        end = datetime.fromisoformat(end_text)
+        parsed.append({"start": start, "end": end})
+    return parsed
+
 
 def save_habits():
     """Save all habits to database"""
-    data = {}
-
-    for habit_uuid, habit in HABITS.get_habits().items():
-        data[habit_uuid] = {
-            "habit": {
-                "name": habit.name,
-                "periodicity_amount": habit.periodicity["amount"],
-                "periodicity_unit": habit.periodicity["unit"],
-                "notes": habit.notes,
-                "start_date": habit.start_date.isoformat(),
-            },
-            "periods": [
-                {
-                    "start": period["start"].isoformat(),
-                    "end": period["end"].isoformat(),
-                }
-                for period in habit.periods
-            ],
-            "completions": [
-                completion.isoformat() for completion in habit.completions
-            ],
-        }
+    data = {
+        habit_uuid: _habit_data(habit)
+        for habit_uuid, habit in HABITS.get_habits().items()
+    }
 
     db_handler.save_all(data)
+    HABITS._search_saved = True
+    db_handler.save_groups(
+        HABITS.groups.parents,
+        {name: members & data.keys() for name, members in HABITS.groups.members.items()},
+    )
+
+    if SNAPSHOT:
+        key = snapshot.database_key()
+        if key is not None:
+            snapshot.write(key, data)
+
+
+def save_batch(
+    habit_uuids: typing.Iterable[str], deleted: typing.Iterable[str] = (), groups: bool = False
+):
+    """Save the changes of a batch action in a single transaction
+
+    Only the given habits are written, unlike save_habits.
+
+    Args:
+        habit_uuids (Iterable[str]): habits that changed
+        deleted (Iterable[str]): habits that were deleted
+        groups (bool): whether groups or memberships changed
+    """
+    data = {habit_uuid: _habit_data(HABITS.habits[habit_uuid]) for habit_uuid in habit_uuids}
+    group_data = None
+    if groups:
+        group_data = (
+            HABITS.groups.parents,
+            {
+                name: members & HABITS.habits.keys()
+                for name, members in HABITS.groups.members.items()
+            },
+        )
+    db_handler.save_batch(data, list(deleted), group_data)
+
+
+def _habit_data(habit: Habit) -> dict:
+    """Return a habit in the db_handler.save_all format"""
+    return {
+        "habit": {
+            "name": habit.name,
+            "periodicity_amount": habit.periodicity["amount"],
+            "periodicity_unit": habit.periodicity["unit"],
+            "notes": habit.notes,
+            "target": habit.target,
+            "start_date": habit.start_date.isoformat(),
+        },
+        "periods": [
+            {
+                "start": period["start"].isoformat(),
+                "end": period["end"].isoformat(),
+            }
+            for period in habit.periods
+        ],
+        "completions": [completion.isoformat() for completion in habit.completions],
+    }
 
 
 def now():
@@ -258,6 +686,9 @@ def first_start():
 
 
 def seed_sample_data(file_path: str = "sample_data.json"):
+    import json
+    from importlib import resources
+
     file_path = resources.files("habittracker.data").joinpath(file_path)
     with open(file_path, "r") as f:
         default_habits = json.load(f)
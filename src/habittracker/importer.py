@@ -0,0 +1,269 @@
+import csv
+import gzip
+import itertools
+import json
+import typing
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+from . import db_handler, habits
+
+CHUNK_SIZE = 50_000  # rows validated, merged and written at a time
+MAX_ERRORS = 20  # invalid rows described in the report, the others are only counted
+FORMATS = ("csv", "jsonl")
+
+
+def detect_format(path: str) -> str:
+    """Return the format of a file from its extension, e.g. "csv" for history.csv.gz"""
+    name = path.lower().removesuffix(".gz")
+    for fmt in FORMATS:
+        if name.endswith(f".{fmt}"):
+            return fmt
+    raise ValueError(f"Cannot tell the format of '{path}', use one of: {', '.join(FORMATS)}")
+
+
+def read_rows(file: typing.TextIO, fmt: str) -> typing.Iterator[tuple[int, tuple | str]]:
+    """Stream the completion records of a CSV or JSONL file
+
+    CSV files have a header with (at least) "habit" and "completed_at"
+    columns; JSONL files have one {"habit", "completed_at"} object per line.
+    "habit" is a habit's name or UUID, "completed_at" an ISO 8601 date or datetime.
+
+    Yields:
+        tuple[int, tuple | str]: line number, and (habit, completed_at) or the
+            reason the record cannot be read
+    """
+    if fmt == "csv":
+        reader = csv.reader(file)
+        header = next(reader, [])
+        try:
+            habit_column, completed_column = header.index("habit"), header.index("completed_at")
+        except ValueError:
+            raise ValueError("CSV header needs 'habit' and 'completed_at' columns") from None
+        width = max(habit_column, completed_column)
+        for row in reader:
+            if len(row) <= width:
+                if row:
+                    yield reader.line_num, "missing columns"
+                continue
+            yield reader.line_num, (row[habit_column], row[completed_column])
+        return
+
+    for line_no, line in enumerate(file, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield line_no, "not valid JSON"
+            continue
+        if not isinstance(record, dict):
+            yield line_no, "not a JSON object"
+            continue
+        yield line_no, (record.get("habit"), record.get("completed_at"))
+
+
+def import_file(
+    path: str, fmt: str = None, create: habits.Periodicity = None, dry_run: bool = False
+) -> dict:
+    """Import completions from a CSV or JSONL file, optionally gzipped, into the loaded habits
+
+    The file is read and written in chunks of CHUNK_SIZE rows within a single
+    transaction, so memory use does not grow with its size and nothing is
+    written if the import fails. Completions a habit already has, or that
+    appear twice, are skipped. Each habit's periods are extended to cover its
+    new completions, back past its start date if needed.
+
+    Args:
+        path (str): file to import
+        fmt (str): "csv" or "jsonl", guessed from the extension by default
+        create (Periodicity): periodicity of the habits to create for unknown
+            names; rows of unknown habits are invalid by default
+        dry_run (bool): only validate and count, without changing the loaded
+            habits or writing anything
+
+    Returns:
+        dict: {"rows", "imported", "duplicates", "invalid", "created", "errors"}
+            where "created" lists the names of new habits and "errors" describes
+            the first MAX_ERRORS invalid rows
+    """
+    fmt = fmt or detect_format(path)
+    report = {"rows": 0, "imported": 0, "duplicates": 0, "invalid": 0, "created": [], "errors": []}
+    opener = gzip.open if path.lower().endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8", newline="") as file:
+        batches = _batches(read_rows(file, fmt), create, report, dry_run)
+        if dry_run:
+            for _ in batches:
+                pass
+        else:
+            db_handler.import_history(batches)
+    return report
+
+
+def _batches(
+    rows: typing.Iterator[tuple[int, tuple | str]],
+    create: habits.Periodicity | None,
+    report: dict,
+    dry_run: bool = False,
+) -> typing.Iterator[dict]:
+    """Merge the rows into the habits a chunk at a time and yield the rows to write
+
+    A dry run merges into sorted copies of the completions instead, and only
+    pretends to create habits, so that the loaded habits are left untouched.
+    """
+    storage = habits.HABITS
+    now = habits.now()
+    by_name: dict[str, list[str]] = {}
+    for habit in storage.get_habits().values():
+        by_name.setdefault(habit.name.casefold(), []).append(habit.uuid)
+    saved_periods: dict[str, int] = {}  # periods already saved of each habit with new completions
+    merged: dict[str, list[datetime]] = {}  # sorted completions of each habit with new completions
+
+    resolved: dict[str, str] = {}  # habit names and UUIDs seen so far -> habit UUID
+    while chunk := list(itertools.islice(rows, CHUNK_SIZE)):
+        new_completions: dict[str, list[datetime]] = {}
+        created = {}
+        report["rows"] += len(chunk)
+        for line_no, fields in chunk:
+            try:
+                if isinstance(fields, str):
+                    raise ValueError(fields)
+                key, text = fields
+                if not key or not isinstance(key, str):
+                    raise ValueError("no habit")
+                completed_at = _parse_time(text, now)
+                habit_uuid = resolved.get(key) or _resolve(key, storage, by_name)
+            except KeyError:
+                if create is None:
+                    report["invalid"] += 1
+                    _error(report, line_no, f"no habit named '{key}'")
+                    continue
+                if dry_run:
+                    habit_uuid = f"new:{key.casefold()}"
+                    merged[habit_uuid] = []
+                else:
+                    habit_uuid = _create(storage, key, create)
+                    created[habit_uuid] = habits._habit_data(storage.habits[habit_uuid])
+                by_name[key.casefold()] = [habit_uuid]
+                report["created"].append(key)
+            except ValueError as e:
+                report["invalid"] += 1
+                _error(report, line_no, str(e))
+                continue
+            resolved[key] = habit_uuid
+            new_completions.setdefault(habit_uuid, []).append(completed_at)
+
+        completion_rows = []
+        for habit_uuid, times in new_completions.items():
+            if habit_uuid not in merged:
+                habit = storage.habits[habit_uuid]
+                if dry_run:
+                    merged[habit_uuid] = sorted(habit.completions)
+                else:
+                    saved_periods[habit_uuid] = len(habit.periods)
+                    habit.completions.sort()
+                    merged[habit_uuid] = habit.completions
+            completions = merged[habit_uuid]
+            added = _new_completions(completions, times)
+            report["duplicates"] += len(times) - len(added)
+            report["imported"] += len(added)
+            _merge(completions, added)
+            completion_rows.extend((habit_uuid, completed_at.isoformat()) for completed_at in added)
+        yield {"habits": created, "completions": completion_rows}
+
+    if dry_run:
+        return
+    period_rows, start_dates = [], []
+
+    for habit_uuid, saved in saved_periods.items():
+        habit = storage.habits[habit_uuid]
+        if habit.completions:
+            prepended = habit.extend_periods_back(habit.completions[0])
+            habit.get_period(max(habit.completions[-1], now))
+            if prepended:
+                start_dates.append((habit.start_date.isoformat(), habit_uuid))
+            new_periods = habit.periods[:prepended] + habit.periods[prepended + saved :]
+            period_rows.extend(
+                (habit_uuid, period["start"].isoformat(), period["end"].isoformat())
+                for period in new_periods
+            )
+        habit._changed()
+    yield {"periods": period_rows, "start_dates": start_dates}
+
+
+def _parse_time(text: str, now: datetime) -> datetime:
+    """Return a record's completion time as a local datetime"""
+    if not text or not isinstance(text, str):
+        raise ValueError("no completed_at")
+    try:
+        completed_at = datetime.fromisoformat(text)
+    except ValueError:
+        raise ValueError(f"invalid completed_at '{text}'") from None
+    if completed_at.tzinfo is not None:
+        completed_at = completed_at.astimezone().replace(tzinfo=None)  # local time, like the app
+    if completed_at > now:
+        raise ValueError(f"completed_at '{text}' is in the future")
+    return completed_at
+
+
+def _resolve(key: str, storage: habits.HabitStorage, by_name: dict) -> str:
+    """Return the UUID of the habit a record's name or UUID refers to
+
+    Raises:
+        KeyError: no habit has the name or UUID
+        ValueError: the name is ambiguous
+    """
+    if key in storage.habits:
+        return key
+    matches = by_name.get(key.casefold())
+    if not matches:
+        raise KeyError(key)
+    if len(matches) > 1:
+        raise ValueError(f"several habits are named '{key}', use a UUID")
+    return matches[0]
+
+
+def _create(storage: habits.HabitStorage, name: str, periodicity: habits.Periodicity) -> str:
+    import uuid
+
+    habit_uuid = str(uuid.uuid4())
+    storage.create_habit(
+        {"uuid": habit_uuid, "name": name, "periodicity": dict(periodicity), "notes": ""}
+    )
+    return habit_uuid
+
+
+def _new_completions(completions: list[datetime], times: list[datetime]) -> list[datetime]:
+    """Return the times, sorted, that are neither in the sorted completions nor repeated"""
+    times = sorted(set(times))
+    if not completions:
+        return times
+    # only the times up to the last completion can be in the completions already
+    overlap = bisect_right(times, completions[-1])
+    added = []
+    for completed_at in times[:overlap]:
+        i = bisect_left(completions, completed_at)
+        if completions[i] != completed_at:
+            added.append(completed_at)
+    added.extend(times[overlap:])
+    return added
+
+
+def _merge(completions: list[datetime], added: list[datetime]):
+    """Merge sorted new completions into the sorted completions, in place
+
+    Only the completions after the first new one are sorted again, none when
+    the file is in chronological order.
+    """
+    if not added:
+        return
+    i = bisect_left(completions, added[0])
+    if i == len(completions):
+        completions.extend(added)
+    else:
+        completions[i:] = sorted(completions[i:] + added)  # merges the two sorted runs
+
+
+def _error(report: dict, line_no: int, reason: str):
+    if len(report["errors"]) < MAX_ERRORS:
+        report["errors"].append(f"line {line_no}: {reason}")
@@ -0,0 +1,144 @@
+import contextlib
+import functools
+import importlib
+import sys
+import threading
+import time
+
+# module (relative to this package) -> functions and methods to count and time
+TARGETS = {
+    "db_handler": ["load_all", "save_all"],
+    "habits": [
+        "load_habits",
+        "save_habits",
+        "Habit.get_period",
+        "Habit.get_completed",
+        "Habit.get_streak",
+    ],
+    "analytics": [
+        "HabitAnalytics.highest_streak",
+        "HabitAnalytics.total_periods",
+        "HabitAnalytics.completed_periods",
+        "HabitAnalytics.completion_rate",
+        "GroupAnalytics.highest_streak",
+        "GroupAnalytics.total_periods",
+        "GroupAnalytics.completed_periods",
+        "GroupAnalytics.average_completion_rate",
+    ],
+    "cli.habit_table": ["HabitTable._render"],
+}
+UI_MODULES = {"cli.habit_table"}  # only wrapped once imported, scripting commands never load the UI
+
+STATS: dict[str, list] = {}  # target -> [calls, cumulative seconds]
+_LOCK = threading.Lock()  # deferred table cells are computed in a worker thread
+_ORIGINALS: list[tuple] = []  # (owner, attribute, original) of wrapped targets
+
+
+def enable():
+    """Start counting and timing the targets
+
+    Targets are wrapped in place, so nothing is recorded (or slowed down)
+    unless this was called. Target modules are imported first, e.g. analytics
+    which is otherwise imported lazily, except the UI modules, which are
+    skipped unless already imported.
+    """
+    if _ORIGINALS:
+        return
+    for module_name, targets in TARGETS.items():
+        if module_name in UI_MODULES:
+            module = sys.modules.get(f"{__package__}.{module_name}")
+            if module is None:
+                continue
+        else:
+            module = importlib.import_module(f".{module_name}", __package__)
+
+        for target in targets:
+            owner = module
+            *path, name = target.split(".")
+            for attribute in path:
+                owner = getattr(owner, attribute)
+            _wrap(owner, name, target)
+
+
+def disable():
+    """Restore the original targets"""
+    while _ORIGINALS:
+        owner, name, original = _ORIGINALS.pop()
+        setattr(owner, name, original)
+
+
+def reset():
+    """Forget the recorded calls"""
+    with _LOCK:
+        STATS.clear()
+
+
+def report() -> str:
+    """Return the recorded calls, slowest target first"""
+    lines = [f"{'target':<42}{'calls':>10}{'total':>12}{'per call':>12}"]
+    with _LOCK:
+        rows = sorted(STATS.items(), key=lambda item: item[1][1], reverse=True)
+    for target, (calls, seconds) in rows:
+        lines.append(
+            f"{target:<42}{calls:>10}{seconds * 1000:>10.2f}ms"
+            f"{seconds / calls * 1e6:>10.1f}us"
+        )
+    return "\n".join(lines)
+
+
+@contextlib.contextmanager
+def session(instrument: bool = True, profile_path: str = None):
+    """Instrument and/or profile everything run inside the context
+
+    Args:
+        instrument (bool): count and time the targets and print them to stderr on exit
+        profile_path (str): run under cProfile and tracemalloc, and write the
+            profile to this path (read it with ``python -m pstats``) and the
+            largest allocation sites to ``<path>.memory.txt`` on exit
+    """
+    profiler = None
+    if instrument:
+        enable()
+    if profile_path:
+        import cProfile
+        import tracemalloc
+
+        tracemalloc.start()
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            profiler.dump_stats(profile_path)
+            with open(f"{profile_path}.memory.txt", "w") as f:
+                f.write(f"current {current / 1024:.1f} KiB, peak {peak / 1024:.1f} KiB\n")
+                for stat in snapshot.statistics("lineno")[:25]:
+                    f.write(f"{stat}\n")
+        if instrument:
+            disable()
+            print(report(), file=sys.stderr)
+
+
+def _wrap(owner, name: str, target: str):
+    """Replace an attribute with a wrapper recording its calls under the target name"""
+    original = vars(owner)[name]
+
+    @functools.wraps(original)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            with _LOCK:
+                stats = STATS.setdefault(target, [0, 0.0])
+                stats[0] += 1
+                stats[1] += elapsed
+
+    _ORIGINALS.append((owner, name, original))
+    setattr(owner, name, wrapper)
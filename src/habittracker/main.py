@@ -1,9 +1,58 @@
-from .cli.app import HabitTrackerApp
-from .db_handler import initialize_database, is_first_run, set_db_path
-from .habits import load_habits, seed_sample_data
-
 import argparse
-from . import test_harness
+import contextlib
+import os
+import sys
+from datetime import date, datetime, time
+
+
+def _open_database(args) -> bool:
+    """Point the handler at the database and create it if needed
+
+    Returns whether the database is the default one and new, i.e. whether the
+    interactive app should seed the sample data; named profiles start empty.
+    """
+    from .db_handler import initialize_database, is_first_run, set_db_path
+
+    if args.user:
+        from .profiles import profile_path
+
+        path = profile_path(args.user)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        set_db_path(path)
+    else:
+        set_db_path(args.db)
+    first_run = is_first_run()
+    initialize_database(search_index=args.search_index)
+    return first_run and not args.user
+
+
+def _session(args):
+    """Return the context to run in, instrumented and/or profiled if requested"""
+    instrument = args.instrument or bool(os.environ.get("HABITTRACKER_INSTRUMENT"))
+    profile = args.profile or os.environ.get("HABITTRACKER_PROFILE")
+    if not (instrument or profile):
+        return contextlib.nullcontext()
+
+    from . import instrumentation
+
+    return instrumentation.session(instrument, profile)
+
+
+def _print_profiles_report(report: dict, as_json: bool):
+    if as_json:
+        import json
+
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{'Profile':<20} {'Habits':>7} {'Highest':>8} {'Completed':>12} {'Avg rate':>9}")
+    rows = [*report["profiles"].items(), ("(all)", report["aggregate"])]
+    for name, figures in rows:
+        completed = f"{figures['completed_periods']}/{figures['total_periods']}"
+        print(
+            f"{name:<20} {figures['habits']:>7} {figures['highest_streak']:>8}"
+            f" {completed:>12} {figures['average_completion_rate'] * 100:>8.2f}%"
+        )
+
 
 def main():
     parser = argparse.ArgumentParser(prog="habittracker")
@@ -14,21 +63,363 @@ def main():
         action="store_true",
         help="launch the manual testing harness instead of the normal app",
     )
+    parser.add_argument(
+        "--search-index",
+        dest="search_index",
+        action="store_true",
+        help="search habits through a persisted SQLite FTS5 index",
+    )
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="print the time-to-interactive of each screen transition on exit",
+    )
+    parser.add_argument(
+        "--version",
+        action="store_true",
+        help="show the version and exit",
+    )
+    parser.add_argument(
+        "--instrument",
+        action="store_true",
+        help="count and time hot-path calls and print them on exit"
+        " (or set HABITTRACKER_INSTRUMENT=1)",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="PATH",
+        help="profile the session with cProfile and tracemalloc and write the"
+        " stats to PATH (or set HABITTRACKER_PROFILE=PATH)",
+    )
+    database = parser.add_mutually_exclusive_group()
+    database.add_argument(
+        "--db",
+        metavar="PATH",
+        help="use the given database file instead of the default one",
+    )
+    database.add_argument(
+        "-u",
+        "--user",
+        metavar="NAME",
+        help="use the database of the named profile, created if needed",
+    )
+
+    subparsers = parser.add_subparsers(dest="command", metavar="COMMAND")
+    complete_parser = subparsers.add_parser(
+        "complete", help="mark a habit complete for its current period"
+    )
+    complete_parser.add_argument("habit", help="name or UUID of the habit")
+    complete_parser.add_argument(
+        "--undo",
+        action="store_true",
+        help="mark the habit incomplete for its current period instead",
+    )
+    list_parser = subparsers.add_parser("list", help="list habits and their status")
+    list_parser.add_argument("--json", action="store_true", help="print JSON")
+    stats_parser = subparsers.add_parser(
+        "stats", help="show streaks and completion rates"
+    )
+    stats_parser.add_argument(
+        "--since", type=date.fromisoformat, metavar="YYYY-MM-DD", help="first day"
+    )
+    stats_parser.add_argument(
+        "--until", type=date.fromisoformat, metavar="YYYY-MM-DD", help="last day"
+    )
+    stats_parser.add_argument("--json", action="store_true", help="print JSON")
+    groups_parser = subparsers.add_parser(
+        "groups", help="show the analytics of every habit group"
+    )
+    groups_parser.add_argument(
+        "--since", type=date.fromisoformat, metavar="YYYY-MM-DD", help="first day"
+    )
+    groups_parser.add_argument(
+        "--until", type=date.fromisoformat, metavar="YYYY-MM-DD", help="last day"
+    )
+    groups_parser.add_argument("--json", action="store_true", help="print JSON")
+    correlations_parser = subparsers.add_parser(
+        "correlations", help="show which habits are completed together"
+    )
+    correlations_parser.add_argument(
+        "--since", type=date.fromisoformat, metavar="YYYY-MM-DD", help="first day"
+    )
+    correlations_parser.add_argument(
+        "--until", type=date.fromisoformat, metavar="YYYY-MM-DD", help="last day"
+    )
+    correlations_parser.add_argument(
+        "--unit",
+        choices=["days", "weeks"],
+        default="days",
+        help="count completions on the same day or week (default: %(default)s)",
+    )
+    correlations_parser.add_argument(
+        "--limit", type=int, default=10, help="pairs to list (default: %(default)s)"
+    )
+    correlations_parser.add_argument(
+        "--json", action="store_true", help="print the full matrices as JSON"
+    )
+    import_parser = subparsers.add_parser(
+        "import", help="import completions from a CSV or JSONL file"
+    )
+    import_parser.add_argument(
+        "path", help="file with habit and completed_at columns or keys, optionally gzipped"
+    )
+    import_parser.add_argument(
+        "--format",
+        choices=["csv", "jsonl"],
+        help="file format (default: from the extension)",
+    )
+    import_parser.add_argument(
+        "--create",
+        nargs="?",
+        const="days",
+        choices=["days", "weeks", "months", "years"],
+        metavar="UNIT",
+        help="create unknown habits, with periods of one UNIT (default: days)",
+    )
+    import_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="only validate and count the completions",
+    )
+    export_parser = subparsers.add_parser(
+        "export", help="export habits, periods or completions to CSV, JSONL or JSON"
+    )
+    export_parser.add_argument(
+        "-o",
+        "--output",
+        metavar="PATH",
+        help="file to write, gzipped if it ends with .gz (default: stdout)",
+    )
+    export_parser.add_argument(
+        "--format",
+        choices=["csv", "jsonl", "json"],
+        help="file format (default: from the extension, or csv)",
+    )
+    export_parser.add_argument(
+        "--table",
+        choices=["completions", "periods", "habits"],
+        default="completions",
+        help="rows to write as CSV or JSONL; JSON nests them in each habit"
+        " (default: %(default)s)",
+    )
+    export_parser.add_argument(
+        "--habit",
+        action="append",
+        metavar="NAME",
+        help="only export this habit, by name or UUID (repeatable)",
+    )
+    export_parser.add_argument(
+        "--since", type=date.fromisoformat, metavar="YYYY-MM-DD", help="first day"
+    )
+    export_parser.add_argument(
+        "--until", type=date.fromisoformat, metavar="YYYY-MM-DD", help="last day"
+    )
+    serve_parser = subparsers.add_parser(
+        "serve", help="serve the habits over a local HTTP/JSON API"
+    )
+    serve_parser.add_argument(
+        "--host", default="127.0.0.1", help="interface to listen on (default: %(default)s)"
+    )
+    serve_parser.add_argument(
+        "--port", type=int, default=8765, help="port to listen on (default: %(default)s)"
+    )
+    remind_parser = subparsers.add_parser(
+        "remind", help="keep running and warn before incomplete habits' periods end"
+    )
+    remind_parser.add_argument(
+        "--before",
+        type=int,
+        default=60,
+        metavar="MINUTES",
+        help="how long before the end of a period to warn (default: %(default)s)",
+    )
+    remind_parser.add_argument(
+        "--refresh",
+        type=float,
+        default=300,
+        metavar="SECONDS",
+        help="longest wait before noticing changes made elsewhere (default: %(default)s)",
+    )
+    remind_parser.add_argument(
+        "--json", action="store_true", help="print one JSON object per reminder"
+    )
+    sync_parser = subparsers.add_parser(
+        "sync", help="exchange the changes since the last sync with a sync server"
+    )
+    sync_parser.add_argument("url", help="sync server, e.g. http://127.0.0.1:8766")
+    sync_server_parser = subparsers.add_parser(
+        "sync-server", help="run the reference sync server"
+    )
+    sync_server_parser.add_argument(
+        "--host", default="127.0.0.1", help="interface to listen on (default: %(default)s)"
+    )
+    sync_server_parser.add_argument(
+        "--port", type=int, default=8766, help="port to listen on (default: %(default)s)"
+    )
+    sync_server_parser.add_argument(
+        "--log",
+        metavar="PATH",
+        default=":memory:",
+        help="SQLite file keeping the changes (default: in memory)",
+    )
+    profiles_parser = subparsers.add_parser(
+        "profiles", help="list, create and report on named profiles"
+    )
+    profile_commands = profiles_parser.add_subparsers(
+        dest="profiles_command", metavar="ACTION"
+    )
+    profile_commands.add_parser("list", help="list the profiles (default)")
+    create_parser = profile_commands.add_parser("create", help="create an empty profile")
+    create_parser.add_argument("name", help="letters, digits, '_' and '-'")
+    report_parser = profile_commands.add_parser(
+        "report", help="group analytics per profile and across all of them"
+    )
+    report_parser.add_argument("names", nargs="*", help="profiles (default: all)")
+    report_parser.add_argument(
+        "--since", type=date.fromisoformat, metavar="YYYY-MM-DD", help="first day"
+    )
+    report_parser.add_argument(
+        "--until", type=date.fromisoformat, metavar="YYYY-MM-DD", help="last day"
+    )
+    report_parser.add_argument(
+        "--workers", type=int, help="worker processes (default: one per CPU)"
+    )
+    report_parser.add_argument("--json", action="store_true", help="print JSON")
+    simulate_parser = subparsers.add_parser(
+        "simulate",
+        help="replay simulated usage headlessly on a temporary database and time it",
+    )
+    simulate_parser.add_argument(
+        "--days", type=int, default=365, help="number of simulated days"
+    )
+    simulate_parser.add_argument(
+        "--habits", type=int, help="number of generated habits (default: sample data)"
+    )
+    simulate_parser.add_argument(
+        "--model",
+        metavar="PATH",
+        help="JSON usage model with default, habits and weekdays probabilities"
+        " (default: randomized)",
+    )
+    simulate_parser.add_argument("--seed", type=int, default=0, help="simulation seed")
+    simulate_parser.add_argument("--json", action="store_true", help="print JSON")
+
     args = parser.parse_args()
 
+    # heavy modules are only imported once we know they are needed
+    if args.version:
+        from . import __version__
+
+        print(f"habittracker {__version__}")
+        return
+
     if args.manual:
+        from . import test_harness
+
         test_harness.run()
         return
 
-    set_db_path()
+    if args.command == "profiles":
+        from . import profiles
 
-    first_run = is_first_run()
+        try:
+            match args.profiles_command:
+                case "create":
+                    profiles.create_profile(args.name)
+                case "report":
+                    report = profiles.report(
+                        args.names or None,
+                        args.since and datetime.combine(args.since, time.min),
+                        args.until and datetime.combine(args.until, time.max),
+                        args.workers,
+                    )
+                    _print_profiles_report(report, args.json)
+                case _:
+                    print("\n".join(profiles.list_profiles()))
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 1
+        return 0
+
+    if args.command == "sync-server":
+        from . import sync
+
+        sync.serve(args.host, args.port, args.log)
+        return 0
+
+    # the simulation uses its own temporary database
+    if args.command == "simulate":
+        from . import test_harness
+
+        model = test_harness.UsageModel.from_file(args.model) if args.model else None
+        try:
+            with _session(args):
+                report = test_harness.simulate(args.days, args.habits, model, args.seed)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 1
+
+        if args.json:
+            import json
+
+            print(json.dumps(report, indent=2))
+        else:
+            print(test_harness.format_report(report))
+        return 0
+
+    # scripting commands never import the interactive UI
+    if args.command is not None:
+        from . import commands, habits
+
+        with _session(args):
+            _open_database(args)  # scripts start from an empty store, never the sample data
+
+            match args.command:
+                case "complete":
+                    return commands.complete(args.habit, undo=args.undo)
+                case "list":
+                    return commands.list_habits(as_json=args.json)
+                case "stats":
+                    return commands.stats(args.since, args.until, as_json=args.json)
+                case "groups":
+                    return commands.groups(args.since, args.until, as_json=args.json)
+                case "correlations":
+                    return commands.correlations(
+                        args.since, args.until, args.unit, args.limit, as_json=args.json
+                    )
+                case "import":
+                    return commands.import_completions(
+                        args.path, args.format, args.create, args.dry_run
+                    )
+                case "export":
+                    return commands.export(
+                        args.output, args.format, args.table, args.habit, args.since, args.until
+                    )
+                case "remind":
+                    return commands.remind(args.before, args.refresh, as_json=args.json)
+                case "sync":
+                    return commands.sync(args.url)
+                case "serve":
+                    from . import server
+
+                    habits.load_habits()
+                    server.serve(args.host, args.port)
+                    return 0
+
+    from . import habits
+    from .cli.app import HabitTrackerApp
+    from .cli.router import ROUTER
+
+    with _session(args):
+        first_run = _open_database(args)
+
+        habits.load_habits()
 
-    initialize_database()
-    load_habits()
+        if first_run:
+            habits.seed_sample_data()
 
-    if first_run:
-        seed_sample_data()
+        cli_app = HabitTrackerApp()
+        cli_app.run()
 
-    cli_app = HabitTrackerApp()
-    cli_app.run()
+    if args.timings:
+        print(ROUTER.report_timings())
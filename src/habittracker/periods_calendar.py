@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+
+MONTHS_PER_UNIT = {"months": 1, "years": 12}  # calendar units, counted in months
+DAYS_PER_UNIT = {"days": 1, "weeks": 7}  # fixed-length units, counted in days
+
+_DAYS_IN_MONTH = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+
+def days_in_month(year: int, month: int) -> int:
+    """Return the number of days of a month"""
+    if month == 2 and year % 4 == 0 and (year % 100 != 0 or year % 400 == 0):
+        return 29
+    return _DAYS_IN_MONTH[month - 1]
+
+
+def add_months(moment: datetime, months: int, day: int = None) -> datetime:
+    """Return the moment a number of months later, on the given day of the month
+
+    Args:
+        moment (datetime): moment to start from, its time of day is kept
+        months (int): number of months to add, may be negative
+        day (int): day of the month, the moment's by default. Months too short
+            for it end on their last day instead, e.g. Jan 31 + 1 month is
+            Feb 28 (or 29), like relativedelta.
+    """
+    year, month = divmod(moment.year * 12 + moment.month - 1 + months, 12)
+    month += 1
+    return moment.replace(
+        year=year, month=month, day=min(day or moment.day, days_in_month(year, month))
+    )
+
+
+def boundary(start: datetime, amount: int, unit: str, k: int) -> datetime:
+    """Return the k-th period boundary of a periodicity from its start
+
+    Calendar units are counted from the start directly, not period by
+    period, so a habit started on the 31st has every period of a month with
+    31 days end on the 31st.
+    """
+    if unit in MONTHS_PER_UNIT:
+        return add_months(start, k * amount * MONTHS_PER_UNIT[unit])
+    return start + timedelta(days=k * amount * DAYS_PER_UNIT[unit])
+
+
+def boundaries(
+    start: datetime, amount: int, unit: str, count: int, first: int = 1
+) -> list[datetime]:
+    """Return the boundaries first to first + count - 1 of a periodicity from its start"""
+    if unit in MONTHS_PER_UNIT:
+        step = amount * MONTHS_PER_UNIT[unit]
+        return [add_months(start, k * step) for k in range(first, first + count)]
+    step = timedelta(days=amount * DAYS_PER_UNIT[unit])
+    return [start + k * step for k in range(first, first + count)]
+
+
+def boundaries_until(
+    previous: datetime, amount: int, unit: str, until: datetime, anchor: datetime = None
+) -> list[datetime]:
+    """Return the boundaries following one, up to the first one after a moment
+
+    Args:
+        previous (datetime): last known boundary
+        amount (int): periodicity amount
+        unit (str): periodicity unit
+        until (datetime): the last returned boundary is the first one after it
+        anchor (datetime): start of the habit. When the previous boundary is
+            on the anchor's day of the month, or on the last day of a month
+            too short for it, the following ones are on the anchor's day again,
+            so that chained periods do not drift to earlier days.
+
+    Returns:
+        list[datetime]: at least one boundary, each one period after the one before
+    """
+    if unit not in MONTHS_PER_UNIT:
+        step = timedelta(days=amount * DAYS_PER_UNIT[unit])
+        count = max((until - previous) // step + 1, 1)
+        return [previous + k * step for k in range(1, count + 1)]
+
+    day = previous.day
+    if anchor is not None and previous.day == min(
+        anchor.day, days_in_month(previous.year, previous.month)
+    ):
+        day = anchor.day
+    step = amount * MONTHS_PER_UNIT[unit]
+    result = [add_months(previous, step, day)]
+    while result[-1] <= until:
+        result.append(add_months(previous, (len(result) + 1) * step, day))
+    return result
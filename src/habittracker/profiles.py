@@ -0,0 +1,134 @@
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from . import db_handler
+
+DEFAULT = "default"  # the database used when no profile is given
+_NAME = re.compile(r"[\w-]+")
+
+
+def profiles_dir() -> str:
+    """Return the directory holding one database per named profile"""
+    return os.path.join(os.path.dirname(db_handler.default_db_path()), "profiles")
+
+
+def profile_path(name: str) -> str:
+    """Return the database path of a profile"""
+    if name == DEFAULT:
+        return db_handler.default_db_path()
+    if not _NAME.fullmatch(name):
+        raise ValueError(
+            f"Invalid profile name '{name}', use letters, digits, '_' and '-'"
+        )
+    return os.path.join(profiles_dir(), f"{name}.db")
+
+
+def list_profiles() -> list[str]:
+    """Return the names of the existing profiles, the default one first"""
+    names = []
+    if os.path.exists(db_handler.default_db_path()):
+        names.append(DEFAULT)
+    try:
+        files = os.listdir(profiles_dir())
+    except FileNotFoundError:
+        files = []
+    names += sorted(file[:-3] for file in files if file.endswith(".db"))
+    return names
+
+
+def create_profile(name: str):
+    """Create the database of a new, empty profile"""
+    path = profile_path(name)
+    if os.path.exists(path):
+        raise ValueError(f"Profile '{name}' already exists")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    db_handler.set_db_path(path)
+    db_handler.initialize_database()
+
+
+def report(
+    names: list[str] = None,
+    since: datetime = None,
+    until: datetime = None,
+    workers: int = None,
+) -> dict:
+    """Run the group analytics of every profile in a process pool
+
+    Each profile is loaded and analysed inside a worker, which replaces the
+    previous profile's habits when it takes the next one. Only the resulting
+    figures are sent back, so no profile's habits are ever loaded here or
+    next to another profile's.
+
+    Args:
+        names (list[str]): profiles to report on, all of them by default
+        since (datetime): start of the time frame, each profile's first start by default
+        until (datetime): end of the time frame, now by default
+        workers (int): number of worker processes, one per CPU by default
+
+    Returns:
+        dict: {"profiles": {name: figures}, "aggregate": figures}
+    """
+    existing = list_profiles()
+    if names is None:
+        names = existing
+    missing = [name for name in names if name not in existing]
+    if missing:
+        raise ValueError(f"Unknown profiles: {', '.join(missing)}")
+    paths = [profile_path(name) for name in names]
+
+    # spawned workers start clean on every platform, forking could copy
+    # locks held by other threads (e.g. the table's deferred cell worker)
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        results = list(
+            executor.map(
+                _profile_report,
+                paths,
+                [since] * len(paths),
+                [until] * len(paths),
+            )
+        )
+    per_profile = dict(zip(names, results))
+
+    habit_count = sum(result["habits"] for result in results)
+    completed = sum(result["completed_periods"] for result in results)
+    total = sum(result["total_periods"] for result in results)
+    aggregate = {
+        "profiles": len(results),
+        "habits": habit_count,
+        "highest_streak": max((result["highest_streak"] for result in results), default=0),
+        "completed_periods": completed,
+        "total_periods": total,
+        "completion_rate": completed / total if total else 0.0,
+        # mean over all habits, i.e. the profile averages weighted by habit count
+        "average_completion_rate": (
+            sum(r["average_completion_rate"] * r["habits"] for r in results) / habit_count
+            if habit_count
+            else 0.0
+        ),
+    }
+    return {"profiles": per_profile, "aggregate": aggregate}
+
+
+def _profile_report(path: str, since: datetime, until: datetime) -> dict:
+    """Return the group analytics of the profile at the given path (runs in a worker)"""
+    from . import analytics, habits
+
+    db_handler.set_db_path(path)
+    habits.load_habits()
+    analytics.set_period(since, until)
+
+    habit_list = list(habits.HABITS.get_habits().values())
+    group = analytics.GroupAnalytics(habit_list)
+    result = {
+        "habits": len(habit_list),
+        "highest_streak": group.highest_streak(),
+        "completed_periods": group.completed_periods(),
+        "total_periods": group.total_periods(),
+        "average_completion_rate": group.average_completion_rate(),
+    }
+    habits.HABITS = habits.HabitStorage()  # drop this profile's habits before the next task
+    return result
@@ -0,0 +1,182 @@
+import heapq
+import threading
+import typing
+from datetime import datetime, timedelta
+
+from . import habits, snapshot
+
+
+class DeadlineQueue:
+    """
+    Min-heap holding one deadline per habit
+
+    Rescheduling a habit pushes its new deadline and leaves the old entry in
+    the heap, to be skipped once it reaches the top, so every change costs
+    O(log n). The heap is rebuilt when stale entries outnumber live ones.
+    """
+
+    def __init__(self):
+        self._heap: list[tuple[datetime, str]] = []
+        self._deadlines: dict[str, datetime] = {}  # habit UUID -> live deadline
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def __contains__(self, habit_uuid: str) -> bool:
+        return habit_uuid in self._deadlines
+
+    def schedule(self, habit_uuid: str, deadline: datetime):
+        """Set a habit's deadline, replacing its previous one"""
+        if self._deadlines.get(habit_uuid) == deadline:
+            return
+        self._deadlines[habit_uuid] = deadline
+        heapq.heappush(self._heap, (deadline, habit_uuid))
+        if len(self._heap) > 2 * len(self._deadlines) + 16:
+            self._heap = [(deadline, uuid) for uuid, deadline in self._deadlines.items()]
+            heapq.heapify(self._heap)
+
+    def cancel(self, habit_uuid: str):
+        """Forget a habit's deadline"""
+        self._deadlines.pop(habit_uuid, None)
+
+    def peek(self) -> tuple[datetime, str] | None:
+        """Return the earliest (deadline, habit UUID) without removing it"""
+        while self._heap:
+            deadline, habit_uuid = self._heap[0]
+            if self._deadlines.get(habit_uuid) == deadline:
+                return deadline, habit_uuid
+            heapq.heappop(self._heap)  # stale entry
+        return None
+
+    def pop(self) -> tuple[datetime, str] | None:
+        """Remove and return the earliest (deadline, habit UUID)"""
+        entry = self.peek()
+        if entry is not None:
+            heapq.heappop(self._heap)
+            del self._deadlines[entry[1]]
+        return entry
+
+
+class Reminders:
+    """
+    Warn about incomplete habits shortly before their current period ends
+
+    Each habit is scheduled at the end of its current period minus the lead
+    time. When that deadline comes, a reminder is emitted if the habit is
+    still incomplete, and the habit is scheduled again for its next period.
+
+    Attrs:
+        before (timedelta): how long before the end of a period to remind
+        emit (Callable[[dict], None]): called with each reminder
+        queue (DeadlineQueue): next reminder time of each habit
+    """
+
+    def __init__(self, before: timedelta, emit: typing.Callable[[dict], None]):
+        self.before = before
+        self.emit = emit
+        self.queue = DeadlineQueue()
+        self._period_ends: dict[str, datetime] = {}  # end of the period each habit is scheduled for
+        self._reminded: dict[str, datetime] = {}  # end of the last period each habit was reminded for
+        self._database_key: tuple | None = None
+
+    def refresh(self):
+        """Reload the habits if the database changed, and reschedule the changed ones
+
+        The change check only reads the database header, so this is cheap
+        while nothing was written. After a write, only the habits whose
+        current period end moved, or which were added or deleted, are
+        rescheduled, each in O(log n).
+        """
+        key = snapshot.database_key()
+        if key is not None and key == self._database_key:
+            return
+        self._database_key = key
+        habits.load_habits()
+
+        now = habits.now()
+        loaded = habits.HABITS.get_habits()
+        for habit_uuid in list(self._period_ends):
+            if habit_uuid not in loaded:
+                self.queue.cancel(habit_uuid)
+                del self._period_ends[habit_uuid]
+                self._reminded.pop(habit_uuid, None)
+        for habit in loaded.values():
+            self.habit_changed(habit, now)
+
+    def habit_changed(self, habit: habits.Habit, now: datetime = None):
+        """Reschedule a habit after its completions or periodicity changed, in O(log n)
+
+        Periods the habit was already reminded for are skipped, so that a
+        reminder is never emitted twice for the same period.
+        """
+        if now is None:
+            now = habits.now()
+        reminded = self._reminded.get(habit.uuid)
+        end = habit.get_period(now if reminded is None else max(now, reminded))["end"]
+        if self._period_ends.get(habit.uuid) != end:
+            self._period_ends[habit.uuid] = end
+            self.queue.schedule(habit.uuid, end - self.before)
+
+    def fire(self, now: datetime = None) -> int:
+        """Emit the reminders due by now and schedule the next ones
+
+        Returns:
+            int: number of reminders emitted
+        """
+        if now is None:
+            now = habits.now()
+        emitted = 0
+        while (entry := self.queue.peek()) is not None and entry[0] <= now:
+            _, habit_uuid = self.queue.pop()
+            habit = habits.HABITS.get_habit(habit_uuid)
+            end = self._period_ends.pop(habit_uuid)
+            if habit is None:
+                continue
+            period = habit.get_period(end - timedelta.resolution)
+            self._reminded[habit_uuid] = period["end"]
+
+            if now < period["end"] and not habit.get_completed(period):
+                self.emit(
+                    {
+                        "habit": habit.uuid,
+                        "name": habit.name,
+                        "period_end": period["end"].isoformat(),
+                        "streak": habit.get_streak(now),  # at stake if not completed
+                    }
+                )
+                emitted += 1
+            self.habit_changed(habit, max(now, period["end"]))
+        return emitted
+
+    def seconds_until_next(self, now: datetime = None) -> float | None:
+        """Return how long to sleep until the next reminder, None without habits"""
+        entry = self.queue.peek()
+        if entry is None:
+            return None
+        return max(0.0, (entry[0] - (now or habits.now())).total_seconds())
+
+    def run(self, refresh: float = 300, stop: threading.Event = None):
+        """Emit reminders until stopped, sleeping until the next one is due
+
+        Args:
+            refresh (float): longest sleep in seconds before looking for
+                changes made by other processes, e.g. a completion
+            stop (threading.Event): set to stop
+        """
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            self.refresh()
+            self.fire()
+            wait = self.seconds_until_next()
+            stop.wait(refresh if wait is None else min(wait, refresh))
+
+
+def format_reminder(reminder: dict) -> str:
+    """Return a reminder as a line of text"""
+    end = datetime.fromisoformat(reminder["period_end"])
+    left = max(end - habits.now(), timedelta())
+    hours, seconds = divmod(int(left.total_seconds()), 3600)
+    line = f"{reminder['name']} is due in {hours}h{seconds // 60:02d} (by {end:%Y-%m-%d %H:%M})"
+    if reminder["streak"]:
+        line += f", streak of {reminder['streak']} at stake"
+    return line + "."
@@ -0,0 +1,74 @@
+from collections import defaultdict
+
+GRAM_SIZE = 3
+
+
+def _grams(text: str) -> set[str]:
+    """Return the distinct trigrams of a piece of text"""
+    return {text[i : i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+def _search_text(*fields: str) -> str:
+    """Return the normalized text that is searched for a habit"""
+    return "\n".join((field or "").casefold() for field in fields)
+
+
+class HabitSearchIndex:
+    """
+    Trigram index over habit names and notes
+
+    Queries of at least three characters are answered by intersecting trigram
+    postings; shorter queries scan the normalized texts, which is cheap since
+    they match most habits anyway.
+
+    Attrs:
+        texts (dict[str, str]): normalized search text per habit UUID
+        postings (dict[str, set[str]]): habit UUIDs per trigram
+    """
+
+    def __init__(self):
+        self.texts: dict[str, str] = {}
+        self.postings: dict[str, set[str]] = defaultdict(set)
+
+    def add(self, habit_uuid: str, name: str, notes: str):
+        """Index a habit, replacing any previous entry for it"""
+        self.remove(habit_uuid)
+        text = _search_text(name, notes)
+        self.texts[habit_uuid] = text
+        for gram in _grams(text):
+            self.postings[gram].add(habit_uuid)
+
+    def remove(self, habit_uuid: str):
+        """Remove a habit from the index"""
+        text = self.texts.pop(habit_uuid, None)
+        if text is None:
+            return
+        for gram in _grams(text):
+            postings = self.postings[gram]
+            postings.discard(habit_uuid)
+            if not postings:
+                del self.postings[gram]
+
+    def search(self, query: str, within=None) -> set[str]:
+        """Return the UUIDs of habits whose name or notes contain the query
+
+        Args:
+            query (str): case-insensitive substring to search for
+            within (Iterable[str]): optional UUIDs to narrow down instead of the whole index
+        """
+        query = query.casefold()
+        if within is not None:
+            candidates = within
+        elif len(query) < GRAM_SIZE:
+            candidates = self.texts.keys()
+        else:
+            postings = sorted(
+                (self.postings.get(gram, set()) for gram in _grams(query)), key=len
+            )
+            candidates = set.intersection(*postings)
+        # trigram hits can be false positives, so confirm the substring
+        return {
+            habit_uuid
+            for habit_uuid in candidates
+            if query in self.texts.get(habit_uuid, "")
+        }
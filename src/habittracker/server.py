@@ -0,0 +1,312 @@
+import asyncio
+import json
+import time
+from datetime import date, datetime
+from datetime import time as day_time
+from urllib.parse import parse_qs, urlsplit
+
+from . import db_handler, habits
+from .commands import analytics_report, habit_summary
+
+REASONS = {
+    200: "OK",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Content Too Large",
+    500: "Internal Server Error",
+}
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 8 * 1024 * 1024
+
+
+class HTTPError(Exception):
+    """Error answered with the given status and message"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class JSONServer:
+    """
+    Minimal HTTP/1.1 server answering JSON over kept-alive connections
+
+    Subclasses answer requests in handle().
+
+    Attrs:
+        host (str): interface to listen on
+        port (int): port to listen on, 0 picks a free one when started
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765):
+        self.host = host
+        self.port = port
+        self._server: asyncio.AbstractServer | None = None
+
+    async def start(self):
+        """Start listening"""
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port, limit=MAX_HEADER_BYTES
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        """Start listening and serve until cancelled"""
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        """Stop listening and wait for open connections to finish"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def handle(
+        self, method: str, target: str, headers: dict[str, str] = None, body: bytes = b""
+    ) -> tuple[int, dict[str, str], bytes]:
+        """Return the status, headers and body answering a request"""
+        raise NotImplementedError
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        """Answer requests on a connection until it is closed, keeping it alive"""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except asyncio.IncompleteReadError:
+                    break  # closed by the client
+                except asyncio.LimitOverrunError:
+                    await self._write(writer, 400, {}, b'{"error": "Headers too large"}', False)
+                    break
+
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = request_line.split(" ")
+                except ValueError:
+                    await self._write(writer, 400, {}, b'{"error": "Bad request line"}', False)
+                    break
+                headers = {}
+                for line in header_lines:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._write(writer, 400, {}, b'{"error": "Bad Content-Length"}', False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._write(writer, 413, {}, b'{"error": "Body too large"}', False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                keep_alive = (
+                    headers.get("connection", "").lower() != "close"
+                    if version == "HTTP/1.1"
+                    else headers.get("connection", "").lower() == "keep-alive"
+                )
+                try:
+                    status, response_headers, body = await self.handle(
+                        method, target, headers, body
+                    )
+                except Exception as e:
+                    print(f"Error answering {method} {target}: {e!r}")
+                    status, response_headers = 500, {}
+                    body = b'{"error": "Internal server error"}'
+                await self._write(writer, status, response_headers, body, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _write(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        headers: dict[str, str],
+        body: bytes,
+        keep_alive: bool,
+    ):
+        lines = [
+            f"HTTP/1.1 {status} {REASONS.get(status, 'Unknown')}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+            "Cache-Control: no-cache",  # always revalidate with the ETag
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+            *(f"{name}: {value}" for name, value in headers.items()),
+        ]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+
+class HabitServer(JSONServer):
+    """
+    Local HTTP/1.1 JSON API over the loaded habits
+
+    Endpoints:
+        GET  /habits                        every habit and its current completion
+        GET  /habits/<uuid>                 one habit, with its streak
+        POST /habits/<uuid>/toggle          mark it complete/incomplete for the current period
+        GET  /analytics[?since=&until=]     analytics per habit and overall (dates as YYYY-MM-DD)
+
+    GET responses are cached and carry an ETag. A single habit's ETag is
+    derived from its version and current period, so changing one habit does
+    not invalidate the others. The list and analytics are dropped whenever
+    the habit storage's revision changes or a current period of any habit
+    ends, since completion states and streaks change then. Clients that send
+    the ETag back in If-None-Match get an empty 304 instead.
+
+    Writes are serialized by a lock and only add or delete the rows they
+    change, in a worker thread so that reads are served meanwhile.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765):
+        super().__init__(host, port)
+        self._write_lock = asyncio.Lock()
+        self._cache: dict[str, tuple[str, bytes]] = {}  # target -> (etag, body)
+        self._habit_cache: dict[str, tuple[str, bytes]] = {}  # habit uuid -> (etag, body)
+        self._cache_revision: int | None = None
+        self._cache_expires: datetime = datetime.min
+        self._generation = 0  # bumped whenever the cache is dropped
+        self._boot = f"{time.time_ns():x}"  # so ETags never survive a restart
+        self._persisted = {  # number of periods of each habit stored in the database
+            habit_uuid: len(habit.periods)
+            for habit_uuid, habit in habits.HABITS.get_habits().items()
+        }
+
+    async def handle(
+        self, method: str, target: str, headers: dict[str, str] = None, body: bytes = b""
+    ) -> tuple[int, dict[str, str], bytes]:
+        headers = headers or {}
+        try:
+            if method == "GET":
+                etag, body = self._get(target)
+                if headers.get("if-none-match") == etag:
+                    return 304, {"ETag": etag}, b""
+                return 200, {"ETag": etag}, body
+            if method == "POST":
+                result = await self._post(urlsplit(target).path)
+                return 200, {}, json.dumps(result).encode()
+            raise HTTPError(405, f"Method {method} is not allowed")
+        except HTTPError as e:
+            return e.status, {}, json.dumps({"error": str(e)}).encode()
+
+    def _get(self, target: str) -> tuple[str, bytes]:
+        """Return the ETag and body of a GET request, from the cache if still valid"""
+        now = habits.now()
+        match urlsplit(target).path.strip("/").split("/"):
+            case ["habits", habit_uuid]:
+                return self._get_habit(self._habit(habit_uuid), now)
+        if habits.HABITS.revision != self._cache_revision or now >= self._cache_expires:
+            self._cache.clear()
+            self._generation += 1
+            self._cache_revision = habits.HABITS.revision
+            self._cache_expires = min(
+                (habit.get_period(now)["end"] for habit in habits.HABITS.get_habits().values()),
+                default=datetime.max,
+            )
+        cached = self._cache.get(target)
+        if cached is None:
+            body = json.dumps(self._route_get(target)).encode()
+            cached = self._cache[target] = (f'"{self._boot}-{self._generation}"', body)
+        return cached
+
+    def _get_habit(self, habit: habits.Habit, now: datetime) -> tuple[str, bytes]:
+        """Return the ETag and body of one habit, cached until it or its current period changes"""
+        period_end = habit.get_period(now)["end"]
+        etag = f'"{self._boot}-{habit.version}-{period_end:%Y%m%d%H%M%S}"'
+        cached = self._habit_cache.get(habit.uuid)
+        if cached is None or cached[0] != etag:
+            body = json.dumps({**habit_summary(habit), "streak": habit.streak}).encode()
+            cached = self._habit_cache[habit.uuid] = (etag, body)
+        return cached
+
+    def _route_get(self, target: str):
+        url = urlsplit(target)
+        parts = url.path.strip("/").split("/")
+        match parts:
+            case ["habits"]:
+                return [habit_summary(habit) for habit in habits.HABITS.get_habits().values()]
+            case ["analytics"]:
+                query = parse_qs(url.query)
+                return analytics_report(
+                    list(habits.HABITS.get_habits().values()),
+                    _query_date(query, "since", day_time.min),
+                    _query_date(query, "until", day_time.max),
+                )
+        raise HTTPError(404, f"No resource at {url.path}")
+
+    async def _post(self, path: str):
+        match path.strip("/").split("/"):
+            case ["habits", habit_uuid, "toggle"]:
+                return await self._toggle(self._habit(habit_uuid))
+        raise HTTPError(404, f"No resource at {path}")
+
+    async def _toggle(self, habit: habits.Habit) -> dict:
+        """Toggle a habit's completion and write only the changed rows"""
+        async with self._write_lock:
+            period = habit.get_period()
+            was_completed = habit.get_completed(period)
+            habit.toggle_completed()
+
+            persisted = self._persisted.get(habit.uuid, 0)
+            new_periods = [
+                {"start": p["start"].isoformat(), "end": p["end"].isoformat()}
+                for p in habit.periods[persisted:]
+            ]
+            self._persisted[habit.uuid] = len(habit.periods)
+            completions = [] if was_completed else [habit.completions[-1].isoformat()]
+
+            if was_completed:
+                await asyncio.to_thread(
+                    db_handler.delete_completions,
+                    habit.uuid,
+                    period["start"].isoformat(),
+                    period["end"].isoformat(),
+                )
+            if new_periods or completions:
+                await asyncio.to_thread(
+                    db_handler.append_history, habit.uuid, new_periods, completions
+                )
+        return habit_summary(habit)
+
+    def _habit(self, habit_uuid: str) -> habits.Habit:
+        habit = habits.HABITS.get_habit(habit_uuid)
+        if habit is None:
+            raise HTTPError(404, f"No habit with UUID {habit_uuid}")
+        return habit
+
+
+def serve(host: str = "127.0.0.1", port: int = 8765):
+    """Serve the loaded habits until interrupted"""
+    server = HabitServer(host, port)
+
+    async def main():
+        await server.start()
+        print(f"Serving habits on http://{server.host}:{server.port} (Ctrl+C to stop)")
+        await server.serve_forever()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+
+
+def _query_date(query: dict, name: str, at: day_time) -> datetime | None:
+    """Return a YYYY-MM-DD query parameter combined with the given time of day"""
+    if name not in query:
+        return None
+    try:
+        return datetime.combine(date.fromisoformat(query[name][0]), at)
+    except ValueError:
+        raise HTTPError(400, f"Invalid {name} date, use YYYY-MM-DD")
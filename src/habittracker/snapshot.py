@@ -0,0 +1,94 @@
+import marshal
+import os
+
+from . import db_handler
+
+FORMAT_VERSION = 1  # bump whenever the record layout below changes
+
+
+def snapshot_path() -> str:
+    """Return the path of the snapshot stored next to the database"""
+    return f"{db_handler.DB_PATH}.snapshot"
+
+
+def database_key() -> tuple | None:
+    """Return a key that changes whenever the database file changes
+
+    ``PRAGMA data_version`` only compares writes seen by a single connection,
+    so its persisted counterparts are read from the file header instead: the
+    file change counter (bumped by every write transaction) and the schema
+    cookie (bumped by every schema change).
+
+    Returns None when the database cannot be keyed, e.g. when a write-ahead
+    log may hold changes the main file does not show yet.
+    """
+    try:
+        if os.path.getsize(f"{db_handler.DB_PATH}-wal"):
+            return None
+    except OSError:
+        pass
+    try:
+        with open(db_handler.DB_PATH, "rb") as f:
+            header = f.read(100)
+            stat = os.fstat(f.fileno())
+    except OSError:
+        return None
+    if len(header) < 100:
+        return None
+    change_counter = int.from_bytes(header[24:28], "big")
+    schema_cookie = int.from_bytes(header[40:44], "big")
+    return (FORMAT_VERSION, change_counter, schema_cookie, stat.st_mtime_ns, stat.st_size)
+
+
+def read(key: tuple) -> dict | None:
+    """Return the snapshot in the db_handler.load_all format if it matches the key"""
+    try:
+        with open(snapshot_path(), "rb") as f:
+            snapshot_key, records = marshal.loads(f.read())  # much faster than marshal.load
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if snapshot_key != key:
+        return None
+
+    data = {}
+    for uuid, habit, starts, ends, completions in records:
+        if isinstance(starts, str):  # contiguous periods, see _pack_periods
+            starts = [starts, *ends[:-1]]
+        data[uuid] = {
+            "habit": habit,
+            "periods": [{"start": s, "end": e} for s, e in zip(starts, ends)],
+            "completions": completions,
+        }
+    return data
+
+
+def write(key: tuple, data: dict):
+    """Replace the snapshot with the given data in the db_handler.load_all format
+
+    The snapshot is only a cache, so failing to write it is not an error.
+    """
+    records = [
+        (uuid, entry["habit"], *_pack_periods(entry["periods"]), entry["completions"])
+        for uuid, entry in data.items()
+    ]
+    path = snapshot_path()
+    try:
+        with open(f"{path}.tmp", "wb") as f:
+            f.write(marshal.dumps((key, records)))
+        os.replace(f"{path}.tmp", path)
+    except OSError:
+        pass
+
+
+def _pack_periods(periods: list[dict]) -> tuple[str | list[str], list[str]]:
+    """Return the starts and ends of periods
+
+    Periods normally start where the previous one ended, in which case only
+    the first start is stored instead of the list of starts.
+    """
+    ends = [period["end"] for period in periods]
+    if periods and all(
+        periods[i]["start"] == ends[i - 1] for i in range(1, len(periods))
+    ):
+        return periods[0]["start"], ends
+    return [period["start"] for period in periods], ends
@@ -0,0 +1,208 @@
+import asyncio
+import gzip
+import json
+import sqlite3
+from datetime import datetime
+from urllib.parse import parse_qs, urlsplit
+
+from . import db_handler, periods_calendar
+from .server import HTTPError, JSONServer
+
+BATCH_SIZE = 500  # changes per request
+TIMEOUT = 30  # seconds to wait for the sync server
+CHANGE_KEYS = ("kind", "habit", "item", "value", "stamp", "device")
+
+
+def sync(url: str, batch_size: int = BATCH_SIZE) -> dict:
+    """Exchange the changes made since the last sync with a sync server
+
+    The changes of other devices are pulled first, from the server's cursor
+    stored after the last page applied. Then this device's changes are
+    pushed, from the last one the server acknowledged. Only changes travel,
+    gzip-compressed and in batches, so a sync costs as much as what changed
+    rather than as much as the database holds.
+
+    Args:
+        url (str): base URL of the sync server, e.g. http://127.0.0.1:8766
+        batch_size (int): changes per request
+
+    Returns:
+        dict: {"pulled", "applied", "pushed"} numbers of changes
+    """
+    import requests
+
+    device = db_handler.initialize_sync()
+    url = url.rstrip("/")
+    pulled = applied = pushed = 0
+
+    with requests.Session() as session:
+        cursor = int(db_handler.get_sync_state("pulled", "0"))
+        while True:
+            response = session.get(
+                f"{url}/changes",
+                params={"since": cursor, "limit": batch_size, "exclude": device},
+                timeout=TIMEOUT,
+            )
+            response.raise_for_status()
+            page = response.json()
+            cursor = page["cursor"]
+            changes = [_with_first_period(change) for change in page["changes"]]
+            applied += db_handler.apply_changes(changes, {"pulled": str(cursor)})
+            pulled += len(changes)
+            if not page["more"]:
+                break
+
+        after = int(db_handler.get_sync_state("pushed", "0"))
+        while changes := db_handler.local_changes(after, batch_size):
+            body = json.dumps(
+                {
+                    "device": device,
+                    "changes": [{key: change[key] for key in CHANGE_KEYS} for change in changes],
+                }
+            ).encode()
+            response = session.post(
+                f"{url}/changes",
+                data=gzip.compress(body),
+                headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+                timeout=TIMEOUT,
+            )
+            response.raise_for_status()
+            after = changes[-1]["seq"]
+            db_handler.set_sync_state("pushed", str(after))
+            pushed += len(changes)
+
+    return {"pulled": pulled, "applied": applied, "pushed": pushed}
+
+
+def _with_first_period(change: dict) -> dict:
+    """Add the first period to habit changes, in case the habit is new here"""
+    if change["kind"] != "habit":
+        return change
+    details = json.loads(change["value"])
+    start = datetime.fromisoformat(details["start_date"])
+    end = periods_calendar.boundary(
+        start, details["periodicity_amount"], details["periodicity_unit"], 1
+    )
+    return {**change, "period": {"start": start.isoformat(), "end": end.isoformat()}}
+
+
+class SyncServer(JSONServer):
+    """
+    Reference sync server relaying the changes of every device through one log
+
+    The server does not resolve anything: each device applies the changes of
+    the others with the same deterministic rule (see db_handler.apply_changes),
+    so the log only needs to keep them in the order they were pushed.
+
+    Endpoints:
+        GET  /changes?since=&limit=&exclude=  changes after a cursor, without a device's own
+        POST /changes                         append {"device", "changes"}, gzip allowed
+
+    Attrs:
+        path (str): SQLite database holding the log, in memory by default
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8766, path: str = ":memory:"):
+        super().__init__(host, port)
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)  # served from the loop's thread
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS changes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                habit TEXT NOT NULL,
+                item TEXT NOT NULL,
+                value TEXT,
+                stamp TEXT NOT NULL,
+                device TEXT NOT NULL
+            );
+            """
+        )
+
+    async def close(self):
+        await super().close()
+        self._conn.close()
+
+    async def handle(
+        self, method: str, target: str, headers: dict[str, str] = None, body: bytes = b""
+    ) -> tuple[int, dict[str, str], bytes]:
+        headers = headers or {}
+        url = urlsplit(target)
+        try:
+            if url.path.rstrip("/") != "/changes":
+                raise HTTPError(404, f"No resource at {url.path}")
+            if method == "GET":
+                result = self._pull(parse_qs(url.query))
+            elif method == "POST":
+                if headers.get("content-encoding") == "gzip":
+                    body = gzip.decompress(body)
+                result = self._push(json.loads(body))
+            else:
+                raise HTTPError(405, f"Method {method} is not allowed")
+        except HTTPError as e:
+            return e.status, {}, json.dumps({"error": str(e)}).encode()
+        except (ValueError, KeyError, TypeError, OSError):  # includes bad JSON and gzip
+            return 400, {}, b'{"error": "Invalid request"}'
+
+        response = json.dumps(result).encode()
+        if "gzip" in headers.get("accept-encoding", ""):
+            return 200, {"Content-Encoding": "gzip"}, gzip.compress(response)
+        return 200, {}, response
+
+    def _pull(self, query: dict) -> dict:
+        """Return the changes after a cursor, and the cursor to continue from"""
+        since = int(query.get("since", ["0"])[0])
+        limit = int(query.get("limit", [str(BATCH_SIZE)])[0])
+        exclude = query.get("exclude", [""])[0]
+        if limit < 1:
+            raise HTTPError(400, "The limit must be positive")
+        rows = self._conn.execute(
+            f"""
+            SELECT seq, {", ".join(CHANGE_KEYS)} FROM changes
+            WHERE seq > ? AND device != ? ORDER BY seq LIMIT ?
+            """,
+            (since, exclude, limit),
+        ).fetchall()
+        more = len(rows) == limit
+        if more:
+            cursor = rows[-1][0]
+        else:  # nothing else to send, skip the excluded device's own changes too
+            cursor = self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+            cursor = max(cursor, since)
+        return {
+            "changes": [dict(zip(CHANGE_KEYS, row[1:])) for row in rows],
+            "cursor": cursor,
+            "more": more,
+        }
+
+    def _push(self, payload: dict) -> dict:
+        """Append the changes of a device, and return the latest cursor"""
+        device = payload["device"]
+        rows = []
+        for change in payload["changes"]:
+            if change["device"] != device:
+                raise HTTPError(400, "Devices may only push their own changes")
+            rows.append(tuple(change[key] for key in CHANGE_KEYS))
+        with self._conn:
+            self._conn.executemany(
+                f"INSERT INTO changes ({', '.join(CHANGE_KEYS)}) VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        cursor = self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+        return {"cursor": cursor}
+
+
+def serve(host: str = "127.0.0.1", port: int = 8766, path: str = ":memory:"):
+    """Run the reference sync server until interrupted"""
+    server = SyncServer(host, port, path)
+
+    async def main():
+        await server.start()
+        print(f"Sync server on http://{server.host}:{server.port} (Ctrl+C to stop)")
+        await server.serve_forever()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -1,15 +1,26 @@
 import os
+import random
+import statistics
 import tempfile
+import time
+from collections import defaultdict
 from datetime import datetime, date, timedelta
 
-from . import habits
+from . import analytics, db_handler, habits
 from .db_handler import initialize_database, set_db_path
 from .habits import load_habits
-from .cli.app import HabitTrackerApp
-from .cli.utils import clear_screen, radio_list, calendar_picker
 
 
 def run():
+    from .cli.router import ROUTER
+
+    ROUTER.run(_harness)
+
+
+async def _harness():
+    from .cli.app import HabitTrackerApp
+    from .cli.utils import radio_list, calendar_picker
+
     # create temporary database file
     tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".db")
     tmp_path = tmp.name
@@ -31,9 +42,10 @@ def run():
     # main menu
     try:
         while True:
-            print(f"Now: {habits.now().date()}")
-            choice = radio_list(["Run App", "Change Date", "Reset Database", "Exit"])
-            clear_screen()
+            choice = await radio_list(
+                ["Run App", "Change Date", "Reset Database", "Exit"],
+                title=f"Now: {habits.now().date()}",
+            )
 
             if choice == "Exit":
                 break
@@ -44,14 +56,14 @@ def run():
                 if first_run:
                     habits.seed_sample_data()
                     first_run = False
-                HabitTrackerApp().run()
+                await HabitTrackerApp().main()
 
             elif choice == "Change Date":
-                print("Select new current date:")
-                new_date = calendar_picker(
+                new_date = await calendar_picker(
                     default=fake_today or base_real_date,
                     min_date=habits.first_start().date(),
                     max_date=date.max,
+                    title="Select new current date:",
                 )
                 if new_date:
                     fake_today = new_date
@@ -66,12 +78,231 @@ def run():
                 tmp.close()
                 set_db_path(tmp_path)
 
-            clear_screen()
-
     # reset state on exit or error
     finally:
         habits.now = original_now
-        try:
-            os.remove(tmp_path)
-        except Exception:
-            pass
\ No newline at end of file
+        for path in (tmp_path, f"{tmp_path}.snapshot"):
+            try:
+                os.remove(path)
+            except Exception:
+                pass
+
+
+class UsageModel:
+    """
+    Completion behaviour of a simulated user
+
+    Every simulated day, each habit that is not complete for its period yet
+    is completed with its probability times the multiplier of the weekday.
+
+    Attrs:
+        default (float): daily completion probability of habits without their own
+        habits (dict[str, float]): daily completion probability by habit name
+        weekdays (list[float]): probability multiplier per weekday, Monday first
+    """
+
+    def __init__(
+        self,
+        default: float = 0.7,
+        habits: dict[str, float] = None,
+        weekdays: list[float] = None,
+    ):
+        self.default = default
+        self.habits = habits or {}
+        self.weekdays = weekdays or [1.0] * 7
+
+    @classmethod
+    def from_file(cls, path: str) -> "UsageModel":
+        """Load a scripted model from a JSON file with the attributes as keys"""
+        import json
+
+        with open(path) as f:
+            return cls(**json.load(f))
+
+    @classmethod
+    def randomized(cls, names: list[str], rng: random.Random) -> "UsageModel":
+        """Return a model with random habit probabilities and lazier weekends"""
+        return cls(
+            habits={name: rng.uniform(0.3, 0.95) for name in names},
+            weekdays=[1.0] * 5 + [rng.uniform(0.4, 1.0) for _ in range(2)],
+        )
+
+    def completes(self, habit: habits.Habit, day: date, rng: random.Random) -> bool:
+        """Return whether the user completes the habit on the given day"""
+        probability = self.habits.get(habit.name, self.default)
+        return rng.random() < probability * self.weekdays[day.weekday()]
+
+
+def simulate(
+    days: int = 365,
+    habit_count: int = None,
+    model: UsageModel = None,
+    seed: int = 0,
+    start: date = date(2024, 1, 1),
+    checkpoint: int = 30,
+) -> dict:
+    """Replay simulated usage against a temporary database and return timings
+
+    Every simulated day the app is opened (load_habits), the current period of
+    every habit is looked up, habits are completed according to the usage model
+    and the app is closed (save_habits). Analytics are looked at every Sunday.
+    All of it runs through the real habits, db_handler and analytics code.
+
+    Args:
+        days (int): number of simulated days
+        habit_count (int): number of generated habits, None for the sample data
+        model (UsageModel): usage model, None for a randomized one
+        seed (int): seed of the simulation, equal arguments give equal runs
+        start (date): first simulated day
+        checkpoint (int): number of days between checkpoints in the report
+    """
+    from .benchmarks.dataset import PERIODICITIES
+
+    if days < 1:
+        raise ValueError("Simulate at least one day")
+    rng = random.Random(seed)
+
+    clock = datetime.combine(start, datetime.min.time())
+    latencies: dict[str, list[float]] = defaultdict(list)  # stage -> seconds
+    window: dict[str, list[float]] = defaultdict(list)  # since the last checkpoint
+    checkpoints = []
+
+    def timed(stage: str, func, *args):
+        began = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - began
+        latencies[stage].append(elapsed)
+        window[stage].append(elapsed)
+        return result
+
+    original = (habits.now, db_handler.DB_PATH)
+    habits.now = lambda: clock
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            set_db_path(os.path.join(temp_dir, "habits.db"))
+            initialize_database()
+            load_habits()
+            if habit_count is None:
+                habits.seed_sample_data()
+            else:
+                for i, (amount, unit) in enumerate(
+                    rng.choices(
+                        list(PERIODICITIES),
+                        weights=list(PERIODICITIES.values()),
+                        k=habit_count,
+                    )
+                ):
+                    habits.HABITS.create_habit(
+                        {
+                            "name": f"Habit {i}",
+                            "periodicity": {"amount": amount, "unit": unit},
+                            "notes": "",
+                        }
+                    )
+            habits.save_habits()
+            if model is None:
+                names = [habit.name for habit in habits.HABITS.get_habits().values()]
+                model = UsageModel.randomized(names, rng)
+
+            began = time.perf_counter()
+            for day_index in range(days):
+                day = start + timedelta(days=day_index)
+                clock = datetime.combine(day, datetime.min.time()) + timedelta(
+                    minutes=rng.randrange(6 * 60, 23 * 60)
+                )
+
+                timed("load", load_habits)
+                habit_list = list(habits.HABITS.get_habits().values())
+                for habit in habit_list:
+                    period = timed("get_period", habit.get_period)
+                    if not habit.get_completed(period) and model.completes(
+                        habit, day, rng
+                    ):
+                        timed("complete", habit.toggle_completed)
+                if day.weekday() == 6:
+                    timed("analytics", _look_at_analytics, habit_list)
+                timed("save", habits.save_habits)
+
+                if (day_index + 1) % checkpoint == 0 or day_index == days - 1:
+                    checkpoints.append(
+                        {
+                            "day": day.isoformat(),
+                            "periods": sum(len(h.periods) for h in habit_list),
+                            "completions": sum(len(h.completions) for h in habit_list),
+                            "p50_ms": {
+                                stage: round(statistics.median(samples) * 1000, 3)
+                                for stage, samples in window.items()
+                            },
+                        }
+                    )
+                    window.clear()
+            elapsed = time.perf_counter() - began
+    finally:
+        habits.now, db_handler.DB_PATH = original
+
+    return {
+        "parameters": {
+            "days": days,
+            "habits": len(habit_list),
+            "seed": seed,
+            "start": start.isoformat(),
+        },
+        "elapsed_s": round(elapsed, 3),
+        "simulated_days_per_s": round(days / elapsed, 2) if elapsed else None,
+        "stages": {
+            stage: _summarize(samples) for stage, samples in latencies.items()
+        },
+        "checkpoints": checkpoints,
+    }
+
+
+def format_report(report: dict) -> str:
+    """Return a simulation report as text"""
+    parameters = report["parameters"]
+    lines = [
+        f"Simulated {parameters['days']} days of {parameters['habits']} habits"
+        f" in {report['elapsed_s']:.2f}s ({report['simulated_days_per_s']} days/s)",
+        "",
+        f"{'stage':<12}{'calls':>8}{'ops/s':>12}{'p50':>10}{'p95':>10}{'max':>10}",
+    ]
+    for stage, summary in report["stages"].items():
+        lines.append(
+            f"{stage:<12}{summary['calls']:>8}{summary['ops_per_s']:>12.1f}"
+            f"{summary['p50_ms']:>8.2f}ms{summary['p95_ms']:>8.2f}ms"
+            f"{summary['max_ms']:>8.2f}ms"
+        )
+    lines += ["", f"{'until':<12}{'periods':>10}{'load p50':>12}{'save p50':>12}"]
+    for point in report["checkpoints"]:
+        p50 = point["p50_ms"]
+        lines.append(
+            f"{point['day']:<12}{point['periods']:>10}"
+            f"{p50.get('load', 0):>10.2f}ms{p50.get('save', 0):>10.2f}ms"
+        )
+    return "\n".join(lines)
+
+
+def _look_at_analytics(habit_list: list[habits.Habit]):
+    """Compute what the analytics screen shows for all habits"""
+    analytics.set_period()
+    for habit in habit_list:
+        habit_analytics = analytics.HabitAnalytics(habit)
+        habit.get_streak(analytics.UNTIL)
+        habit_analytics.highest_streak()
+        habit_analytics.completion_rate()
+    group = analytics.GroupAnalytics(habit_list)
+    group.highest_streak()
+    group.average_completion_rate()
+
+
+def _summarize(samples: list[float]) -> dict:
+    """Return the call count, throughput and latency percentiles of a stage"""
+    ordered = sorted(samples)
+    total = sum(ordered)
+    return {
+        "calls": len(ordered),
+        "total_ms": round(total * 1000, 3),
+        "ops_per_s": round(len(ordered) / total, 1) if total else 0.0,
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "p95_ms": round(ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
@@ -117,4 +117,71 @@ def test_analytics_all_periods_completed():
 def test_group_analytics_empty():
     """Test group analytics with no habits"""
     group_analytics = analytics.GroupAnalytics([])
-    assert group_analytics.total_periods() == 0
\ No newline at end of file
+    assert group_analytics.total_periods() == 0
+def test_heatmap_counts_days_from_the_bitmap():
+    """The heatmap starts on the Monday before January 1 and counts habits per day."""
+    first = habits.Habit("first")
+    first.completions = [
+        datetime(2022, 12, 31, 9),
+        datetime(2023, 1, 2, 9),
+        datetime(2023, 1, 2, 18),
+        datetime(2024, 1, 1, 9),
+    ]
+    second = habits.Habit("second")
+    second.completions = [datetime(2023, 1, 2, 7), datetime(2023, 12, 31, 7), datetime(2013, 6, 1)]
+
+    assert analytics.heatmap_start(2023) == datetime(2022, 12, 26).date()
+    counts = analytics.heatmap([first, second], 2023)
+    assert len(counts) == 53 * 7
+    assert {i: count for i, count in enumerate(counts) if count} == {5: 1, 7: 2, 370: 1}
+    assert len(analytics.heatmap([], 2012)) == 54 * 7  # leap year starting on a Sunday
+
+    cached = first.completion_days()
+    assert first.completion_days() is cached
+    first.completions.append(datetime(2023, 3, 1))
+    assert first.completion_days() is not cached
+    assert analytics.heatmap([first], 2023)[(datetime(2023, 3, 1) - datetime(2022, 12, 26)).days] == 1
+
+def test_co_completion_counts_shared_days_and_weeks(monkeypatch):
+    """Pairs count the days (or weeks) both habits were completed on, with a phi correlation."""
+    monkeypatch.setattr(habits, "now", lambda: datetime(2023, 1, 8, 12))
+    analytics.set_period(datetime(2023, 1, 2), datetime(2023, 1, 8))  # Monday to Sunday
+    read, run, swim, never = (habits.Habit(name, name) for name in ("read", "run", "swim", "never"))
+    for habit in (read, run, swim, never):
+        habit.start_date = datetime(2023, 1, 1)
+    read.completions = [datetime(2023, 1, day, 9) for day in (2, 3, 4)]
+    run.completions = [datetime(2023, 1, day, 18) for day in (2, 3, 4)] + [datetime(2022, 12, 1)]
+    swim.completions = [datetime(2023, 1, day, 7) for day in (5, 6, 7, 8)]
+
+    report = analytics.GroupAnalytics([read, run, swim, never]).co_completion()
+    assert (report["since"], report["until"], report["slots"]) == ("2023-01-02", "2023-01-08", 7)
+    assert [habit["completed"] for habit in report["habits"]] == [3, 3, 4, 0]
+    assert report["both"][0] == [3, 3, 0, 0]
+    assert report["correlation"][0][1] == pytest.approx(1.0)
+    assert report["correlation"][0][2] == pytest.approx(-1.0)
+    assert report["correlation"][0][3] is None  # never completed
+    assert analytics.strongest_pairs(report, 1) == [
+        {"habits": ("read", "run"), "both": 3, "correlation": pytest.approx(1.0)}
+    ]
+
+    analytics.set_period(datetime(2022, 12, 1), datetime(2023, 1, 8))
+    weekly = analytics.GroupAnalytics([read, run, swim]).co_completion("weeks")
+    assert weekly["since"] == "2022-11-28" and weekly["slots"] == 6
+    assert [habit["completed"] for habit in weekly["habits"]] == [1, 2, 1]
+    assert weekly["both"][0] == [1, 1, 1]
+
+def test_summary_matches_separate_metrics(sample_habit):
+    """The one-pass summary agrees with the separate metrics in any time frame."""
+    for since, until in [
+        (datetime(2023, 1, 1), datetime(2023, 1, 4)),
+        (datetime(2023, 1, 2), datetime(2023, 1, 2, 12)),
+        (datetime.min, datetime.max),
+    ]:
+        analytics.set_period(since, until)
+        habit_analytics = analytics.HabitAnalytics(sample_habit)
+        assert habit_analytics.summary() == {
+            "highest_streak": habit_analytics.highest_streak(),
+            "completed_periods": habit_analytics.completed_periods(),
+            "total_periods": habit_analytics.total_periods(),
+            "completion_rate": habit_analytics.completion_rate(),
+        }
@@ -0,0 +1,43 @@
+"""Test the synthetic dataset generator and the benchmark suite"""
+
+from src.habittracker import habits
+from src.habittracker.benchmarks import dataset, suite
+
+
+def test_dataset_is_deterministic():
+    """Equal arguments give equal datasets, other seeds give other ones."""
+    first = dataset.generate(10, 1, seed=1)
+    assert first == dataset.generate(10, 1, seed=1)
+    assert first != dataset.generate(10, 1, seed=2)
+
+
+def test_dataset_shape():
+    """Periods are contiguous up to the end and completions fall inside them."""
+    data = dataset.generate(20, 0.5, density=0.5)
+    assert len(data) == 20
+    end = dataset.END.isoformat()
+    for entry in data.values():
+        periods = entry["periods"]
+        assert periods[0]["start"] == entry["habit"]["start_date"]
+        assert all(a["end"] == b["start"] for a, b in zip(periods, periods[1:]))
+        assert periods[-1]["start"] <= end < periods[-1]["end"]
+        assert len(entry["completions"]) <= len(periods)
+        assert all(c < end for c in entry["completions"])
+
+
+def test_suite_reports_every_benchmark():
+    """A small run times every benchmark and restores the global state."""
+    original_now = habits.now
+    report = suite.run(habit_count=3, years=0.1, repeat=1)
+    assert habits.now is original_now
+    assert report["parameters"]["habits"] == 3
+    names = set(report["results"])
+    assert {"load_habits", "save_habits", "Habit.get_streak", "HabitManager._render"} <= names
+    assert {f"GroupAnalytics.{metric}" for metric in suite.GROUP_METRICS} <= names
+
+
+def test_compare_flags_regressions():
+    """Only benchmarks slower than the tolerance are reported."""
+    baseline = {"results": {"a": {"median_ms": 10.0}, "b": {"median_ms": 10.0}}}
+    report = {"results": {"a": {"median_ms": 20.0}, "b": {"median_ms": 11.0}, "c": {"median_ms": 1.0}}}
+    assert suite.compare(report, baseline, 1.25) == {"a": 2.0}
@@ -0,0 +1,44 @@
+"""Test swapping views in the single CLI application"""
+
+import asyncio
+from datetime import date
+
+from prompt_toolkit.application import create_app_session
+from prompt_toolkit.input import create_pipe_input
+from prompt_toolkit.output import DummyOutput
+
+from src.habittracker.cli.router import ROUTER
+from src.habittracker.cli.utils import calendar_picker, radio_list, text_input
+
+
+def test_views_share_one_application():
+    """Test that successive views run in the same application and are timed."""
+    results = []
+    apps = []
+
+    with create_pipe_input() as pipe, create_app_session(input=pipe, output=DummyOutput()):
+
+        def send_later(keys):
+            """Type keys once the next view has been drawn"""
+            asyncio.get_running_loop().call_later(0.05, pipe.send_text, keys)
+
+        async def flow():
+            send_later("\x1b[B\r")  # down, enter
+            results.append(await radio_list(["Habits", "Analytics"], title="Menu"))
+            apps.append(ROUTER.app)
+
+            send_later("\x7f\x7funs\r")  # backspace twice, type, enter
+            results.append(await text_input("Name: ", default="Run"))
+            apps.append(ROUTER.app)
+
+            send_later("\x1b[C\r")  # right, enter
+            results.append(await calendar_picker(default=date(2023, 1, 1)))
+            apps.append(ROUTER.app)
+
+        ROUTER.timings.clear()
+        ROUTER.run(flow)
+
+    assert results == ["Analytics", "Runs", date(2023, 1, 2)]
+    assert apps[0] is apps[1] is apps[2]
+    assert [name for name, _ in ROUTER.timings] == ["radio_list", "text_input", "calendar_picker"]
+    assert "radio_list" in ROUTER.report_timings()
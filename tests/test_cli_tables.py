@@ -1,29 +1,41 @@
 """Test rendering of HabitManager and AnalyticsViewer tables"""
 
+import asyncio
+from datetime import datetime
+
 import pytest
-from unittest.mock import MagicMock
 
-from src.habittracker import habits
+from src.habittracker import analytics, habits
+from src.habittracker.cli.habit_table import HabitTable
 from src.habittracker.cli.habit_manager import HabitManager
 from src.habittracker.cli.analytics_viewer import AnalyticsViewer
+from src.habittracker.cli.due_soon import DueSoonView
+from src.habittracker.cli.heatmap import CELL, SHADES, render_heatmap
 
 
 @pytest.fixture(autouse=True)
 def app_with_sample_habits(monkeypatch):
-    """Add sample habits and mock Application"""
-    # prompt_toolkit does not like being in a test environment
-    monkeypatch.setattr(
-        "src.habittracker.cli.habit_table.Application",
-        MagicMock()
-    )
+    """Add sample habits with fixed-size pages"""
+    monkeypatch.setattr(HabitTable, "_ROWS_PER_PAGE", 4)
     
     # Sample habits
     habits.HABITS.habits.clear()
     habits.HABITS.habits = {
         "uuid1": habits.Habit("uuid1", "Habit One", {"amount": 1, "unit": "days"}, "Notes for habit one"),
         "uuid2": habits.Habit("uuid2", "Habit Two", {"amount": 2, "unit": "weeks"}, "Notes for habit two"),
-        "uuid3": habits.Habit("uuid3", "Habit Three but really really really really really really really really really really long", {"amount": 3, "unit": "months"}, "Notes for habit three"),
-        "uuid4": habits.Habit("uuid4", "Habit Four", {"amount": 4, "unit": "years"}, "Really really really really really really really really really really really long notes for habit four to test wrapping"),
+        "uuid3": habits.Habit(
+            "uuid3",
+            "Habit Three but really really really really really really really really really really long",
+            {"amount": 3, "unit": "months"},
+            "Notes for habit three",
+        ),
+        "uuid4": habits.Habit(
+            "uuid4",
+            "Habit Four",
+            {"amount": 4, "unit": "years"},
+            "Really really really really really really really really really really really long notes"
+            " for habit four to test wrapping",
+        ),
         "uuid5": habits.Habit("uuid5", "Habit Five", {"amount": 1, "unit": "days"}),
         "uuid6": habits.Habit("uuid6", "Habit Six", {"amount": 1, "unit": "days"}),
         "uuid7": habits.Habit("uuid7", "Habit Seven", {"amount": 1, "unit": "days"}),
@@ -105,4 +117,314 @@ def test_display_analytics_viewer(app_with_sample_habits):
     assert "← Page 1/2 →" in full_output
     assert "[Overall Analytics]" in full_output
     assert "[Filter Habits]" in full_output
-    assert "[Back]" in full_output
\ No newline at end of file
+    assert "[Back]" in full_output
+
+def test_rows_per_page_fits_terminal(monkeypatch):
+    """Test that pages are sized to the terminal height when not fixed."""
+    monkeypatch.setattr(HabitTable, "_ROWS_PER_PAGE", None)
+    monkeypatch.setenv("LINES", "13")
+    app = HabitManager()
+    app._reload_table()
+    full_output = "".join([fragment[1] for fragment in app._render()])
+
+    assert app._rows_per_page() == 4
+    assert "← Page 1/2 →" in full_output
+    assert "Habit Four" in full_output and "Habit Five" not in full_output
+
+
+def test_table_navigation_jumps():
+    """Test goto-row, home/end, and page jumps in the table."""
+    app = HabitManager()
+    app._reload_table()
+
+    app._move_to(5)
+    assert app.page == 1 and app.selected_row == 1
+    assert app._get_selected_habit().name == "Habit Six"
+
+    app._move_to(len(app.habit_ids) + 10)  # clamped to the last row
+    assert app._get_selected_habit().name == "Habit Seven"
+
+    app._move_to_page(0)
+    assert app.cursor == 0 and not app.on_buttons
+
+    app._move_to_page(app.page + app._PAGE_JUMP)
+    assert app.page == 1 and app.selected_row == 0
+
+
+def test_reload_keeps_row_order_until_habits_change():
+    """Test that reloading reuses the row order until a habit is added."""
+    app = HabitManager()
+    app._reload_table()
+    habit_ids = app.habit_ids
+
+    app._reload_table()
+    assert app.habit_ids is habit_ids
+
+    habits.HABITS.create_habit(
+        {"name": "Habit Eight", "periodicity": {"amount": 1, "unit": "days"}, "notes": ""}
+    )
+    app._reload_table()
+    assert app.habit_ids is not habit_ids
+    assert len(app.habit_ids) == 8
+
+
+def test_sort_by_column_is_stable_and_reversible():
+    """Test sorting rows by a column in both directions."""
+    app = HabitManager()
+    app._reload_table()
+
+    app._set_sort("Completed")
+    assert app.habit_ids[:5] == ["uuid3", "uuid4", "uuid5", "uuid6", "uuid7"]
+    assert app.habit_ids[5:] == ["uuid1", "uuid2"]
+
+    app._set_sort("Completed", reverse=True)
+    assert app.habit_ids == ["uuid1", "uuid2", "uuid3", "uuid4", "uuid5", "uuid6", "uuid7"]
+    assert "Sort: Completed ▼" in "".join(fragment[1] for fragment in app._render())
+
+    app._set_sort(None)
+    assert app.habit_ids == list(habits.HABITS.habits.keys())
+
+
+def test_refresh_row_resorts_only_changed_habit(monkeypatch):
+    """Test that a changed habit is re-inserted without recomputing other keys."""
+    app = HabitManager()
+    app._reload_table()
+    app._set_sort("Streak", reverse=True)
+
+    calls = []
+    streak_key = app._COLUMNS["Streak"]["sort"]
+    app._COLUMNS["Streak"]["sort"] = lambda habit: calls.append(habit.uuid) or streak_key(habit)
+
+    habits.HABITS.habits["uuid7"].toggle_completed()
+    app._refresh_row("uuid7")
+    assert calls == ["uuid7"]
+    assert app.habit_ids[:3] == ["uuid1", "uuid2", "uuid7"]
+
+    habits.HABITS.delete_habit("uuid2")
+    app._refresh_row("uuid2")
+    app._reload_table()
+    assert calls == ["uuid7"]
+    assert app.habit_ids[:2] == ["uuid1", "uuid7"]
+    assert "uuid2" not in app.habit_ids
+
+
+def test_sort_keys_dropped_when_a_period_ends_or_habits_change(monkeypatch):
+    """Test that time-dependent sort keys are recomputed once the current period ended."""
+    clock = {"now": datetime(2023, 1, 1, 12, 0)}
+    monkeypatch.setattr(habits, "now", lambda: clock["now"])
+    for habit in habits.HABITS.habits.values():
+        habit.start_date = datetime(2023, 1, 1)
+        habit.periods = []
+        habit.completions = []
+
+    habits.HABITS.habits["uuid5"].increment()
+    app = HabitManager()
+    app._reload_table()
+    app._set_sort("Completed", reverse=True)
+    assert app.habit_ids[0] == "uuid5"
+
+    clock["now"] = datetime(2023, 1, 2, 12, 0)  # a new day, uuid5 is incomplete again
+    app._reload_table()
+    assert app.habit_ids == list(habits.HABITS.habits.keys())
+
+    calls = []
+    completed_key = app._COLUMNS["Completed"]["sort"]
+    app._COLUMNS["Completed"]["sort"] = lambda habit: calls.append(habit.uuid) or completed_key(habit)
+    habits.HABITS.create_habit({"uuid": "uuid8", "name": "Habit Eight", "periodicity": {"amount": 1, "unit": "days"}})
+    app._reload_table()
+    assert len(calls) == 8
+
+
+def test_search_narrows_rows_per_keystroke():
+
+    """Test that typing a search query narrows the table rows."""
+    app = HabitManager()
+    app._reload_table()
+
+    app._set_search("f")
+    assert app.habit_ids == ["uuid1", "uuid2", "uuid3", "uuid4", "uuid5"]
+    app._set_search("fi")
+    assert app.habit_ids == ["uuid5"]
+    app._set_search("f")
+    assert app.habit_ids == ["uuid1", "uuid2", "uuid3", "uuid4", "uuid5"]
+    app._set_search("fiv")
+
+    full_output = "".join([fragment[1] for fragment in app._render()])
+    assert "Search: fiv" in full_output
+    assert "Habit Five" in full_output and "Habit One" not in full_output
+
+    app._set_search("")
+    assert app.habit_ids == list(habits.HABITS.habits.keys())
+
+
+def test_deferred_analytics_cells_fill_in():
+    """Test that slow analytics columns render placeholders and fill in later."""
+    app = AnalyticsViewer()
+    app._reload_table()
+
+    async def render_twice():
+        first = "".join(fragment[1] for fragment in app._render())
+        await asyncio.gather(*app._pending.values())
+        second = "".join(fragment[1] for fragment in app._render())
+        return first, second
+
+    first, second = asyncio.run(render_twice())
+    assert app._PLACEHOLDER in first
+    assert app._PLACEHOLDER not in second
+    assert "0.00%" in second
+
+
+def test_deferred_cells_read_snapshots_and_show_errors(monkeypatch):
+    """Test that workers only see copies of the habits, and failures render a marker."""
+    app = AnalyticsViewer()
+    app._reload_table()
+    seen = []
+
+    def fail(habit):
+        seen.append(habit)
+        raise ZeroDivisionError
+
+    monkeypatch.setitem(app._COLUMNS, "Streak", {**app._COLUMNS["Streak"], "value": fail})
+
+    async def render_twice():
+        app._render()
+        await asyncio.gather(*app._pending.values(), return_exceptions=True)
+        return "".join(fragment[1] for fragment in app._render())
+
+    output = asyncio.run(render_twice())
+    assert app._ERROR in output
+    assert seen and not any(habit is habits.HABITS.get_habit(habit.uuid) for habit in seen)
+    assert all(habit.storage is None for habit in seen)
+
+
+def test_deferred_sort_keys_computed_off_the_ui_thread(monkeypatch):
+    """Test that sorting by a deferred column keeps table order until the worker sorted it."""
+    app = AnalyticsViewer()
+    app._reload_table()
+    table_order = list(app.habit_ids)
+    seen = []
+
+    def streak(habit):
+        seen.append(habit)
+        return -int(habit.uuid.removeprefix("uuid"))
+
+    monkeypatch.setitem(app._COLUMNS, "Streak", {**app._COLUMNS["Streak"], "sort": streak})
+
+    async def sort():
+        app._set_sort("Streak")
+        before = list(app.habit_ids)
+        await app._sort_pending
+        await asyncio.sleep(0)  # let the done callback sort the rows
+        return before
+
+
+    assert asyncio.run(sort()) == table_order
+    assert app.habit_ids == sorted(table_order, reverse=True)
+    assert len(seen) == len(table_order)
+    assert not any(habit is habits.HABITS.get_habit(habit.uuid) for habit in seen)
+
+
+def test_deferred_cells_cancelled_when_paging():
+
+    """Test that pending cells of a page that was left are cancelled."""
+    app = AnalyticsViewer()
+    app._reload_table()
+
+    async def render_pages():
+        app._render()
+        first_page = {uuid for _, uuid in app._pending}
+        app._move_to_page(1)
+        app._render()
+        second_page = {uuid for _, uuid in app._pending}
+        app._invalidate_cells()
+        return first_page, second_page
+
+    first_page, second_page = asyncio.run(render_pages())
+    assert first_page == {"uuid1", "uuid2", "uuid3", "uuid4"}
+    assert second_page == {"uuid5", "uuid6", "uuid7"}
+    assert not app._pending
+
+
+def test_due_soon_lists_incomplete_habits_soonest_first(monkeypatch):
+    """Test that the due soon view hides completed habits and orders by period end."""
+    storage = habits.HabitStorage()
+    monkeypatch.setattr(habits, "HABITS", storage)
+    monkeypatch.setattr(habits, "save_habits", lambda: None)
+    monkeypatch.setattr(habits, "now", lambda: datetime(2023, 1, 1, 21, 30))
+    for habit_uuid, name, unit in [("w", "Weekly", "weeks"), ("d", "Daily", "days"), ("d2", "Daily Two", "days")]:
+        storage.create_habit(
+            {"uuid": habit_uuid, "name": name, "periodicity": {"amount": 1, "unit": unit}, "notes": ""}
+        )
+    storage.get_habit("d2").toggle_completed()
+
+    app = DueSoonView()
+    app._reload_table()
+    assert app.habit_ids == ["d", "w"]
+    output = "".join(fragment[1] for fragment in app._render())
+    assert "Daily Two" not in output
+    assert "2h 30m" in output and "6d 2h" in output
+
+    asyncio.run(app._action_complete())  # the selected row, "Daily"
+    app._reload_table()
+    assert app.habit_ids == ["w"]
+
+def test_render_heatmap():
+    """The heatmap has a row per weekday, blank outside the year and after today."""
+    counts = [0] * (53 * 7)
+    counts[7] = 2  # Monday, January 2 2023
+    counts[8] = 1
+    fragments = render_heatmap(counts, 2023, 2, today=datetime(2023, 1, 3).date())
+    text = "".join(fragment[1] for fragment in fragments)
+    lines = text.split("\n")
+    assert lines[0] == "2023"
+    assert lines[1].startswith("    Jan")
+    assert lines[2].startswith("Mon ")
+    assert "2 days with completions" in text
+
+    cells = [fragment for fragment in fragments if fragment[1] == CELL]
+    assert cells[:3] == [(SHADES[4], CELL), (SHADES[2], CELL), (SHADES[0], CELL)]  # Mon, Tue, Sun rows
+    assert len(cells) == 3 + len(SHADES)  # Jan 1 to 3, then the legend
+    assert analytics.heatmap_start(2023).weekday() == 0
+
+def test_batch_complete_marked_habits(monkeypatch):
+    """Test that marked habits are completed together and saved in one batch."""
+    saved = []
+    monkeypatch.setattr(
+        habits,
+        "save_batch",
+        lambda changed, deleted=(), groups=False: saved.append((sorted(changed), list(deleted), groups)),
+    )
+    app = HabitManager()
+    app._reload_table()
+
+    def press(key):
+        binding = next(b for b in app.kb.bindings if b.keys == (key,) and b.filter())
+        binding.handler(None)
+
+    press(" ")  # Habit One, already complete
+    app._move_to(4)
+    press(" ")  # Habit Five
+    assert app.marked == {"uuid1", "uuid5"}
+    output = "".join(fragment[1] for fragment in app._render())
+    assert "Marked: 2" in output
+
+    async def choose(options, default=None, title=""):
+        return "Mark complete"
+
+    monkeypatch.setattr("src.habittracker.cli.habit_manager.radio_list", choose)
+    app._set_sort("Completed")
+    asyncio.run(app._action_batch())
+    assert habits.HABITS.get_habit("uuid5").completed
+    assert saved == [(["uuid5"], [], False)]  # only the habit that changed
+
+    fresh = HabitManager()
+    fresh._reload_table()
+    fresh._set_sort("Completed")
+    app._reload_table()
+    assert app.habit_ids == fresh.habit_ids  # the changed row moved with its new sort key
+    assert app.habit_ids[-3:] == ["uuid1", "uuid2", "uuid5"]
+
+    press("a")
+    assert app.marked == set(app.habit_ids)
+    press("a")
+    assert app.marked == set()
@@ -0,0 +1,174 @@
+"""Test the non-interactive scripting commands"""
+
+import json
+import tempfile
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.habittracker import commands, db_handler, habits
+
+NOW = datetime(2023, 1, 10, 12, 0)
+
+
+@pytest.fixture(autouse=True)
+def use_temp_db(monkeypatch):
+    """Use a temporary database holding two daily habits, one with history."""
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".db")
+    temp_file.close()
+    original_path = db_handler.DB_PATH
+    db_handler.set_db_path(temp_file.name)
+    db_handler.initialize_database()
+    monkeypatch.setattr(habits, "now", lambda: NOW)
+
+    start = datetime(2023, 1, 1)
+    periods = [
+        {"start": (start + timedelta(days=i)).isoformat(), "end": (start + timedelta(days=i + 1)).isoformat()}
+        for i in range(5)  # last stored period ends on Jan 6
+    ]
+    daily = {"periodicity_amount": 1, "periodicity_unit": "days", "notes": "", "start_date": start.isoformat()}
+    db_handler.save_all(
+        {
+            "uuid-1": {
+                "habit": {"name": "Exercise", **daily},
+                "periods": periods,
+                "completions": [(start + timedelta(days=i, hours=9)).isoformat() for i in range(5)],
+            },
+            "uuid-2": {
+                "habit": {"name": "Read", **daily},
+                "periods": periods,
+                "completions": [],
+            },
+        }
+    )
+    yield
+    db_handler.set_db_path(original_path)
+
+
+def test_load_all_recent_only_reads_latest_period():
+    """Recent loads return the latest period and the completions since its start."""
+    data = db_handler.load_all(["uuid-1"], recent=True)
+    assert list(data) == ["uuid-1"]
+    assert data["uuid-1"]["periods"] == [{"start": "2023-01-05T00:00:00", "end": "2023-01-06T00:00:00"}]
+    assert data["uuid-1"]["completions"] == ["2023-01-05T09:00:00"]
+
+
+def test_complete_by_name_appends_missing_periods(capsys):
+    """Completing by name fills in missed periods and adds one completion."""
+    assert commands.complete("exercise") == 0
+    assert "marked complete" in capsys.readouterr().out
+
+    data = db_handler.load_all(["uuid-1"])["uuid-1"]
+    assert len(data["periods"]) == 10  # up to the period containing Jan 10
+    assert data["periods"][-1]["start"] == "2023-01-10T00:00:00"
+    assert data["completions"][-1] == NOW.isoformat()
+
+    assert commands.complete("uuid-1") == 0
+    assert "already complete" in capsys.readouterr().out
+    assert len(db_handler.load_all(["uuid-1"])["uuid-1"]["completions"]) == 6
+
+
+def test_complete_undo_removes_current_completion():
+    """--undo only removes completions of the current period."""
+    commands.complete("Exercise")
+    commands.complete("Exercise", undo=True)
+    assert len(db_handler.load_all(["uuid-1"])["uuid-1"]["completions"]) == 5
+
+
+def test_complete_habit_without_stored_periods():
+    """The first periods are written along with the completion when none were stored."""
+    db_handler.save_all(
+        {
+            "uuid-3": {
+                "habit": {
+                    "name": "Stretch",
+                    "periodicity_amount": 1,
+                    "periodicity_unit": "days",
+                    "notes": "",
+                    "start_date": "2023-01-08T00:00:00",
+                },
+                "periods": [],
+                "completions": [],
+            },
+        }
+    )
+    assert commands.complete("Stretch") == 0
+    data = db_handler.load_all(["uuid-3"])["uuid-3"]
+    assert [period["start"] for period in data["periods"]] == [f"2023-01-{day:02}T00:00:00" for day in (8, 9, 10)]
+    assert data["completions"] == [NOW.isoformat()]
+
+
+def test_complete_unknown_or_ambiguous_habit(capsys):
+    """Unknown and ambiguous names fail without writing anything."""
+    assert commands.complete("Nothing") == 1
+    db_handler.save_all(
+        {
+            **db_handler.load_all(),
+            "uuid-3": {
+                "habit": {
+                    "name": "read",
+                    "periodicity_amount": 1,
+                    "periodicity_unit": "weeks",
+                    "notes": "",
+                    "start_date": NOW.isoformat(),
+                },
+                "periods": [],
+                "completions": [],
+            },
+        }
+    )
+    assert commands.complete("Read") == 1
+    assert "uuid-2" in capsys.readouterr().err
+
+
+def test_list_json(capsys):
+    """list --json reports the completion state of the current period."""
+    commands.complete("Read")
+    capsys.readouterr()
+    assert commands.list_habits(as_json=True) == 0
+    rows = {row["name"]: row for row in json.loads(capsys.readouterr().out)}
+    assert rows["Read"]["completed"] is True
+    assert rows["Exercise"]["completed"] is False
+    assert rows["Read"]["period_end"] == "2023-01-11T00:00:00"
+
+
+def test_stats_json(capsys):
+    """stats --json reports analytics for the requested time frame."""
+    assert commands.stats(datetime(2023, 1, 1).date(), datetime(2023, 1, 5).date(), as_json=True) == 0
+    report = json.loads(capsys.readouterr().out)
+    exercise = next(row for row in report["habits"] if row["name"] == "Exercise")
+    assert exercise["highest_streak"] == 5
+    assert exercise["completion_rate"] == 1.0
+    assert report["overall"]["average_completion_rate"] == 0.5
+
+
+def test_complete_counts_up_to_target(capsys):
+    """Completing a habit with a target adds one completion at a time."""
+    data = db_handler.load_all()
+    data["uuid-2"]["habit"]["target"] = 2
+    db_handler.save_all(data)
+
+    commands.complete("Read")
+    assert "at 1/2" in capsys.readouterr().out
+    commands.complete("Read")
+    assert "marked complete" in capsys.readouterr().out
+    commands.complete("Read")
+    assert "already complete" in capsys.readouterr().out
+
+    commands.complete("Read", undo=True)  # only the latest one
+    assert "at 1/2" in capsys.readouterr().out
+    commands.list_habits(as_json=True)
+    row = next(row for row in json.loads(capsys.readouterr().out) if row["name"] == "Read")
+    assert (row["count"], row["target"], row["completed"]) == (1, 2, False)
+
+
+def test_correlations_json(capsys):
+    """correlations --json prints the co-completion matrices in the order of the habits."""
+    commands.complete("Read")
+    capsys.readouterr()
+    assert commands.correlations(datetime(2023, 1, 1).date(), as_json=True) == 0
+    report = json.loads(capsys.readouterr().out)
+    assert [habit["name"] for habit in report["habits"]] == ["Exercise", "Read"]
+    assert report["slots"] == 10
+    assert report["both"] == [[5, 0], [0, 1]]
+    assert report["correlation"][0][1] == pytest.approx(-1 / 3)
@@ -103,4 +103,90 @@ def test_save_and_retrieve_multiple_habits():
     assert len(loaded["uuid-2"]["completions"]) == 0
     assert loaded["uuid-1"]["habit"]["periodicity_amount"] == 1
     assert loaded["uuid-2"]["habit"]["periodicity_amount"] == 7
-    assert len(loaded["uuid-2"]["completions"]) == 0
\ No newline at end of file
+    assert len(loaded["uuid-2"]["completions"]) == 0
+def test_search_index_tracks_saved_habits(monkeypatch):
+    """Test that the FTS5 search index follows inserts, updates and deletes."""
+    monkeypatch.setattr(db_handler, "SEARCH_INDEX", False)
+    db_handler.initialize_database(search_index=True)
+    assert db_handler.SEARCH_INDEX
+
+    def habit(name, notes):
+        return {
+            "habit": {
+                "name": name,
+                "periodicity_amount": 1,
+                "periodicity_unit": "days",
+                "notes": notes,
+                "start_date": "2023-01-01T00:00:00",
+            },
+            "periods": [],
+            "completions": [],
+        }
+
+    db_handler.save_all({"uuid-1": habit("Morning Run", "5km"), "uuid-2": habit("Read", "Every morning")})
+    assert sorted(db_handler.search_habits("morning")) == ["uuid-1", "uuid-2"]
+    assert db_handler.search_habits("5k") == ["uuid-1"]
+
+    db_handler.save_all({"uuid-1": habit("Evening Run", "5km")})
+    assert db_handler.search_habits("morning") == []
+    assert db_handler.search_habits("evening") == ["uuid-1"]
+
+def test_migrates_habits_without_target():
+    """Test that databases created before targets get the column, defaulting to 1"""
+    conn = sqlite3.connect(db_handler.DB_PATH)
+    conn.execute(
+        """
+        CREATE TABLE habits (
+            uuid TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            periodicity_amount INTEGER NOT NULL,
+            periodicity_unit TEXT NOT NULL,
+            notes TEXT,
+            start_date TEXT NOT NULL
+        )
+        """
+    )
+    conn.execute("INSERT INTO habits VALUES ('uuid-1', 'Old', 1, 'days', '', '2023-01-01T00:00:00')")
+    conn.commit()
+    conn.close()
+
+    db_handler.initialize_database()
+    db_handler.initialize_database()  # already migrated
+    assert db_handler.load_all()["uuid-1"]["habit"]["target"] == 1
+    conn = sqlite3.connect(db_handler.DB_PATH)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == db_handler.SCHEMA_VERSION
+    conn.close()
+
+def test_save_batch_only_touches_given_habits():
+    """Test that a batch writes its habits and deletions together, or nothing at all"""
+    db_handler.initialize_database()
+
+    def habit(name, completions):
+        return {
+            "habit": {
+                "name": name,
+                "periodicity_amount": 1,
+                "periodicity_unit": "days",
+                "notes": "",
+                "start_date": "2023-01-01T00:00:00",
+            },
+            "periods": [{"start": "2023-01-01T00:00:00", "end": "2023-01-02T00:00:00"}],
+            "completions": completions,
+        }
+
+    db_handler.save_all({"uuid-1": habit("One", []), "uuid-2": habit("Two", []), "uuid-3": habit("Three", [])})
+    db_handler.save_batch({"uuid-1": habit("One", ["2023-01-01T12:00:00"])}, deleted=["uuid-2"])
+    loaded = db_handler.load_all()
+    assert sorted(loaded) == ["uuid-1", "uuid-3"]
+    assert loaded["uuid-1"]["completions"] == ["2023-01-01T12:00:00"]
+
+    with pytest.raises(sqlite3.IntegrityError):  # membership of a habit that does not exist
+        db_handler.save_batch(
+            {"uuid-3": habit("Three", ["2023-01-01T12:00:00"])},
+            deleted=["uuid-1"],
+            groups=({"Health": None}, {"Health": {"uuid-404"}}),
+        )
+    loaded = db_handler.load_all()
+    assert sorted(loaded) == ["uuid-1", "uuid-3"]
+    assert loaded["uuid-3"]["completions"] == []
+    assert db_handler.load_groups() == ({}, {})
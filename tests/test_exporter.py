@@ -0,0 +1,101 @@
+"""Test streaming exports of habits, periods and completions"""
+
+import csv
+import gzip
+import json
+import tempfile
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from src.habittracker import commands, db_handler, exporter, habits
+
+NOW = datetime(2023, 1, 10, 12, 0)
+
+
+@pytest.fixture(autouse=True)
+def use_temp_db(monkeypatch, tmp_path):
+    """Use a temporary database holding two daily habits started on Jan 1, Exercise completed daily."""
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".db")
+    temp_file.close()
+    original_path = db_handler.DB_PATH
+    db_handler.set_db_path(temp_file.name)
+    db_handler.initialize_database()
+    monkeypatch.setattr(habits, "now", lambda: NOW)
+    monkeypatch.setattr(habits, "SNAPSHOT", False)
+    monkeypatch.setattr(db_handler, "FETCH_SIZE", 2)  # several batches per habit
+    monkeypatch.chdir(tmp_path)
+
+    start = datetime(2023, 1, 1)
+    periods = [
+        {"start": (start + timedelta(days=i)).isoformat(), "end": (start + timedelta(days=i + 1)).isoformat()}
+        for i in range(5)
+    ]
+    daily = {"periodicity_amount": 1, "periodicity_unit": "days", "start_date": start.isoformat()}
+    db_handler.save_all(
+        {
+            "uuid-1": {
+                "habit": {"name": "Exercise", "notes": "", **daily},
+                "periods": periods,
+                "completions": [(start + timedelta(days=i, hours=9)).isoformat() for i in range(5)],
+            },
+            "uuid-2": {
+                "habit": {"name": "Read", "notes": 'say "hi"', **daily},
+                "periods": periods,
+                "completions": [],
+            },
+        }
+    )
+    yield
+    db_handler.set_db_path(original_path)
+
+
+def test_csv_export_filters_by_habit_and_dates(capsys):
+    assert commands.export("out.csv.gz", keys=["exercise"], since=date(2023, 1, 2), until=date(2023, 1, 3)) == 0
+    assert "Exported 2 completions to out.csv.gz." in capsys.readouterr().out
+    with gzip.open("out.csv.gz", "rt", newline="") as f:
+        assert list(csv.reader(f)) == [
+            ["habit", "habit_uuid", "completed_at"],
+            ["Exercise", "uuid-1", "2023-01-02T09:00:00"],
+            ["Exercise", "uuid-1", "2023-01-03T09:00:00"],
+        ]
+
+    assert commands.export(table="periods", fmt="jsonl", since=date(2023, 1, 5)) == 0
+    rows = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert rows == [
+        {"habit": name, "habit_uuid": uuid, "start": "2023-01-05T00:00:00", "end": "2023-01-06T00:00:00"}
+        for name, uuid in (("Exercise", "uuid-1"), ("Read", "uuid-2"))
+    ]
+
+    assert commands.export("out.csv", keys=["Swim"]) == 1
+
+
+def test_json_export_nests_history():
+    assert exporter.export("out.json", since=date(2023, 1, 4)) == 2
+    with open("out.json") as f:
+        exported = json.load(f)
+    assert [habit["name"] for habit in exported] == ["Exercise", "Read"]
+    assert exported[1]["notes"] == 'say "hi"'
+    assert exported[0]["periods"] == [
+        {"start": "2023-01-04T00:00:00", "end": "2023-01-05T00:00:00"},
+        {"start": "2023-01-05T00:00:00", "end": "2023-01-06T00:00:00"},
+    ]
+    assert exported[0]["completions"] == ["2023-01-04T09:00:00", "2023-01-05T09:00:00"]
+    assert exported[1]["completions"] == []
+
+    assert exporter.export("empty.json", habit_uuids=[]) == 0
+    with open("empty.json") as f:
+        assert json.load(f) == []
+
+
+def test_exported_completions_import_again(capsys):
+    assert commands.export("history.jsonl") == 0
+    db_handler.save_all({})  # an empty database
+    assert commands.import_completions("history.jsonl", create="days") == 0
+    assert "Imported 5 of 5 completions" in capsys.readouterr().out
+
+    habits.load_habits()
+    (habit,) = habits.HABITS.get_habits().values()
+    assert habit.name == "Exercise"
+    assert habit.start_date == datetime(2023, 1, 1)
+    assert habit.get_streak(datetime(2023, 1, 5, 12)) == 5
@@ -0,0 +1,132 @@
+"""Test nested habit groups, their cached aggregates and their persistence"""
+
+import json
+import tempfile
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.habittracker import analytics, commands, db_handler, habits
+from src.habittracker.groups import HabitGroups
+
+NOW = datetime(2023, 1, 10, 12, 0)
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    """A storage of daily habits started on Jan 1, Exercise completed every day so far"""
+    monkeypatch.setattr(habits, "now", lambda: NOW)
+    monkeypatch.setattr(habits, "HABITS", habits.HabitStorage())
+    analytics.set_period(datetime(2023, 1, 1), NOW)
+    for name in ("Exercise", "Read", "Swim", "Cook"):
+        habits.HABITS.create_habit(
+            {"uuid": name, "name": name, "periodicity": {"amount": 1, "unit": "days"}, "notes": ""}
+        )
+        habit = habits.HABITS.get_habit(name)
+        habit.start_date = datetime(2023, 1, 1)
+        habit.periods = [{"start": datetime(2023, 1, 1), "end": datetime(2023, 1, 2)}]
+        habit.get_period()
+    habits.HABITS.get_habit("Exercise").completions = [datetime(2023, 1, day, 9) for day in range(1, 11)]
+    return habits.HABITS
+
+
+def test_nesting():
+    groups = HabitGroups(habits.HabitStorage())
+    assert groups.ensure_path("Health/Sport/Running") == "Running"
+    groups.create_group("Mind")
+    assert groups.path("Running") == ["Health", "Sport", "Running"]
+    assert groups.tree() == [("Health", 0), ("Sport", 1), ("Running", 2), ("Mind", 0)]
+
+    with pytest.raises(ValueError):
+        groups.move_group("Health", "Running")  # would be nested in itself
+    with pytest.raises(ValueError):
+        groups.create_group("Mind")
+
+    groups.delete_group("Sport")
+    assert groups.path("Running") == ["Health", "Running"]
+
+
+def test_aggregates_follow_habit_changes(storage, monkeypatch):
+    groups = storage.groups
+    groups.ensure_path("Health/Sport")
+    groups.add_habit("Sport", "Exercise")
+    groups.add_habit("Sport", "Swim")
+    groups.add_habit("Health", "Exercise")  # counted once in Health
+    groups.add_habit("Health", "Cook")
+
+    def fresh(name):
+        habit_list = [storage.get_habit(uuid) for uuid in groups.habit_uuids(name)]
+        group_analytics = analytics.GroupAnalytics(habit_list)
+        return {
+            "habits": len(habit_list),
+            "highest_streak": group_analytics.highest_streak(),
+            "completed_periods": group_analytics.completed_periods(),
+            "total_periods": group_analytics.total_periods(),
+            "average_completion_rate": pytest.approx(group_analytics.average_completion_rate()),
+        }
+
+    assert groups.aggregate("Health") == fresh("Health")
+    assert groups.aggregate("Health")["habits"] == 3
+    assert groups.aggregate("Sport")["highest_streak"] == 10
+
+    computed = []
+    metrics = HabitGroups._habit_metrics
+    monkeypatch.setattr(
+        HabitGroups, "_habit_metrics", staticmethod(lambda habit: computed.append(habit.uuid) or metrics(habit))
+    )
+    swim = storage.get_habit("Swim")
+    swim.toggle_completed()
+    storage.get_habit("Read").toggle_completed()  # in no group
+    assert computed == ["Swim"]  # only the changed member is looked at again
+    assert groups.aggregate("Sport") == fresh("Sport")
+    assert groups.aggregate("Health") == fresh("Health")
+
+    storage.delete_habit("Exercise")
+    assert groups.aggregate("Sport") == fresh("Sport")
+    assert groups.aggregate("Health")["highest_streak"] == 1
+    assert computed == ["Swim"]
+
+    analytics.set_period(datetime(2023, 1, 10), NOW)  # a new time frame rebuilds the totals
+    assert groups.aggregate("Health") == fresh("Health")
+
+
+def test_groups_are_saved(storage, monkeypatch, capsys):
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".db")
+    temp_file.close()
+    original_path = db_handler.DB_PATH
+    db_handler.set_db_path(temp_file.name)
+    db_handler.initialize_database()
+    monkeypatch.setattr(habits, "SNAPSHOT", False)
+    try:
+        storage.groups.add_habit(storage.groups.ensure_path("Health/Sport"), "Exercise")
+        storage.groups.add_habit("Health", "Cook")
+        habits.save_habits()
+
+        habits.load_habits()
+        groups = habits.HABITS.groups
+        assert groups.parents == {"Health": None, "Sport": "Health"}
+        assert groups.members == {"Health": {"Cook"}, "Sport": {"Exercise"}}
+
+        groups.delete_group("Sport")
+        habits.HABITS.delete_habit("Cook")
+        habits.save_habits()
+        assert db_handler.load_groups() == ({"Health": None}, {})
+
+        habits.HABITS.groups.add_habit("Health", "Exercise")
+        habits.save_habits()
+        assert commands.groups(NOW.date() - timedelta(days=9), NOW.date(), as_json=True) == 0
+        rows = json.loads(capsys.readouterr().out)
+        assert rows == [
+            {
+                "name": "Health",
+                "parent": None,
+                "depth": 0,
+                "habits": 1,
+                "highest_streak": 10,
+                "completed_periods": 10,
+                "total_periods": 10,
+                "average_completion_rate": 1.0,
+            }
+        ]
+    finally:
+        db_handler.set_db_path(original_path)
@@ -193,3 +193,143 @@ def test_uuid_format():
     # Should be valid UUID format
     parsed_uuid = uuid.UUID(habit.uuid)
     assert str(parsed_uuid) == habit.uuid
+
+def test_search_habits_by_name_and_notes():
+    """Test searching habits by name and notes with short and long queries"""
+    daily = {"amount": 1, "unit": "days"}
+    habits.HABITS.create_habit({"uuid": "a", "name": "Morning Run", "periodicity": daily, "notes": "5km"})
+    habits.HABITS.create_habit(
+        {"uuid": "b", "name": "Read", "periodicity": daily, "notes": "One chapter every morning"}
+    )
+    habits.HABITS.create_habit({"uuid": "c", "name": "Stretch", "periodicity": daily, "notes": ""})
+    assert habits.HABITS.search("morning") == {"a", "b"}
+    assert habits.HABITS.search("MORN") == {"a", "b"}
+    assert habits.HABITS.search("st") == {"c"}
+    assert habits.HABITS.search("runx") == set()
+    assert habits.HABITS.search("morning r", within={"a", "b"}) == {"a"}
+
+def test_search_index_follows_updates_and_deletes():
+    """Test that the search index is kept in sync with habit changes"""
+    daily = {"amount": 1, "unit": "days"}
+    habits.HABITS.create_habit({"uuid": "a", "name": "Morning Run", "periodicity": daily, "notes": ""})
+    assert habits.HABITS.search("run") == {"a"}
+    habits.HABITS.get_habit("a").update({"name": "Evening Walk"})
+    assert habits.HABITS.search("run") == set()
+    assert habits.HABITS.search("walk") == {"a"}
+    habits.HABITS.create_habit({"uuid": "b", "name": "Walk the dog", "periodicity": daily, "notes": ""})
+    assert habits.HABITS.search("walk") == {"a", "b"}
+    habits.HABITS.delete_habit("a")
+    assert habits.HABITS.search("walk") == {"b"}
+
+def test_search_skips_database_index_for_unsaved_changes(monkeypatch):
+    """Test that habits created or renamed since the last save are searched in memory"""
+    monkeypatch.setattr(habits.db_handler, "SEARCH_INDEX", True)
+    monkeypatch.setattr(habits.db_handler, "search_habits", lambda query: ["a"])  # saved as "Morning Run"
+    habits.HABITS.create_habit({"uuid": "a", "name": "Morning Run", "periodicity": {"amount": 1, "unit": "days"}})
+    assert habits.HABITS.search("walk") == set()  # created since the last save
+    habits.HABITS._search_saved = True
+    assert habits.HABITS.search("walk") == {"a"}  # answered by the database index
+    habits.HABITS.get_habit("a").update({"name": "Evening Walk"})
+    assert habits.HABITS.search("run") == set()
+    assert habits.HABITS.search("walk") == {"a"}
+
+def test_get_habits_by_periodicity():
+    """Test structured periodicity filters, including after updates and deletes"""
+    for habit_uuid, unit, amount in [("a", "days", 1), ("b", "weeks", 1), ("c", "days", 2), ("d", "days", 1)]:
+        periodicity = {"amount": amount, "unit": unit}
+        habits.HABITS.create_habit({"uuid": habit_uuid, "name": habit_uuid, "periodicity": periodicity, "notes": ""})
+    assert list(habits.HABITS.get_habits(unit="days", amount=1)) == ["a", "d"]
+    assert list(habits.HABITS.get_habits(unit="days")) == ["a", "c", "d"]
+    assert list(habits.HABITS.get_habits(amount=1)) == ["a", "b", "d"]
+    assert list(habits.HABITS.get_habits(lambda habit: habit.name != "a", unit="days")) == ["c", "d"]
+
+    habits.HABITS.get_habit("b").update({"periodicity": {"amount": 1, "unit": "days"}})
+    habits.HABITS.delete_habit("a")
+    assert list(habits.HABITS.get_habits(unit="days", amount=1)) == ["b", "d"]
+    assert list(habits.HABITS.get_habits(unit="weeks")) == []
+
+def test_get_due_orders_incomplete_habits_by_period_end(monkeypatch):
+    """Test the due index after toggles, deletes and periods ending"""
+    clock = {"now": datetime(2023, 1, 1, 12, 0)}
+    monkeypatch.setattr(habits, "now", lambda: clock["now"])
+    for habit_uuid, unit in [("weekly", "weeks"), ("daily", "days"), ("monthly", "months")]:
+        periodicity = {"amount": 1, "unit": unit}
+        habits.HABITS.create_habit({"uuid": habit_uuid, "name": habit_uuid, "periodicity": periodicity, "notes": ""})
+    due = habits.HABITS.get_due()
+    assert [habit.uuid for habit, _, _ in due] == ["daily", "weekly", "monthly"]
+    assert due[0][1:] == (datetime(2023, 1, 2), 0)
+
+    habits.HABITS.get_habit("daily").toggle_completed()
+    assert [habit.uuid for habit, _, _ in habits.HABITS.get_due()] == ["weekly", "monthly"]
+
+    clock["now"] = datetime(2023, 1, 2, 8, 0)  # the daily period rolled over
+    due = habits.HABITS.get_due()
+    assert [habit.uuid for habit, _, _ in due] == ["daily", "weekly", "monthly"]
+    assert due[0][1:] == (datetime(2023, 1, 3), 1)  # yesterday's completion is at stake
+
+    habits.HABITS.delete_habit("weekly")
+    yearly = {"amount": 1, "unit": "years"}
+    habits.HABITS.create_habit({"uuid": "yearly", "name": "yearly", "periodicity": yearly, "notes": ""})
+    assert [habit.uuid for habit, _, _ in habits.HABITS.get_due()] == ["daily", "monthly", "yearly"]
+
+def test_target_counts_completions_per_period(monkeypatch):
+    """Test that a period is only complete once the target is reached"""
+    clock = {"now": datetime(2023, 1, 1, 8, 0)}
+    monkeypatch.setattr(habits, "now", lambda: clock["now"])
+    habits.HABITS.create_habit(
+        {"uuid": "water", "name": "Water", "periodicity": {"amount": 1, "unit": "days"}, "notes": "", "target": 3}
+    )
+    habit = habits.HABITS.get_habit("water")
+
+    for hour in (8, 12):
+        clock["now"] = datetime(2023, 1, 1, hour, 0)
+        habit.increment()
+    assert habit.get_count() == 2 and not habit.completed
+    assert [due.uuid for due, _, _ in habits.HABITS.get_due()] == ["water"]
+
+    clock["now"] = datetime(2023, 1, 1, 18, 0)
+    habit.increment()
+    assert habit.completed and habit.get_streak() == 1
+    assert habits.HABITS.get_due() == []
+
+    habit.decrement()  # removes the latest one only
+    assert habit.completions == [datetime(2023, 1, 1, 8, 0), datetime(2023, 1, 1, 12, 0)]
+    assert not habit.completed
+
+    clock["now"] = datetime(2023, 1, 2, 9, 0)
+    habit.increment()
+    assert habit.get_count() == 1
+    assert habit.get_count(habit.periods[0]) == 2
+    habit.decrement()
+    habit.decrement()  # nothing left in this period
+    assert habit.get_count(habit.periods[0]) == 2
+
+    habit.update({"target": 2})
+    assert habit.get_completed(habit.periods[0])
+
+    habit.update({"target": 3})
+    habit.complete_period()  # the missing completions at once
+    assert habit.get_count() == 3 and habit.completed
+    assert len(set(habit.completions)) == len(habit.completions)
+    habit.complete_period()
+    assert habit.get_count() == 3
+
+def test_completion_changes_keep_sorted_copy(monkeypatch):
+    """Test that adding and removing completions updates the sorted copy instead of sorting again"""
+    monkeypatch.setattr(habits, "now", lambda: datetime(2023, 1, 3, 12, 0))
+    habit = habits.Habit("uuid", "Read")
+    habit.start_date = datetime(2023, 1, 1)
+    habit.periods = [{"start": datetime(2023, 1, day), "end": datetime(2023, 1, day + 1)} for day in (1, 2, 3)]
+    habit.completions = [datetime(2023, 1, 3, 9), datetime(2023, 1, 1, 9), datetime(2023, 1, 3, 8)]
+    completions = habit._sorted_completions()
+
+    habit.increment()
+    habit.decrement()
+    habit.decrement()  # the latest of the period, not the latest added
+    assert habit.completions == [datetime(2023, 1, 1, 9), datetime(2023, 1, 3, 8)]
+    assert habit._sorted_completions() is completions
+    assert completions == sorted(habit.completions)
+
+    monkeypatch.setattr(habits, "sorted", lambda *args: pytest.fail("sorted again"), raising=False)
+    habit.clear_period()
+    assert habit._sorted_completions() == habit.completions == [datetime(2023, 1, 1, 9)]
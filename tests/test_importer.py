@@ -0,0 +1,139 @@
+"""Test importing completion history from CSV and JSONL files"""
+
+import gzip
+import json
+import tempfile
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.habittracker import commands, db_handler, habits, importer
+
+NOW = datetime(2023, 1, 10, 12, 0)
+
+
+@pytest.fixture(autouse=True)
+def use_temp_db(monkeypatch, tmp_path):
+    """Use a temporary database holding a daily habit started on Jan 5, completed on Jan 5."""
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".db")
+    temp_file.close()
+    original_path = db_handler.DB_PATH
+    db_handler.set_db_path(temp_file.name)
+    db_handler.initialize_database()
+    monkeypatch.setattr(habits, "now", lambda: NOW)
+    monkeypatch.setattr(habits, "SNAPSHOT", False)
+    monkeypatch.chdir(tmp_path)
+
+    start = datetime(2023, 1, 5)
+    db_handler.save_all(
+        {
+            "uuid-1": {
+                "habit": {
+                    "name": "Exercise",
+                    "periodicity_amount": 1,
+                    "periodicity_unit": "days",
+                    "notes": "",
+                    "start_date": start.isoformat(),
+                },
+                "periods": [{"start": start.isoformat(), "end": (start + timedelta(days=1)).isoformat()}],
+                "completions": ["2023-01-05T09:00:00"],
+            },
+        }
+    )
+    yield
+    db_handler.set_db_path(original_path)
+
+
+def test_csv_import_merges_and_extends_periods(monkeypatch, capsys):
+    monkeypatch.setattr(importer, "CHUNK_SIZE", 2)  # duplicates across chunks are skipped too
+    with open("history.csv", "w") as f:
+        f.write("completed_at,habit,source\n")
+        f.write("2023-01-07T08:00:00,exercise,old app\n")
+        f.write("2023-01-05T09:00:00,Exercise,old app\n")  # already saved
+        f.write("2023-01-02,uuid-1,old app\n")  # before the start
+        f.write("2023-01-07T08:00:00,Exercise,old app\n")  # repeated
+        f.write("2023-01-08T08:00:00,Swim,old app\n")  # unknown habit
+        f.write("yesterday,Exercise,old app\n")
+        f.write("2023-02-01T08:00:00,Exercise,old app\n")  # in the future
+    assert commands.import_completions("history.csv") == 0
+    captured = capsys.readouterr()
+    assert "Imported 2 of 7 completions (2 duplicates, 3 invalid)." in captured.out
+    assert "line 6: no habit named 'Swim'" in captured.err
+    assert "line 7: invalid completed_at 'yesterday'" in captured.err
+
+    data = db_handler.load_all()["uuid-1"]
+    assert data["habit"]["start_date"] == "2023-01-02T00:00:00"
+    assert sorted(data["completions"]) == ["2023-01-02T00:00:00", "2023-01-05T09:00:00", "2023-01-07T08:00:00"]
+    starts = sorted(period["start"] for period in data["periods"])
+    assert starts == [(datetime(2023, 1, 2) + timedelta(days=i)).isoformat() for i in range(9)]  # to Jan 10
+
+    habit = habits.HABITS.get_habit("uuid-1")
+    assert habit.get_completed(habit.periods[0])  # the loaded habit is up to date too
+    assert habit.get_streak(datetime(2023, 1, 7, 12)) == 1
+
+
+def test_jsonl_import_creates_habits(capsys):
+    with gzip.open("history.jsonl.gz", "wt") as f:
+        f.write(json.dumps({"habit": "Swim", "completed_at": "2022-12-01T07:00:00+00:00"}) + "\n")
+        f.write("\n")
+        f.write("not json\n")
+        f.write(json.dumps({"habit": "Swim"}) + "\n")
+        f.write(json.dumps({"habit": ["Swim"], "completed_at": "2022-12-02"}) + "\n")
+        f.write(json.dumps({"habit": "swim", "completed_at": "2022-12-15T07:00:00"}) + "\n")
+    assert commands.import_completions("history.jsonl.gz", create="weeks") == 0
+    captured = capsys.readouterr()
+    assert "Imported 2 of 5 completions (0 duplicates, 3 invalid)." in captured.out
+    assert "Created: Swim" in captured.out
+    assert "line 3: not valid JSON" in captured.err
+    assert "line 4: no completed_at" in captured.err
+    assert "line 5: no habit" in captured.err
+
+    habits.load_habits()
+    swim = next(habit for habit in habits.HABITS.get_habits().values() if habit.name == "Swim")
+    assert swim.periodicity == {"amount": 1, "unit": "weeks"}
+    assert len(swim.completions) == 2
+    assert swim.start_date <= swim.completions[0] < swim.periods[0]["end"]
+    assert all(a["end"] == b["start"] for a, b in zip(swim.periods, swim.periods[1:]))
+    assert swim.periods[-1]["start"] <= NOW < swim.periods[-1]["end"]
+
+
+def test_dry_run_and_bad_files_write_nothing(capsys):
+    with open("history.csv", "w") as f:
+        f.write("habit,completed_at\nExercise,2023-01-06T08:00:00\n")
+    assert commands.import_completions("history.csv", dry_run=True) == 0
+    assert "Would import 1 of 1 completions" in capsys.readouterr().out
+
+    with open("history.txt", "w") as f:
+        f.write("habit,when\nExercise,2023-01-06T08:00:00\n")
+    assert commands.import_completions("history.txt") == 1
+    assert commands.import_completions("history.txt", fmt="csv") == 1
+    assert "'habit' and 'completed_at' columns" in capsys.readouterr().err
+    assert db_handler.load_all()["uuid-1"]["completions"] == ["2023-01-05T09:00:00"]
+
+
+def test_dry_run_leaves_loaded_habits_untouched():
+    habits.load_habits()
+    habit = habits.HABITS.get_habit("uuid-1")
+    before = (habit.start_date, list(habit.periods), list(habit.completions), habit.version)
+    with open("history.csv", "w") as f:
+        f.write("habit,completed_at\n")
+        f.write("Exercise,2023-01-02T08:00:00\n")
+        f.write("Exercise,2023-01-02T08:00:00\n")
+        f.write("Swim,2023-01-03T08:00:00\n")
+        f.write("swim,2023-01-04T08:00:00\n")
+    report = importer.import_file("history.csv", create={"amount": 1, "unit": "days"}, dry_run=True)
+    assert (report["imported"], report["duplicates"], report["created"]) == (3, 1, ["Swim"])
+    assert (habit.start_date, habit.periods, habit.completions, habit.version) == before
+    assert list(habits.HABITS.get_habits()) == ["uuid-1"]
+
+
+def test_extend_periods_back_keeps_boundaries():
+
+    habit = habits.Habit("uuid", periodicity={"amount": 2, "unit": "months"})
+    habit.start_date = datetime(2023, 3, 15)
+    habit.periods = [{"start": datetime(2023, 3, 15), "end": datetime(2023, 5, 15)}]
+    assert habit.extend_periods_back(datetime(2023, 3, 15)) == 0
+    assert habit.extend_periods_back(datetime(2022, 6, 1)) == 5
+    assert habit.start_date == datetime(2022, 5, 15)
+    assert [period["start"].month for period in habit.periods] == [5, 7, 9, 11, 1, 3]
+    assert all(a["end"] == b["start"] for a, b in zip(habit.periods, habit.periods[1:]))
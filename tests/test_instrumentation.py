@@ -0,0 +1,67 @@
+"""Test the opt-in hot-path instrumentation and session profiling"""
+
+import pstats
+import sys
+
+import pytest
+
+import src.habittracker
+from src.habittracker import db_handler, habits, instrumentation
+
+
+@pytest.fixture(autouse=True)
+def clean_instrumentation():
+    """Start every test without wrapped targets or recorded calls."""
+    instrumentation.reset()
+    yield
+    instrumentation.disable()
+    instrumentation.reset()
+
+
+def test_disabled_by_default():
+    """Targets are untouched and nothing is recorded until enabled."""
+    original = habits.Habit.get_streak
+    habits.Habit("uuid", "Habit").get_streak()
+    assert habits.Habit.get_streak is original
+    assert instrumentation.STATS == {}
+
+
+def test_enable_counts_nested_calls():
+    """Calls are counted per target, including calls made by other targets."""
+    original = habits.Habit.get_completed
+    instrumentation.enable()
+    habit = habits.Habit("uuid", "Habit")
+    habit.toggle_completed()
+    habit.get_streak()
+    assert instrumentation.STATS["Habit.get_streak"][0] == 1
+    assert instrumentation.STATS["Habit.get_completed"][0] >= 2  # via completed and get_streak
+    assert instrumentation.STATS["Habit.get_completed"][1] >= 0
+
+    instrumentation.disable()
+    assert habits.Habit.get_completed is original
+    assert db_handler.load_all.__name__ == "load_all"
+    assert "Habit.get_streak" in instrumentation.report()
+
+
+def test_enable_imports_lazy_target_modules(monkeypatch):
+    """Analytics is wrapped even if nothing imported it yet, the UI only once imported."""
+    monkeypatch.delitem(sys.modules, "src.habittracker.analytics")
+    monkeypatch.delattr(src.habittracker, "analytics")
+    monkeypatch.delitem(sys.modules, "src.habittracker.cli.habit_table", raising=False)
+    instrumentation.enable()
+    analytics = sys.modules["src.habittracker.analytics"]
+    assert analytics.HabitAnalytics.highest_streak.__wrapped__
+    assert "src.habittracker.cli.habit_table" not in sys.modules
+
+
+def test_session_writes_profile(tmp_path, capsys):
+    """A profiled session writes cProfile stats and a memory report."""
+    path = tmp_path / "session.prof"
+    with instrumentation.session(instrument=True, profile_path=str(path)):
+        habits.Habit("uuid", "Habit").get_streak()
+
+    assert "Habit.get_streak" in capsys.readouterr().err
+    stats = pstats.Stats(str(path))
+    assert any(func[2] == "get_streak" for func in stats.stats)
+    assert (tmp_path / "session.prof.memory.txt").read_text().startswith("current ")
+    assert instrumentation._ORIGINALS == []  # unwrapped on exit
@@ -0,0 +1,100 @@
+"""Test calendar arithmetic against relativedelta on many random dates"""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from dateutil.relativedelta import relativedelta
+
+from src.habittracker import habits, periods_calendar
+
+CASES = 2000
+
+
+def random_datetime(rng):
+    """Return a random datetime, often at the end of a month"""
+    year, month = rng.randint(1900, 2100), rng.randint(1, 12)
+    last = periods_calendar.days_in_month(year, month)
+    day = rng.choice([last, last - 1, 28, 29, 30, 31, rng.randint(1, last)])
+    return datetime(year, month, min(day, last), rng.randint(0, 23), rng.randint(0, 59))
+
+
+def test_days_in_month_matches_stdlib():
+    import calendar
+
+    for year in range(1896, 2105):
+        for month in range(1, 13):
+            assert periods_calendar.days_in_month(year, month) == calendar.monthrange(year, month)[1]
+
+
+def test_add_months_matches_relativedelta():
+    rng = random.Random(0)
+    for _ in range(CASES):
+        moment, months = random_datetime(rng), rng.randint(-240, 240)
+        assert periods_calendar.add_months(moment, months) == moment + relativedelta(months=months)
+
+
+@pytest.mark.parametrize("unit", ["days", "weeks", "months", "years"])
+def test_boundary_matches_relativedelta_from_start(unit):
+    """The k-th boundary is the start plus k periods, computed in one step."""
+    rng = random.Random(1)
+    for _ in range(CASES):
+        start, amount, k = random_datetime(rng), rng.randint(1, 6), rng.randint(0, 60)
+        expected = start + habits.PERIODICITY_UNITS[unit](k * amount)
+        assert periods_calendar.boundary(start, amount, unit, k) == expected
+    assert periods_calendar.boundaries(start, amount, unit, 5, first=k) == [
+        start + habits.PERIODICITY_UNITS[unit](i * amount) for i in range(k, k + 5)
+    ]
+
+
+@pytest.mark.parametrize("unit", ["months", "years"])
+def test_chained_periods_do_not_drift(unit):
+    """Periods generated one after another end on the k-th boundary from the start."""
+    rng = random.Random(2)
+    for _ in range(200):
+        habit = habits.Habit("uuid", periodicity={"amount": rng.randint(1, 3), "unit": unit})
+        habit.start_date = random_datetime(rng)
+        habit.periods = []
+        for _ in range(31):
+            habit.periods.append(habit._next_period())
+        ends = [period["end"] for period in habit.periods]
+        assert ends == periods_calendar.boundaries(habit.start_date, habit.periodicity["amount"], unit, 31)
+
+        if habit.start_date.day <= 28:  # no clamping: same as chained relativedelta
+            chained = habit.start_date
+            for end in ends:
+                chained += habits.PERIODICITY_UNITS[unit](habit.periodicity["amount"])
+                assert end == chained
+
+
+def test_end_of_month_start_keeps_its_day():
+    habit = habits.Habit("uuid", periodicity={"amount": 1, "unit": "months"})
+    habit.start_date = datetime(2023, 1, 31)
+    habit.periods = []
+    habit.periods.append(habit._next_period())
+    habit.get_period(datetime(2023, 6, 1))
+    assert [period["end"].day for period in habit.periods] == [28, 31, 30, 31, 30]
+
+
+@pytest.mark.parametrize("unit", ["days", "weeks", "months", "years"])
+def test_boundaries_until_reaches_past_until(unit):
+    """Batch generation is contiguous and stops at the first boundary after the moment."""
+    rng = random.Random(3)
+    for _ in range(CASES // 4):
+        previous, amount = random_datetime(rng), rng.randint(1, 4)
+        until = previous + timedelta(days=rng.randint(-10, 2000))
+        ends = periods_calendar.boundaries_until(previous, amount, unit, until)
+        assert ends[-1] > until
+        assert all(end <= until for end in ends[:-1])
+        assert ends == periods_calendar.boundaries(previous, amount, unit, len(ends))
+
+
+def test_get_period_generates_missing_periods_at_once():
+    habit = habits.Habit("uuid", periodicity={"amount": 1, "unit": "months"})
+    habit.start_date = datetime(2020, 2, 29)
+    habit.periods = []
+    habit.periods.append(habit._next_period())
+    period = habit.get_period(datetime(2024, 3, 15))
+    assert period == {"start": datetime(2024, 2, 29), "end": datetime(2024, 3, 29)}
+    assert len(habit.periods) == 49  # Feb 2020 to Feb 2024
+    assert all(a["end"] == b["start"] for a, b in zip(habit.periods, habit.periods[1:]))
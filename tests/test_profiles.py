@@ -0,0 +1,63 @@
+"""Test named profiles and the cross-profile report"""
+
+import os
+
+import pytest
+
+from src.habittracker import db_handler, profiles
+from src.habittracker.benchmarks import dataset
+
+
+@pytest.fixture(autouse=True)
+def profiles_in_temp_dir(tmp_path, monkeypatch):
+    """Keep the default database and the profiles in a temporary directory."""
+    monkeypatch.setattr(db_handler, "default_db_path", lambda: str(tmp_path / "habits.db"))
+    original_path = db_handler.DB_PATH
+    yield tmp_path
+    db_handler.set_db_path(original_path)
+
+
+def test_profile_paths():
+    """Named profiles live in their own files, bad names are rejected."""
+    assert profiles.profile_path("default") == db_handler.default_db_path()
+    assert profiles.profile_path("alice").endswith(os.path.join("profiles", "alice.db"))
+    with pytest.raises(ValueError):
+        profiles.profile_path("../alice")
+
+
+def test_create_and_list_profiles(profiles_in_temp_dir):
+    """Created profiles are listed after the default one, and only once."""
+    assert profiles.list_profiles() == []
+    profiles.create_profile("bob")
+    profiles.create_profile("alice")
+    dataset.write(str(profiles_in_temp_dir / "habits.db"), {})
+    assert profiles.list_profiles() == ["default", "alice", "bob"]
+    with pytest.raises(ValueError):
+        profiles.create_profile("alice")
+
+
+def test_report_per_profile_and_aggregate():
+    """Every profile is analysed separately and the figures are combined."""
+    for name, (count, seed) in {"alice": (3, 1), "bob": (5, 2)}.items():
+        profiles.create_profile(name)
+        dataset.write(profiles.profile_path(name), dataset.generate(count, 0.25, seed=seed))
+    profiles.create_profile("carol")
+
+    report = profiles.report(workers=2)
+    alice, bob, carol = (report["profiles"][name] for name in ("alice", "bob", "carol"))
+    assert (alice["habits"], bob["habits"], carol["habits"]) == (3, 5, 0)
+
+    aggregate = report["aggregate"]
+    assert aggregate["profiles"] == 3
+    assert aggregate["habits"] == 8
+    assert aggregate["highest_streak"] == max(alice["highest_streak"], bob["highest_streak"])
+    assert aggregate["total_periods"] == alice["total_periods"] + bob["total_periods"]
+    assert aggregate["average_completion_rate"] == pytest.approx(
+        (alice["average_completion_rate"] * 3 + bob["average_completion_rate"] * 5) / 8
+    )
+
+
+def test_report_unknown_profile():
+    """Reporting on a missing profile fails before starting any worker."""
+    with pytest.raises(ValueError):
+        profiles.report(["nobody"])
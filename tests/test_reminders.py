@@ -0,0 +1,127 @@
+"""Test the deadline queue and the reminder daemon"""
+
+import tempfile
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.habittracker import db_handler, habits
+from src.habittracker.reminders import DeadlineQueue, Reminders, format_reminder
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Use a temporary database holding a daily and a weekly habit, and a settable clock."""
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".db")
+    temp_file.close()
+    original_path = db_handler.DB_PATH
+    db_handler.set_db_path(temp_file.name)
+    db_handler.initialize_database()
+    monkeypatch.setattr(habits, "SNAPSHOT", False)
+
+    def habit_data(name, unit, end, completions):
+        return {
+            "habit": {
+                "name": name,
+                "periodicity_amount": 1,
+                "periodicity_unit": unit,
+                "notes": "",
+                "start_date": "2023-01-01T00:00:00",
+            },
+            "periods": [{"start": "2023-01-01T00:00:00", "end": end}],
+            "completions": completions,
+        }
+
+    db_handler.save_all(
+        {
+            "daily": habit_data("Read", "days", "2023-01-02T00:00:00", []),
+            "weekly": habit_data("Run", "weeks", "2023-01-08T00:00:00", ["2023-01-01T09:00:00"]),
+        }
+    )
+    now = {"value": datetime(2023, 1, 1, 12, 0)}
+    monkeypatch.setattr(habits, "now", lambda: now["value"])
+    yield now
+    habits.HABITS = habits.HabitStorage()
+    db_handler.set_db_path(original_path)
+
+
+def test_deadline_queue_reschedules():
+    """The earliest live deadline is returned and replaced entries are skipped."""
+    queue = DeadlineQueue()
+    for i in range(100):
+        queue.schedule(f"habit-{i}", datetime(2023, 1, 1) + timedelta(hours=100 - i))
+    queue.schedule("habit-99", datetime(2023, 2, 1))  # was the earliest
+    queue.cancel("habit-98")
+    assert len(queue) == 99
+    assert queue.pop() == (datetime(2023, 1, 1, 3), "habit-97")
+
+    popped = [queue.pop() for _ in range(len(queue))]
+    assert popped == sorted(popped)
+    assert popped[-1] == (datetime(2023, 2, 1), "habit-99")
+    assert queue.pop() is None
+
+
+def test_reminds_incomplete_habits_before_period_end(clock):
+    """Only incomplete habits are reminded, once per period, then rescheduled."""
+    emitted = []
+    reminders = Reminders(timedelta(hours=1), emitted.append)
+    reminders.refresh()
+    assert reminders.seconds_until_next() == 11 * 3600  # the daily one, at 11 pm
+
+    clock["value"] = datetime(2023, 1, 1, 23, 30)
+    assert reminders.fire() == 1
+    assert emitted[0]["habit"] == "daily"
+    assert emitted[0]["period_end"] == "2023-01-02T00:00:00"
+    assert format_reminder(emitted[0]) == "Read is due in 0h30 (by 2023-01-02 00:00)."
+
+    # rescheduled for the next day; the completed weekly habit stays quiet
+    assert reminders.fire() == 0
+    clock["value"] = datetime(2023, 1, 7, 23, 30)
+    assert reminders.fire() == 1  # the days missed while the clock jumped are skipped
+    assert all(reminder["habit"] == "daily" for reminder in emitted)
+
+
+def test_refresh_sees_changes_made_elsewhere(clock):
+    """Completions and deletions saved by another process are picked up."""
+    emitted = []
+    reminders = Reminders(timedelta(hours=1), emitted.append)
+    reminders.refresh()
+
+    db_handler.append_history("daily", [], ["2023-01-01T20:00:00"])
+    reminders.refresh()
+    clock["value"] = datetime(2023, 1, 1, 23, 30)
+    assert reminders.fire() == 0
+
+    db_handler.save_all({})  # deletes both habits
+    reminders.refresh()
+    assert len(reminders.queue) == 0
+
+
+def test_external_write_does_not_repeat_reminder(clock):
+    """A write by another process after a reminder does not emit it again."""
+    emitted = []
+    reminders = Reminders(timedelta(hours=1), emitted.append)
+    reminders.refresh()
+    clock["value"] = datetime(2023, 1, 1, 23, 30)
+    assert reminders.fire() == 1
+
+    pushed = len(reminders.queue._heap)
+    db_handler.append_history("weekly", [], ["2023-01-01T23:35:00"])
+    clock["value"] = datetime(2023, 1, 1, 23, 40)
+    reminders.refresh()
+    assert len(reminders.queue._heap) == pushed  # no habit's period end moved
+    assert reminders.fire() == 0
+    assert reminders.seconds_until_next() == 23 * 3600 + 20 * 60  # the next day's reminder
+
+
+def test_run_stops(clock):
+
+    """The daemon sleeps on the stop event and returns once it is set."""
+    stop = threading.Event()
+    reminders = Reminders(timedelta(hours=1), lambda reminder: None)
+    thread = threading.Thread(target=reminders.run, args=(300, stop))
+    thread.start()
+    stop.set()
+    thread.join(timeout=5)
+    assert not thread.is_alive()
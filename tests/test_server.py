@@ -0,0 +1,180 @@
+"""Test the local HTTP/JSON API server"""
+
+import asyncio
+import json
+import tempfile
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.habittracker import analytics, db_handler, habits
+from src.habittracker.benchmarks.load import load
+from src.habittracker.server import HabitServer
+
+NOW = datetime(2023, 1, 10, 12, 0)
+
+
+@pytest.fixture(autouse=True)
+def use_temp_db(monkeypatch):
+    """Serve a temporary database holding one daily habit with some history."""
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".db")
+    temp_file.close()
+    original_path = db_handler.DB_PATH
+    db_handler.set_db_path(temp_file.name)
+    db_handler.initialize_database()
+    monkeypatch.setattr(habits, "SNAPSHOT", False)
+    monkeypatch.setattr(habits, "now", lambda: NOW)
+
+    start = datetime(2023, 1, 1)
+    db_handler.save_all(
+        {
+            "uuid-1": {
+                "habit": {
+                    "name": "Exercise",
+                    "periodicity_amount": 1,
+                    "periodicity_unit": "days",
+                    "notes": "",
+                    "start_date": start.isoformat(),
+                },
+                "periods": [
+                    {
+                        "start": (start + timedelta(days=i)).isoformat(),
+                        "end": (start + timedelta(days=i + 1)).isoformat(),
+                    }
+                    for i in range(5)
+                ],
+                "completions": [(start + timedelta(days=i, hours=9)).isoformat() for i in range(5)],
+            },
+        }
+    )
+    habits.load_habits()
+    yield
+    habits.HABITS = habits.HabitStorage()
+    db_handler.set_db_path(original_path)
+
+
+def request(server, method, target, headers=None):
+    return asyncio.run(server.handle(method, target, headers))
+
+
+def test_get_habits_and_revalidate():
+    """GET responses carry an ETag and are answered with 304 when it still matches."""
+    server = HabitServer()
+    status, headers, body = request(server, "GET", "/habits")
+    assert status == 200
+    assert [habit["name"] for habit in json.loads(body)] == ["Exercise"]
+
+    status, _, body = request(server, "GET", "/habits", {"if-none-match": headers["ETag"]})
+    assert (status, body) == (304, b"")
+
+
+def test_get_habit_and_analytics():
+    """A single habit includes its streak and analytics accept a time frame."""
+    server = HabitServer()
+    status, _, body = request(server, "GET", "/habits/uuid-1")
+    assert status == 200
+    assert json.loads(body)["streak"] == 0  # Jan 6 to 9 were missed
+
+    status, _, body = request(server, "GET", "/analytics?since=2023-01-01&until=2023-01-03")
+    assert status == 200
+    report = json.loads(body)["habits"][0]
+    assert (report["highest_streak"], report["completed_periods"]) == (3, 3)  # within the time frame
+
+
+def test_analytics_time_frame_is_restored():
+    """A request's time frame does not leak into later requests or other analytics."""
+    analytics.set_period(datetime(2023, 1, 1), NOW)
+    server = HabitServer()
+    request(server, "GET", "/analytics?since=2023-01-01&until=2023-01-03")
+    assert (analytics.SINCE, analytics.UNTIL) == (datetime(2023, 1, 1), NOW)
+
+    _, _, body = request(server, "GET", "/analytics")
+    assert json.loads(body)["habits"][0]["completed_periods"] == 5
+
+
+def test_toggle_persists_and_invalidates_cache():
+
+    """Toggling writes the missing periods and completion, and changes the ETag."""
+    server = HabitServer()
+    _, headers, _ = request(server, "GET", "/habits")
+
+    status, _, body = request(server, "POST", "/habits/uuid-1/toggle")
+    assert status == 200
+    assert json.loads(body)["completed"] is True
+
+    stored = db_handler.load_all(["uuid-1"])["uuid-1"]
+    assert len(stored["periods"]) == 10  # Jan 1 to the current period, Jan 10
+    assert stored["completions"][-1] == NOW.isoformat()
+
+    status, _, _ = request(server, "GET", "/habits", {"if-none-match": headers["ETag"]})
+    assert status == 200
+
+    request(server, "POST", "/habits/uuid-1/toggle")
+    assert len(db_handler.load_all(["uuid-1"])["uuid-1"]["completions"]) == 5
+
+
+def test_habit_etag_follows_its_version():
+    """A single habit keeps its ETag while other habits change and gets a new one once toggled."""
+    server = HabitServer()
+    _, headers, _ = request(server, "GET", "/habits/uuid-1")
+    habits.HABITS.create_habit({"name": "Read", "periodicity": {"amount": 1, "unit": "days"}})
+    assert request(server, "GET", "/habits/uuid-1", {"if-none-match": headers["ETag"]})[0] == 304
+
+    request(server, "POST", "/habits/uuid-1/toggle")
+    status, _, body = request(server, "GET", "/habits/uuid-1", {"if-none-match": headers["ETag"]})
+    assert status == 200
+    assert json.loads(body)["completed"] is True
+
+
+def test_errors():
+    """Unknown resources are 404, invalid dates 400 and other methods 405."""
+    server = HabitServer()
+    assert request(server, "GET", "/habits/missing")[0] == 404
+    assert request(server, "POST", "/habits/missing/toggle")[0] == 404
+    assert request(server, "GET", "/nothing")[0] == 404
+    assert request(server, "GET", "/analytics?since=yesterday")[0] == 400
+    assert request(server, "DELETE", "/habits")[0] == 405
+
+
+def test_bad_requests_over_sockets(monkeypatch):
+    """A malformed Content-Length is a 400 and a failing handler a 500."""
+
+    def fail(target):
+        raise RuntimeError("broken")
+
+    async def send(port, data):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(data)
+        status = (await reader.readline()).split()[1]
+        writer.close()
+        return int(status)
+
+    async def run():
+        server = HabitServer(port=0)
+        await server.start()
+        monkeypatch.setattr(server, "_get", fail)
+        try:
+            return (
+                await send(server.port, b"POST /habits HTTP/1.1\r\nContent-Length: ten\r\n\r\n"),
+                await send(server.port, b"GET /habits HTTP/1.1\r\n\r\n"),
+            )
+        finally:
+            await server.close()
+
+    assert asyncio.run(run()) == (400, 500)
+
+
+def test_load_over_sockets():
+    """The load client gets full responses first and 304s once it has ETags."""
+
+    async def run():
+        server = HabitServer(port=0)
+        await server.start()
+        try:
+            return await load("127.0.0.1", server.port, ["/habits", "/analytics"], 40, 4)
+        finally:
+            await server.close()
+
+    report = asyncio.run(run())
+    assert report["requests"] == 40
+    assert report["statuses"]["304"] >= 32  # at most one 200 per path and connection
@@ -0,0 +1,53 @@
+"""Test the headless usage simulation of the test harness"""
+
+from datetime import date
+
+import pytest
+
+from src.habittracker import db_handler, habits
+from src.habittracker.test_harness import UsageModel, format_report, simulate
+
+
+def test_simulation_reports_every_stage():
+    """A short run times every stage and restores the clock and database."""
+    original = (habits.now, db_handler.DB_PATH)
+    report = simulate(days=14, habit_count=3, seed=1, checkpoint=7)
+    assert (habits.now, db_handler.DB_PATH) == original
+
+    stages = report["stages"]
+    assert stages["load"]["calls"] == stages["save"]["calls"] == 14
+    assert stages["get_period"]["calls"] == 14 * 3
+    assert stages["analytics"]["calls"] == 2  # two Sundays
+    assert [point["day"] for point in report["checkpoints"]] == ["2024-01-07", "2024-01-14"]
+    assert "days/s" in format_report(report)
+
+
+def test_simulation_needs_a_day():
+    """Zero days are rejected before anything is set up."""
+    with pytest.raises(ValueError):
+        simulate(days=0)
+
+
+def test_usage_model_drives_completions():
+
+    """Certain completion completes every period, a zero weekday multiplier none."""
+    always = simulate(days=7, habit_count=2, model=UsageModel(default=1.0))
+    assert always["stages"]["complete"]["calls"] >= 2
+
+    never = simulate(days=7, habit_count=2, model=UsageModel(weekdays=[0.0] * 7))
+    assert "complete" not in never["stages"]
+
+
+def test_usage_model_probabilities():
+    """Habit probabilities override the default and weekdays scale them."""
+    model = UsageModel(default=0.0, habits={"Read": 1.0}, weekdays=[1.0] * 6 + [0.0])
+    read = habits.Habit("uuid", "Read")
+    other = habits.Habit("uuid2", "Other")
+
+    class Rng:
+        def random(self):
+            return 0.5
+
+    assert model.completes(read, date(2024, 1, 1), Rng())  # Monday
+    assert not model.completes(read, date(2024, 1, 7), Rng())  # Sunday
+    assert not model.completes(other, date(2024, 1, 1), Rng())
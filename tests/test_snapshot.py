@@ -0,0 +1,107 @@
+"""Test the startup snapshot of loaded habits"""
+
+import os
+import tempfile
+
+import pytest
+
+from src.habittracker import db_handler, habits, snapshot
+
+DATA = {
+    "uuid-1": {
+        "habit": {
+            "name": "Exercise",
+            "periodicity_amount": 1,
+            "periodicity_unit": "days",
+            "notes": "",
+            "start_date": "2023-01-01T00:00:00",
+        },
+        "periods": [
+            {"start": "2023-01-01T00:00:00", "end": "2023-01-02T00:00:00"},
+            {"start": "2023-01-02T00:00:00", "end": "2023-01-03T00:00:00"},
+        ],
+        "completions": ["2023-01-01T12:00:00"],
+    },
+    "uuid-2": {
+        "habit": {
+            "name": "Read",
+            "periodicity_amount": 1,
+            "periodicity_unit": "weeks",
+            "notes": "Gap",
+            "start_date": "2023-01-01T00:00:00",
+        },
+        "periods": [
+            {"start": "2023-01-01T00:00:00", "end": "2023-01-08T00:00:00"},
+            {"start": "2023-01-15T00:00:00", "end": "2023-01-22T00:00:00"},
+        ],
+        "completions": [],
+    },
+}
+
+
+@pytest.fixture(autouse=True)
+def use_temp_db():
+    """Use a temporary database holding DATA."""
+    temp_dir = tempfile.TemporaryDirectory()
+    original_path = db_handler.DB_PATH
+    db_handler.set_db_path(os.path.join(temp_dir.name, "habits.db"))
+    db_handler.initialize_database()
+    db_handler.save_all(DATA)
+    yield
+    db_handler.set_db_path(original_path)
+    temp_dir.cleanup()
+
+
+def test_snapshot_round_trip():
+    """A snapshot reads back exactly what was written, including gaps between periods."""
+    key = snapshot.database_key()
+    snapshot.write(key, DATA)
+    assert snapshot.read(key) == DATA
+
+
+def test_load_habits_uses_valid_snapshot(monkeypatch):
+    """The second load of an unchanged database does not query it."""
+    habits.load_habits()
+    assert os.path.exists(snapshot.snapshot_path())
+
+    def fail(*args, **kwargs):
+        raise AssertionError("database should not be read")
+
+    monkeypatch.setattr(db_handler, "load_all", fail)
+    habits.load_habits()
+    habit = habits.HABITS.get_habit("uuid-1")
+    assert habit.name == "Exercise"
+    assert habit.periods[1]["start"] is habit.periods[0]["end"]
+    assert len(habits.HABITS.get_habit("uuid-2").periods) == 2
+
+
+def test_snapshot_invalidated_by_database_write():
+    """Writes by anything else than save_habits make the snapshot stale."""
+    habits.load_habits()
+    key = snapshot.database_key()
+    db_handler.delete_completions("uuid-1", "2023-01-01T00:00:00", "2023-01-02T00:00:00")
+    assert snapshot.database_key() != key
+    assert snapshot.read(snapshot.database_key()) is None
+
+    habits.load_habits()
+    assert habits.HABITS.get_habit("uuid-1").completions == []
+
+
+def test_save_habits_refreshes_snapshot():
+    """Saving rewrites the snapshot so the next launch can use it."""
+    habits.load_habits()
+    habits.HABITS.get_habit("uuid-1").update({"name": "Run"})
+    habits.save_habits()
+    data = snapshot.read(snapshot.database_key())
+    assert data is not None
+    assert data["uuid-1"]["habit"]["name"] == "Run"
+
+
+def test_corrupt_snapshot_is_ignored():
+    """A damaged snapshot falls back to the database."""
+    habits.load_habits()
+    with open(snapshot.snapshot_path(), "wb") as f:
+        f.write(b"not a snapshot")
+    assert snapshot.read(snapshot.database_key()) is None
+    habits.load_habits()
+    assert habits.HABITS.get_habit("uuid-1").name == "Exercise"
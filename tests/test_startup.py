@@ -0,0 +1,64 @@
+"""Test that startup stays lazy and the startup benchmark parses import times"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+from src.habittracker.benchmarks.startup import parse_importtime
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+
+
+def test_main_import_is_lazy():
+    """Importing the entry point must not pull in the UI, dateutil or the harness."""
+    code = (
+        "import sys, habittracker.main, habittracker.analytics, habittracker.commands;"
+        "print(sorted(m for m in ('prompt_toolkit', 'dateutil', 'platformdirs',"
+        " 'habittracker.test_harness', 'habittracker.cli') if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=SRC, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[]"
+
+
+def test_version_fast_path():
+    """--version prints the version without starting the app."""
+    result = subprocess.run(
+        [sys.executable, "-m", "habittracker", "--version"],
+        cwd=SRC,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.startswith("habittracker ")
+
+
+def test_scripting_commands_do_not_seed_sample_data(tmp_path):
+    """A script run on a fresh default database sees an empty store."""
+    db = tmp_path / "habits.db"
+    result = subprocess.run(
+        [sys.executable, "-m", "habittracker", "--db", str(db), "list", "--json"],
+        cwd=SRC,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[]"
+    assert db.exists()
+
+
+def test_parse_importtime():
+    """Only top-level imports count towards the total."""
+    stderr = "\n".join(
+        [
+            "import time: self [us] | cumulative | imported package",
+            "import time:       100 |        100 |   gettext",
+            "import time:      2000 |       3000 | argparse",
+            "import time:      1000 |       5000 | habittracker.main",
+        ]
+    )
+    total, modules = parse_importtime(stderr)
+    assert total == 8.0
+    assert modules == [("argparse", 3.0), ("habittracker.main", 5.0)]
@@ -0,0 +1,188 @@
+"""Test the delta sync between devices through the reference sync server"""
+
+import asyncio
+import gzip
+import json
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from src.habittracker import db_handler, habits, sync
+from src.habittracker.sync import SyncServer
+
+
+@pytest.fixture
+def server():
+    """Run a reference sync server in a background thread."""
+    loop = asyncio.new_event_loop()
+    sync_server = SyncServer(port=0)
+    loop.run_until_complete(sync_server.start())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield sync_server
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.run_until_complete(sync_server.close())
+    loop.close()
+
+
+@pytest.fixture
+def devices(monkeypatch):
+    """Return a function switching between two empty device databases."""
+    original_path = db_handler.DB_PATH
+    paths = []
+    for _ in range(2):
+        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".db")
+        temp_file.close()
+        paths.append(temp_file.name)
+        db_handler.set_db_path(temp_file.name)
+        db_handler.initialize_database()
+    monkeypatch.setattr(habits, "SNAPSHOT", False)
+
+    def use(device):
+        db_handler.set_db_path(paths[device])
+
+    yield use
+    habits.HABITS = habits.HabitStorage()
+    db_handler.set_db_path(original_path)
+
+
+def habit_data(name, completions=(), periodicity_unit="days"):
+    return {
+        "habit": {
+            "name": name,
+            "periodicity_amount": 1,
+            "periodicity_unit": periodicity_unit,
+            "notes": "",
+            "start_date": "2023-01-01T00:00:00",
+        },
+        "periods": [{"start": "2023-01-01T00:00:00", "end": "2023-01-02T00:00:00"}],
+        "completions": list(completions),
+    }
+
+
+def test_habits_and_completions_reach_other_device(server, devices):
+    """A new device receives habits, their first period and completions."""
+    url = f"http://127.0.0.1:{server.port}"
+    devices(0)
+    db_handler.save_all({"uuid-1": habit_data("Read", ["2023-01-01T09:00:00"])})
+    assert sync.sync(url) == {"pulled": 0, "applied": 0, "pushed": 2}
+
+    devices(1)
+    assert sync.sync(url) == {"pulled": 2, "applied": 2, "pushed": 0}
+    data = db_handler.load_all()["uuid-1"]
+    assert data["habit"]["name"] == "Read"
+    assert data["periods"] == [{"start": "2023-01-01T00:00:00", "end": "2023-01-02T00:00:00"}]
+    assert data["completions"] == ["2023-01-01T09:00:00"]
+
+    # nothing changed: nothing travels, not even this device's own changes
+    assert sync.sync(url) == {"pulled": 0, "applied": 0, "pushed": 0}
+
+
+def test_earlier_start_date_reaches_other_device(server, devices):
+    """Moving a habit's start date back, e.g. by an import, is synced too."""
+    url = f"http://127.0.0.1:{server.port}"
+    devices(0)
+    db_handler.save_all({"uuid-1": habit_data("Read")})
+    sync.sync(url)
+    devices(1)
+    sync.sync(url)
+
+    devices(0)
+    data = habit_data("Read")
+    data["habit"]["start_date"] = "2022-12-01T00:00:00"
+    db_handler.save_all({"uuid-1": data})
+    assert db_handler.load_all()["uuid-1"]["habit"]["start_date"] == "2022-12-01T00:00:00"
+    assert sync.sync(url)["pushed"] == 1
+
+    devices(1)
+    sync.sync(url)
+    assert db_handler.load_all()["uuid-1"]["habit"]["start_date"] == "2022-12-01T00:00:00"
+
+
+def test_saving_only_logs_changes(devices):
+    """Saving unchanged habits logs nothing, only edits and completion events."""
+    devices(0)
+    db_handler.save_all({"uuid-1": habit_data("Read", ["2023-01-01T09:00:00"])})
+    db_handler.initialize_sync()
+    logged = len(db_handler.local_changes(0, 100))
+
+    db_handler.save_all({"uuid-1": habit_data("Read", ["2023-01-01T09:00:00"])})
+    assert len(db_handler.local_changes(0, 100)) == logged
+
+    db_handler.save_all({"uuid-1": habit_data("Read more", ["2023-01-02T09:00:00"])})
+    kinds = [change["kind"] for change in db_handler.local_changes(0, 100)[logged:]]
+    assert sorted(kinds) == ["complete", "habit", "uncomplete"]
+
+    changed = habit_data("Read more", ["2023-01-02T09:00:00"])
+    changed["habit"]["target"] = 2
+    db_handler.save_all({"uuid-1": changed})
+    change = db_handler.local_changes(0, 100)[-1]
+    assert change["kind"] == "habit" and '"target":2' in change["value"]
+
+
+def test_conflicts_converge(server, devices):
+    """Concurrent edits keep the latest one everywhere, and deletions win."""
+    url = f"http://127.0.0.1:{server.port}"
+    devices(0)
+    db_handler.save_all({"uuid-1": habit_data("Read"), "uuid-2": habit_data("Run")})
+    sync.sync(url)
+    devices(1)
+    sync.sync(url)
+
+    devices(0)
+    db_handler.save_all({"uuid-1": habit_data("Read (first)"), "uuid-2": habit_data("Run")})
+    time.sleep(0.01)  # stamps have millisecond precision
+    devices(1)
+    db_handler.save_all({"uuid-1": habit_data("Read (second)")})  # and deletes uuid-2
+
+    for device in (0, 1, 0):
+        devices(device)
+        sync.sync(url)
+
+    for device in (0, 1):
+        devices(device)
+        data = db_handler.load_all()
+        assert list(data) == ["uuid-1"]
+        assert data["uuid-1"]["habit"]["name"] == "Read (second)"
+
+
+def test_batches(server, devices):
+    """Changes are pushed and pulled in batches of the given size."""
+    url = f"http://127.0.0.1:{server.port}"
+    devices(0)
+    completions = [datetime(2023, 1, 1, 9, minute).isoformat() for minute in range(25)]
+    db_handler.save_all({"uuid-1": habit_data("Read", completions)})
+    assert sync.sync(url, batch_size=10)["pushed"] == 26
+
+    devices(1)
+    assert sync.sync(url, batch_size=10)["applied"] == 26
+    assert len(db_handler.load_all()["uuid-1"]["completions"]) == 25
+
+
+def test_server_accepts_gzip_and_rejects_bad_requests():
+    """Pushes may be gzip-compressed; other devices' changes are refused."""
+    sync_server = SyncServer()
+    change = {
+        "kind": "delete",
+        "habit": "uuid-1",
+        "item": "",
+        "value": None,
+        "stamp": "2023-01-01T00:00:00.000Z",
+        "device": "a",
+    }
+    body = gzip.compress(json.dumps({"device": "a", "changes": [change]}).encode())
+
+    status, _, response = asyncio.run(sync_server.handle("POST", "/changes", {"content-encoding": "gzip"}, body))
+    assert (status, json.loads(response)) == (200, {"cursor": 1})
+
+    status, _, response = asyncio.run(sync_server.handle("GET", "/changes?since=0&exclude=b"))
+    assert json.loads(response)["changes"] == [change]
+
+    body = json.dumps({"device": "b", "changes": [change]}).encode()
+    assert asyncio.run(sync_server.handle("POST", "/changes", {}, body))[0] == 400
+    assert asyncio.run(sync_server.handle("POST", "/changes", {}, b"not json"))[0] == 400
+    assert asyncio.run(sync_server.handle("GET", "/elsewhere"))[0] == 404